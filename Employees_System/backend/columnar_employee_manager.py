@@ -0,0 +1,297 @@
+# imports
+import bisect
+from array import array
+try:
+    import numpy as np
+except ImportError:      # NumPy is optional, fall back to pure Python
+    np = None
+class EmployeeView:
+    '''
+    Lightweight view of one employee row in a ColumnarEmployeeManager.
+    Reads and salary writes go straight to the columns.
+    A view is only valid until the next delete, which may compact rows.
+    '''
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row : int):
+        self.store = store
+        self.row = row
+
+    @property
+    def name(self):
+        return self.store.name_col[self.row]
+
+    @property
+    def age(self):
+        return self.store.age_col[self.row]
+
+    @property
+    def salary(self):
+        return self.store.salary_col[self.row]
+
+    @salary.setter
+    def salary(self, salary : int):
+        self.store.salary_col[self.row] = salary
+
+    def __str__(self):
+        # Same format as Employee
+        return f'Employee {self.name} has age {self.age} and salary {self.salary}'
+
+    def __repr__(self):
+        return f'{self.name} -> age : {self.age}, salary : {self.salary}'
+
+
+class ColumnarEmployeeManager:
+    '''
+    Memory-compact alternative to EmployeeManager with the same API.
+
+    Employees are stored column by column instead of one object each:
+        - names in a list
+        - ages in array('i')
+        - salaries in array('q') (64-bit, so raises cannot overflow)
+    Deleted rows are marked dead in a bytearray and the columns are
+    compacted once more than half of the rows are dead.
+
+    Queries return EmployeeView objects instead of Employee objects.
+    '''
+    def __init__(self):
+        self.name_col = []
+        self.age_col = array('i')
+        self.salary_col = array('q')
+        # 1 for live rows, 0 for deleted rows
+        self.alive = bytearray()
+        self.dead = 0
+        # sorted list of distinct ages present
+        self.ages = []
+        # age -> array of live rows in insertion order
+        self.by_age = {}
+        # name -> row, or array of rows when the name is shared
+        self.by_name = {}
+        # optional PersistentStore recording every change
+        self.journal = None
+
+    def __len__(self):
+        return len(self.name_col) - self.dead
+
+    def add_emp(self, name : str, age : int, salary : int):
+        # Appends a new row and indexes it by age and name
+        row = len(self.name_col)
+        self.name_col.append(name)
+        self.age_col.append(age)
+        self.salary_col.append(salary)
+        self.alive.append(1)
+        self._index_row(row, name, age)
+        if self.journal is not None:
+            self.journal.record('add_emp', name, age, salary)
+
+    def add_emps(self, rows, reindex : bool = True):
+        '''
+        Adds many (name, age, salary) rows at once.
+        With reindex=False the age and name indexes are left stale,
+        so reindex() must be called once after the last batch.
+        '''
+        if self.journal is not None:
+            rows = list(rows)
+        first = len(self.name_col)
+        for name, age, salary in rows:
+            self.name_col.append(name)
+            self.age_col.append(age)
+            self.salary_col.append(salary)
+        self.alive.extend(b'\x01' * (len(self.name_col) - first))
+        if reindex:
+            for row in range(first, len(self.name_col)):
+                self._index_row(row, self.name_col[row], self.age_col[row])
+        # journaled once applied, see PersistentStore
+        if self.journal is not None:
+            self.journal.record('add_emps', rows)
+
+    def reindex(self):
+        # Rebuilds the age and name indexes from the live rows. O(n)
+        self.ages = []
+        self.by_age = {}
+        self.by_name = {}
+        alive = self.alive
+        for row, (name, age) in enumerate(zip(self.name_col, self.age_col)):
+            if alive[row]:
+                self._index_row(row, name, age)
+
+    def _index_row(self, row : int, name : str, age : int):
+        bucket = self.by_age.get(age)
+        if bucket is None:
+            bucket = self.by_age[age] = array('i')
+            bisect.insort(self.ages, age)
+        bucket.append(row)
+        # most names are unique, so store a plain row until a name repeats
+        rows = self.by_name.get(name)
+        if rows is None:
+            self.by_name[name] = row
+        elif isinstance(rows, int):
+            self.by_name[name] = array('i', (rows, row))
+        else:
+            rows.append(row)
+
+    def _unindex_name(self, name : str, row : int):
+        rows = self.by_name[name]
+        if isinstance(rows, int):
+            del self.by_name[name]
+            return
+        rows.remove(row)
+        if len(rows) == 1:
+            self.by_name[name] = rows[0]
+
+    def _first_row(self, name : str):
+        # First live row with this name, or None
+        rows = self.by_name.get(name)
+        if rows is None or isinstance(rows, int):
+            return rows
+        return rows[0]
+
+    def get_employees(self):
+        # Return views of all live rows in insertion order
+        alive = self.alive
+        return [EmployeeView(self, row) for row in range(len(alive)) if alive[row]]
+
+    def iter_employees(self, offset : int = 0, limit : int = None):
+        '''
+        Lazily yields views of live rows in insertion order, skipping the
+        first `offset` and stopping after `limit` employees.
+        The manager must not be modified while iterating.
+        '''
+        count = len(self) - offset if limit is None else min(limit, len(self) - offset)
+        if count <= 0:
+            return
+        if not self.dead:
+            # no gaps: offset maps directly to a row
+            for row in range(offset, offset + count):
+                yield EmployeeView(self, row)
+            return
+        alive = self.alive
+        row = 0
+        # skip the first `offset` live rows
+        while offset:
+            offset -= alive[row]
+            row += 1
+        while count:
+            if alive[row]:
+                yield EmployeeView(self, row)
+                count -= 1
+            row += 1
+
+    def age_range(self, start : int, end : int):
+        # Bounds of the ages within [start, end] in the sorted ages list
+        return bisect.bisect_left(self.ages, start), bisect.bisect_right(self.ages, end)
+
+    def find_by_age(self, start : int, end : int):
+        '''
+        Return views of all employees whose age is within [start, end]
+        inclusive, ordered by age then by insertion. Nothing is removed.
+        '''
+        lo, hi = self.age_range(start, end)
+        return [EmployeeView(self, row) for age in self.ages[lo:hi] for row in self.by_age[age]]
+
+    def delete_by_age(self, start : int, end : int):
+        '''
+        Delete all employees whose age is within [start, end] inclusive.
+        Returns a list of deleted employee names for feedback.
+        '''
+        lo, hi = self.age_range(start, end)
+        rows = []
+        for age in self.ages[lo:hi]:
+            rows.extend(self.by_age.pop(age))
+        del self.ages[lo:hi]
+        # Sort rows to preserve original order in feedback
+        rows.sort()
+        names = []
+        for row in rows:
+            name = self.name_col[row]
+            self.alive[row] = 0
+            self._unindex_name(name, row)
+            names.append(name)
+        self.dead += len(rows)
+        if rows and self.journal is not None:
+            self.journal.record('delete_by_age', start, end)
+        if self.dead * 2 > len(self.name_col):
+            self.compact()
+        return names
+
+    def compact(self):
+        '''
+        Rewrites the columns without dead rows and rebuilds the indexes. O(n).
+        '''
+        alive = self.alive
+        live = [row for row in range(len(alive)) if alive[row]]
+        self.name_col = [self.name_col[row] for row in live]
+        self.age_col = array('i', (self.age_col[row] for row in live))
+        self.salary_col = array('q', (self.salary_col[row] for row in live))
+        self.alive = bytearray(b'\x01') * len(live)
+        self.dead = 0
+        self.reindex()
+
+    def update_salary(self, name, salary):
+        '''
+        Updates the salary of the first employee with matching name.
+        Returns True if successful, False if employee not found.
+        '''
+        row = self._first_row(name)
+        if row is None:
+            return False
+        self.salary_col[row] = salary
+        if self.journal is not None:
+            self.journal.record('update_salary', name, salary)
+        return True
+
+    def bulk_update_salaries(self, updates):
+        '''
+        Applies a batch of (name, salary) updates in one pass.
+        Each update behaves like update_salary.
+        Returns a list of names that were not found.
+        '''
+        if self.journal is not None:
+            updates = list(updates)
+        missing = []
+        for name, salary in updates:
+            row = self._first_row(name)
+            if row is None:
+                missing.append(name)
+            else:
+                self.salary_col[row] = salary
+        if self.journal is not None:
+            self.journal.record('bulk_update_salaries', updates)
+        return missing
+
+    def columns(self):
+        '''
+        Returns (names, ages, salaries) of all employees in insertion order.
+        Dead rows are compacted away first, so the live columns themselves
+        are returned without copying. Existing views become invalid.
+        '''
+        if self.dead:
+            self.compact()
+        return self.name_col, self.age_col, self.salary_col
+
+    def apply_raise(self, percent : float):
+        # Raises every salary by percent, rounded to the nearest integer
+        factor = 1 + percent / 100
+        if np is not None:
+            # update the column in place through a NumPy view of its buffer
+            salaries = np.frombuffer(self.salary_col, dtype=np.int64)
+            salaries[:] = np.rint(salaries * factor)
+            del salaries
+        else:
+            self.salary_col = array('q', (round(salary * factor) for salary in self.salary_col))
+        if self.journal is not None:
+            self.journal.record('apply_raise', percent)
+
+    def snapshot_state(self):
+        # Compacted columns, for PersistentStore (arrays pickle as raw bytes)
+        return self.columns()
+
+    def restore_state(self, state):
+        # Replaces all rows with the columns from snapshot_state()
+        names, ages, salaries = state
+        self.name_col = list(names)
+        self.age_col = array('i', ages)
+        self.salary_col = array('q', salaries)
+        self.alive = bytearray(b'\x01') * len(self.name_col)
+        self.dead = 0
+        self.reindex()
@@ -2,7 +2,10 @@ class Employee:
     '''
     Holds employee data
     This class is only a data container
+    __slots__ avoids a per-instance __dict__ to keep each employee small
     '''
+    __slots__ = ('name', 'age', 'salary')
+
     def __init__(self, name : str, age : int, salary : int):
         # Assign attributes directly
         self.name = name
@@ -1,37 +1,129 @@
 # imports
+import bisect
+from array import array
+from itertools import islice
 from backend.employee import Employee
 class EmployeeManager:
     '''
     Holds a list of employees and implements all business logic:
     adding, deleting, updating, and retrieving employees.
     It does NOT handle user input/output.
+
+    Employees are stored by a running serial number (insertion order)
+    and indexed by age, so age range queries and deletes only visit
+    the ages inside the range. A name index makes salary updates O(1).
     '''
     def __init__(self):
-        # Initialize empty list of employees
-        self.employees = []
+        # serial number -> employee, kept in insertion order
+        self.employees = {}
+        self.next_serial = 0
+        # sorted list of distinct ages present
+        self.ages = []
+        # age -> {serial number: employee}
+        self.by_age = {}
+        # name -> {serial number: employee}, first key is the oldest entry
+        self.by_name = {}
+        # optional PersistentStore recording every change
+        self.journal = None
+
+    def __len__(self):
+        return len(self.employees)
 
     def add_emp(self, name : str, age : int, salary : int):
-        # Adds a new employee object to the list
-        self.employees.append(Employee(name, age, salary))
-    
+        # Adds a new employee object and indexes it by age and name
+        emp = Employee(name, age, salary)
+        serial = self.next_serial
+        self.next_serial += 1
+        self.employees[serial] = emp
+        self._index(serial, emp)
+        if self.journal is not None:
+            self.journal.record('add_emp', name, age, salary)
+
+    def add_emps(self, rows, reindex : bool = True):
+        '''
+        Adds many (name, age, salary) rows at once.
+        With reindex=False the age and name indexes are left stale,
+        so reindex() must be called once after the last batch.
+        '''
+        if self.journal is not None:
+            rows = list(rows)
+        first = serial = self.next_serial
+        employees = self.employees
+        for name, age, salary in rows:
+            employees[serial] = Employee(name, age, salary)
+            serial += 1
+        self.next_serial = serial
+        if reindex:
+            for serial in range(first, serial):
+                self._index(serial, employees[serial])
+        # journaled once applied, see PersistentStore
+        if self.journal is not None:
+            self.journal.record('add_emps', rows)
+
+    def reindex(self):
+        # Rebuilds the age and name indexes from scratch. O(n)
+        self.by_age = {}
+        self.by_name = {}
+        for serial, emp in self.employees.items():
+            self.by_age.setdefault(emp.age, {})[serial] = emp
+            self.by_name.setdefault(emp.name, {})[serial] = emp
+        self.ages = sorted(self.by_age)
+
+    def _index(self, serial : int, emp : Employee):
+        bucket = self.by_age.get(emp.age)
+        if bucket is None:
+            bucket = self.by_age[emp.age] = {}
+            bisect.insort(self.ages, emp.age)
+        bucket[serial] = emp
+        self.by_name.setdefault(emp.name, {})[serial] = emp
+
     def get_employees(self):
-        # Return a copy of the list to prevent external modifications
-        return self.employees.copy()
-    
+        # Return a new list to prevent external modifications
+        return list(self.employees.values())
+
+    def iter_employees(self, offset : int = 0, limit : int = None):
+        '''
+        Lazily yields employees in insertion order without copying,
+        skipping the first `offset` and stopping after `limit` employees.
+        The manager must not be modified while iterating.
+        '''
+        end = None if limit is None else offset + limit
+        return islice(self.employees.values(), offset, end)
+
+    def age_range(self, start : int, end : int):
+        # Bounds of the ages within [start, end] in the sorted ages list
+        return bisect.bisect_left(self.ages, start), bisect.bisect_right(self.ages, end)
+
+    def find_by_age(self, start : int, end : int):
+        '''
+        Return all employees whose age is within [start, end] inclusive,
+        ordered by age then by insertion. Nothing is removed.
+        '''
+        lo, hi = self.age_range(start, end)
+        return [emp for age in self.ages[lo:hi] for emp in self.by_age[age].values()]
+
     def delete_by_age(self, start : int, end : int):
         '''
         Delete all employees whose age is within [start, end] inclusive.
         Returns a list of deleted employee names for feedback.
         '''
-        del_emp_names = []
-        # Iterate in reverse to safely remove items while iterating
-        for idx in range(len(self.employees)-1, -1, -1):
-            emp = self.employees[idx]
-            if start <= emp.age <= end:
-                del_emp_names.append(emp.name)
-                self.employees.pop(idx)          # remove employee
-        # Reverse the list to preserve original order in feedback
-        return del_emp_names[::-1]
+        lo, hi = self.age_range(start, end)
+        deleted = []
+        for age in self.ages[lo:hi]:
+            # drop the whole age bucket at once
+            for serial, emp in self.by_age.pop(age).items():
+                del self.employees[serial]
+                same_name = self.by_name[emp.name]
+                del same_name[serial]
+                if not same_name:
+                    del self.by_name[emp.name]
+                deleted.append((serial, emp.name))
+        del self.ages[lo:hi]
+        if deleted and self.journal is not None:
+            self.journal.record('delete_by_age', start, end)
+        # Sort by serial to preserve original order in feedback
+        deleted.sort()
+        return [name for _, name in deleted]
 
 
     def update_salary(self, name, salary):
@@ -39,9 +131,61 @@ class EmployeeManager:
         Updates the salary of the first employee with matching name.
         Returns True if successful, False if employee not found.
         '''
-        for emp in self.employees:
-            if emp.name == name:
-                emp.salary = salary
-                return True
-        return False
+        same_name = self.by_name.get(name)
+        if not same_name:
+            return False
+        # dicts keep insertion order, so the first value is the first match
+        next(iter(same_name.values())).salary = salary
+        if self.journal is not None:
+            self.journal.record('update_salary', name, salary)
+        return True
+
+    def bulk_update_salaries(self, updates):
+        '''
+        Applies a batch of (name, salary) updates in one pass.
+        Each update behaves like update_salary.
+        Returns a list of names that were not found.
+        '''
+        if self.journal is not None:
+            updates = list(updates)
+        by_name = self.by_name
+        missing = []
+        for name, salary in updates:
+            same_name = by_name.get(name)
+            if same_name:
+                next(iter(same_name.values())).salary = salary
+            else:
+                missing.append(name)
+        if self.journal is not None:
+            self.journal.record('bulk_update_salaries', updates)
+        return missing
+
+    def columns(self):
+        '''
+        Returns (names, ages, salaries) of all employees in insertion order:
+        names as a list, ages as array('i') and salaries as array('q').
+        Used by PayrollAnalytics for whole-column reports.
+        '''
+        employees = self.employees.values()
+        return ([emp.name for emp in employees],
+                array('i', (emp.age for emp in employees)),
+                array('q', (emp.salary for emp in employees)))
+
+    def apply_raise(self, percent : float):
+        # Raises every salary by percent, rounded to the nearest integer
+        factor = 1 + percent / 100
+        for emp in self.employees.values():
+            emp.salary = round(emp.salary * factor)
+        if self.journal is not None:
+            self.journal.record('apply_raise', percent)
+
+    def snapshot_state(self):
+        # (names, ages, salaries) columns, the same format as the columnar store
+        return self.columns()
 
+    def restore_state(self, state):
+        # Replaces all employees with the columns from snapshot_state()
+        self.employees = {}
+        self.next_serial = 0
+        self.add_emps(zip(*state), reindex=False)
+        self.reindex()
@@ -0,0 +1,30 @@
+# imports
+from common.importer import import_rows, read_records
+def parse_employees(records):
+    # Converts raw records to (name, age, salary) tuples
+    for record in records:
+        yield record['name'], int(record['age']), int(record['salary'])
+
+
+def is_valid(row) -> bool:
+    # Rows with no name or a negative age or salary are not imported
+    name, age, salary = row
+    return bool(name.strip()) and age >= 0 and salary >= 0
+
+
+def import_employees(manager, path : str, batch_size : int = 10000):
+    '''
+    Loads employees from a CSV or JSONL file into the manager.
+
+    Batches are added without index maintenance and the indexes are
+    rebuilt once at the end. Invalid rows (see is_valid) are counted
+    as skipped.
+
+    Returns:
+        ImportStats
+    '''
+    def add_valid(batch):
+        valid = [row for row in batch if is_valid(row)]
+        manager.add_emps(valid, reindex=False)
+        return len(batch) - len(valid)
+    return import_rows(add_valid, parse_employees(read_records(path)), batch_size, manager.reindex)
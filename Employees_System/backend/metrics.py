@@ -0,0 +1,10 @@
+'''
+Employee gauges for the shared metrics registry (common.metrics).
+'''
+def manager_gauges(metrics, manager):
+    '''
+    Registers the size gauges of an employee manager.
+    '''
+    metrics.gauge('stored', 'Employees stored.', lambda: len(manager))
+    if hasattr(manager, 'ages'):
+        metrics.gauge('distinct_ages', 'Distinct ages in the age index.', lambda: len(manager.ages))
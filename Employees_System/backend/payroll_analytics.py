@@ -0,0 +1,122 @@
+# imports
+import heapq
+import math
+try:
+    import numpy as np
+except ImportError:      # NumPy is optional, fall back to pure Python
+    np = None
+class PayrollAnalytics:
+    '''
+    Batch payroll reports over an employee manager.
+
+    Works on whole columns returned by manager.columns() instead of
+    employee objects. With NumPy installed the columns are wrapped
+    without copying and every report is a vectorized operation;
+    otherwise the same reports are computed in pure Python.
+    '''
+    def __init__(self, manager):
+        self.manager = manager
+
+    def _columns(self):
+        # (names, ages, salaries) of all employees, as NumPy arrays if possible
+        names, ages, salaries = self.manager.columns()
+        if np is not None:
+            ages = np.frombuffer(ages, dtype=np.int32)
+            salaries = np.frombuffer(salaries, dtype=np.int64)
+        return names, ages, salaries
+
+    def total_salary(self):
+        # Sum of all salaries
+        _, _, salaries = self._columns()
+        return int(salaries.sum()) if np is not None else sum(salaries)
+
+    def mean_salary(self):
+        # Average salary, or None if there are no employees
+        _, _, salaries = self._columns()
+        if len(salaries) == 0:
+            return None
+        return float(salaries.mean()) if np is not None else sum(salaries) / len(salaries)
+
+    def median_salary(self):
+        # Middle salary, or None if there are no employees
+        return self.percentile(50)
+
+    def percentile(self, p : float):
+        '''
+        Salary at percentile p (0 - 100) using linear interpolation
+        between the closest ranks. Returns None if there are no employees,
+        raises ValueError for p outside 0 - 100.
+        '''
+        if not 0 <= p <= 100:
+            raise ValueError(f'percentile must be between 0 and 100, not {p}')
+        _, _, salaries = self._columns()
+        if len(salaries) == 0:
+            return None
+        if np is not None:
+            return float(np.percentile(salaries, p))
+        ordered = sorted(salaries)
+        pos = (len(ordered) - 1) * p / 100
+        lo = math.floor(pos)
+        hi = min(lo + 1, len(ordered) - 1)
+        return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+    def salary_histogram_by_age_band(self, band_width : int = 10, bins : int = 10):
+        '''
+        Counts employees per salary bin inside each age band.
+
+        Age bands are [start, start + band_width) aligned to multiples of
+        band_width. All bands share the same salary bin edges, which split
+        [min salary, max salary] into `bins` equal bins.
+
+        Returns:
+            (edges, histogram): the bins + 1 salary edges and a dict
+            band start age -> list of counts per salary bin
+        '''
+        _, ages, salaries = self._columns()
+        if len(salaries) == 0:
+            return [], {}
+        if np is not None:
+            low, high = int(salaries.min()), int(salaries.max())
+            edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+            bands = ages // band_width
+            # map each band to a row and count (band, bin) pairs in one pass
+            band_ids, rows = np.unique(bands, return_inverse=True)
+            cols = np.clip(np.searchsorted(edges, salaries, side='right') - 1, 0, bins - 1)
+            counts = np.zeros((len(band_ids), bins), dtype=np.int64)
+            np.add.at(counts, (rows, cols), 1)
+            return edges.tolist(), {int(band) * band_width: row.tolist()
+                                    for band, row in zip(band_ids, counts)}
+        low, high = min(salaries), max(salaries)
+        width = ((high if high > low else low + 1) - low) / bins
+        edges = [low + width * idx for idx in range(bins + 1)]
+        histogram = {}
+        for age, salary in zip(ages, salaries):
+            band = age // band_width * band_width
+            col = min(int((salary - low) / width), bins - 1)
+            histogram.setdefault(band, [0] * bins)[col] += 1
+        return edges, dict(sorted(histogram.items()))
+
+    def top_earners(self, n : int):
+        '''
+        Returns the n highest paid employees as (name, salary) pairs,
+        highest first; equal salaries in insertion (id) order.
+        '''
+        names, _, salaries = self._columns()
+        n = min(n, len(salaries))
+        if n <= 0:
+            return []
+        if np is not None:
+            # partial sort: only the top n salaries are ordered; of the rows
+            # tied with the lowest of them, the earliest ones are kept
+            lowest = np.partition(salaries, len(salaries) - n)[len(salaries) - n]
+            above = np.flatnonzero(salaries > lowest)
+            top = np.concatenate((above, np.flatnonzero(salaries == lowest)[:n - len(above)]))
+            top = top[np.lexsort((top, -salaries[top]))]
+            return [(names[row], int(salaries[row])) for row in top]
+        # nlargest is stable, so equal salaries stay in row order
+        top = heapq.nlargest(n, range(len(salaries)), key=salaries.__getitem__)
+        return [(names[row], salaries[row]) for row in top]
+
+    def raise_salaries(self, percent : float):
+        # Across-the-board raise, e.g. percent=5 for +5%
+        self.manager.apply_raise(percent)
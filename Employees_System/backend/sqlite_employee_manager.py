@@ -0,0 +1,151 @@
+# imports
+import sqlite3
+import threading
+from array import array
+from backend.employee import Employee
+class SQLiteEmployeeManager:
+    '''
+    EmployeeManager with the same API, backed by a SQLite database
+    for datasets that do not fit in memory.
+
+    The employees table is indexed on age (range queries and deletes)
+    and on name (salary updates). The rowid keeps insertion order.
+    The database runs in WAL mode, every public method is one
+    transaction, and batches go through executemany.
+    Queries return Employee objects, which are copies: change salaries
+    through update_salary, not by assigning to the returned objects.
+    The connection may be used from several threads (e.g. the metrics
+    exporter counting employees), one call at a time under a lock.
+    '''
+    def __init__(self, path : str = ':memory:'):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        # WAL is safe against corruption with NORMAL, and much faster than FULL
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        # SQL ROUND rounds halves away from zero, the other stores round
+        # them to even like Python's round
+        self.conn.create_function('round_even', 1, round, deterministic=True)
+        with self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS employees (
+                                     id INTEGER PRIMARY KEY,
+                                     name TEXT NOT NULL,
+                                     age INTEGER NOT NULL,
+                                     salary INTEGER NOT NULL)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS employees_age ON employees (age)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS employees_name ON employees (name)')
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM employees').fetchone()[0]
+
+    def add_emp(self, name : str, age : int, salary : int):
+        # Inserts one employee
+        with self.lock, self.conn:
+            self.conn.execute('INSERT INTO employees (name, age, salary) VALUES (?, ?, ?)',
+                              (name, age, salary))
+
+    def add_emps(self, rows, reindex : bool = True):
+        '''
+        Inserts many (name, age, salary) rows in one transaction.
+        SQLite maintains its indexes itself, so reindex is accepted only
+        for compatibility with the in-memory managers.
+        '''
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT INTO employees (name, age, salary) VALUES (?, ?, ?)', rows)
+
+    def reindex(self):
+        # Refreshes the query planner statistics after bulk loads
+        with self.lock:
+            self.conn.execute('ANALYZE')
+
+    def get_employees(self):
+        # Return all employees in insertion order
+        return list(self.iter_employees())
+
+    def iter_employees(self, offset : int = 0, limit : int = None):
+        '''
+        Lazily yields employees in insertion order, streaming rows from
+        the cursor, skipping the first `offset` and stopping after `limit`.
+        The lock is held while fetching each chunk, not between them.
+        '''
+        with self.lock:
+            cursor = self.conn.execute('SELECT name, age, salary FROM employees ORDER BY id LIMIT ? OFFSET ?',
+                                       (-1 if limit is None else limit, offset))
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for row in rows:
+                yield Employee(*row)
+
+    def find_by_age(self, start : int, end : int):
+        '''
+        Return all employees whose age is within [start, end] inclusive,
+        ordered by age then by insertion. Nothing is removed.
+        '''
+        with self.lock:
+            cursor = self.conn.execute('''SELECT name, age, salary FROM employees
+                                          WHERE age BETWEEN ? AND ? ORDER BY age, id''', (start, end))
+            return [Employee(*row) for row in cursor]
+
+    def delete_by_age(self, start : int, end : int):
+        '''
+        Delete all employees whose age is within [start, end] inclusive.
+        Returns a list of deleted employee names for feedback.
+        '''
+        with self.lock, self.conn:
+            names = [name for name, in self.conn.execute(
+                'SELECT name FROM employees WHERE age BETWEEN ? AND ? ORDER BY id', (start, end))]
+            self.conn.execute('DELETE FROM employees WHERE age BETWEEN ? AND ?', (start, end))
+        return names
+
+    # the first employee with a name is the one with the smallest id
+    UPDATE_SALARY = '''UPDATE employees SET salary = ? WHERE id =
+                           (SELECT MIN(id) FROM employees WHERE name = ?)'''
+
+    def update_salary(self, name, salary):
+        '''
+        Updates the salary of the first employee with matching name.
+        Returns True if successful, False if employee not found.
+        '''
+        with self.lock, self.conn:
+            return self.conn.execute(self.UPDATE_SALARY, (salary, name)).rowcount > 0
+
+    def bulk_update_salaries(self, updates):
+        '''
+        Applies a batch of (name, salary) updates in one transaction.
+        Each update behaves like update_salary and reuses the same
+        prepared statement. Returns a list of names that were not found.
+        '''
+        missing = []
+        with self.lock, self.conn:
+            execute = self.conn.execute
+            for name, salary in updates:
+                if execute(self.UPDATE_SALARY, (salary, name)).rowcount == 0:
+                    missing.append(name)
+        return missing
+
+    def columns(self):
+        '''
+        Returns (names, ages, salaries) of all employees in insertion order,
+        as a list, array('i') and array('q'), for PayrollAnalytics.
+        '''
+        names, ages, salaries = [], array('i'), array('q')
+        with self.lock:
+            for name, age, salary in self.conn.execute('SELECT name, age, salary FROM employees ORDER BY id'):
+                names.append(name)
+                ages.append(age)
+                salaries.append(salary)
+        return names, ages, salaries
+
+    def apply_raise(self, percent : float):
+        # Raises every salary by percent, rounded to the nearest integer
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE employees SET salary = round_even(salary * ?)',
+                              (1 + percent / 100,))
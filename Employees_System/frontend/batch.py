@@ -0,0 +1,33 @@
+# imports
+from common import batch
+
+class BatchRunner(batch.BatchRunner):
+    '''
+    Runs a script of employee commands (see common.batch.BatchRunner):
+        add NAME AGE SALARY
+        list
+        delete START END
+        update NAME SALARY
+    '''
+    def __init__(self, manager, out = None, flush_every : int = 10000):
+        super().__init__(manager, out, flush_every)
+        self.commands = {'add': self.add, 'list': self.list,
+                         'delete': self.delete, 'update': self.update}
+
+    # each command returns (succeeded, output text or None)
+
+    def add(self, name : str, age : str, salary : str):
+        self.manager.add_emp(name, int(age), int(salary))
+        return True, None
+
+    def list(self):
+        return True, '\n'.join(map(str, self.manager.iter_employees())) or None
+
+    def delete(self, start : str, end : str):
+        names = self.manager.delete_by_age(int(start), int(end))
+        return True, f'Deleting {", ".join(names)}' if names else None
+
+    def update(self, name : str, salary : str):
+        if self.manager.update_salary(name, int(salary)):
+            return True, None
+        return False, f'no employee named {name}'
@@ -1,18 +1,20 @@
 # imports
 from backend.employee_manager import EmployeeManager
+from backend.importer import import_employees
 class Frontend:
     '''
     Handles all user input/output.
     Runs the main loop and calls EmployeeManager for operations.
     '''
-    def __init__(self):
-        # Initialize the manager object
-        self.manager = EmployeeManager()
+    def __init__(self, manager = None):
+        # Initialize the manager object (EmployeeManager by default)
+        self.manager = manager if manager is not None else EmployeeManager()
 
     def start_menu(self):
         # Prints the main menu
         choices = ['Enter your choice:', '\t1) Add new employee', '\t2) Print all employees',
-                        '\t3) Delete by age', '\t4) Update Salary by name', '\t5) End the program']
+                        '\t3) Delete by age', '\t4) Update Salary by name',
+                        '\t5) Import employees from file', '\t6) End the program']
         print('\n'.join(choices))
     
     def get_choice(self, start : int, end : int):
@@ -35,7 +37,7 @@ class Frontend:
         # Main program loop
         while True :
             self.start_menu()
-            choice = self.get_choice(1, 5)
+            choice = self.get_choice(1, 6)
 
             if choice == 1:
                 # Add employee
@@ -43,13 +45,12 @@ class Frontend:
                 self.manager.add_emp(name, age, salary)
 
             elif choice == 2:
-                # Print all employees
-                employees = self.manager.get_employees()
-                # Not an empty list
-                if len(employees) != 0:
-                    for emp in employees:
-                        print(emp)
-                else :
+                # Print all employees, streaming them without a copy
+                empty = True
+                for emp in self.manager.iter_employees():
+                    print(emp)
+                    empty = False
+                if empty:
                     print('No employees yet')
                     
             elif choice == 3:
@@ -72,5 +73,13 @@ class Frontend:
                     print('No such employee!')
 
             elif choice == 5:
+                # Bulk import from a CSV or JSONL file
+                path = input('Enter file path (.csv or .jsonl): ')
+                try:
+                    print(import_employees(self.manager, path))
+                except (OSError, ValueError, KeyError) as error:
+                    print(f'Import failed: {error}')
+
+            elif choice == 6:
                 # Exit program
                 break
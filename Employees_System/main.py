@@ -7,12 +7,77 @@ Description:
     Features: Add, list, delete by age, update salary.
 """
 # imports
+import argparse
+import sys
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.importer import import_employees
+from backend.metrics import manager_gauges
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+from common.metrics import Metrics, instrument
+from common.storage import PersistentStore
+from frontend.batch import BatchRunner
 from frontend.frontdend import Frontend
 
 def main():
+    parser = argparse.ArgumentParser(description='Employee System')
+    parser.add_argument('--columnar', action='store_true',
+                        help='use the memory-compact columnar employee store')
+    parser.add_argument('--sqlite', metavar='DB',
+                        help='store employees in a SQLite database file')
+    parser.add_argument('--import', dest='import_path', metavar='FILE',
+                        help='load employees from a CSV or JSONL file at startup')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='keep employees on disk (journal + snapshots) in DIR')
+    parser.add_argument('--sync-every', type=int, default=1, metavar='N',
+                        help='fsync the journal every N operations (default 1)')
+    parser.add_argument('--snapshot-every', type=int, metavar='N',
+                        help='write a snapshot every N operations')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands in FILE ('-' for stdin) instead of the menu")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='record manager metrics and write them (Prometheus text) to FILE on exit')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='record manager metrics and serve them at http://127.0.0.1:PORT/metrics')
+    args = parser.parse_args()
+    if args.sqlite and (args.columnar or args.data_dir):
+        parser.error('--sqlite cannot be combined with --columnar or --data-dir')
     # Initialize Frontend and start main loop
-    app = Frontend()
-    app.run()
+    if args.sqlite:
+        manager = SQLiteEmployeeManager(args.sqlite)
+    elif args.columnar:
+        manager = ColumnarEmployeeManager()
+    else:
+        manager = None
+    app = Frontend(manager)
+    metrics = None
+    if args.metrics or args.metrics_port:
+        # Opt-in: only an instrumented manager pays for timing
+        metrics = Metrics('employees')
+        instrument(app.manager, metrics)
+        manager_gauges(metrics, app.manager)
+        if args.metrics_port:
+            metrics.serve(args.metrics_port)
+    store = None
+    if args.data_dir:
+        store = PersistentStore(args.data_dir, args.sync_every, snapshot_every=args.snapshot_every)
+        print(f'Recovered state, replayed {store.open(app.manager)} operations')
+    if args.import_path:
+        print(import_employees(app.manager, args.import_path))
+    if args.batch:
+        # Replay a command script without menus
+        if args.batch == '-':
+            stats = BatchRunner(app.manager).run(sys.stdin)
+        else:
+            with open(args.batch, encoding='utf-8') as file:
+                stats = BatchRunner(app.manager).run(file)
+        print(stats, file=sys.stderr)
+    else:
+        app.run()
+    if store is not None:
+        store.snapshot()
+        store.close()
+    if args.metrics:
+        metrics.write(args.metrics)
     
 if __name__ == '__main__':
     main()
\ No newline at end of file
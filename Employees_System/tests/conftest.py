@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the tests import `backend` and `frontend` like main.py does; run them
+# from this system's directory: python -m pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,32 @@
+import io
+import pytest
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.employee_manager import EmployeeManager
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+from frontend.batch import BatchRunner
+
+SCRIPT = '''# hiring day
+add ann 30 100
+add\tbo jo\t41\t200
+add cy 35 300
+update ann 150
+update zed 10
+delete 40 45
+list
+fire ann
+add dee
+'''
+
+@pytest.mark.parametrize('cls', [EmployeeManager, ColumnarEmployeeManager, SQLiteEmployeeManager])
+def test_script_output(cls):
+    out = io.StringIO()
+    stats = BatchRunner(cls(), out, flush_every=2).run(io.StringIO(SCRIPT))
+    assert (stats.commands, stats.failed) == (9, 3)
+    assert out.getvalue().splitlines() == [
+        'line 6: no employee named zed',
+        'Deleting bo jo',
+        'Employee ann has age 30 and salary 150',
+        'Employee cy has age 35 and salary 300',
+        "line 9: unknown command 'fire'",
+        "line 10: wrong number of arguments for 'add'",
+    ]
@@ -0,0 +1,111 @@
+import random
+import pytest
+from backend import columnar_employee_manager
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.employee_manager import EmployeeManager
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+
+MANAGERS = [EmployeeManager, ColumnarEmployeeManager, SQLiteEmployeeManager]
+
+class Reference:
+    '''
+    Employees as one list of [name, age, salary] rows in insertion order,
+    scanned on every call.
+    '''
+    def __init__(self):
+        self.rows = []
+
+    def add_emp(self, name : str, age : int, salary : int):
+        self.rows.append([name, age, salary])
+
+    def find_by_age(self, start : int, end : int):
+        return sorted((row for row in self.rows if start <= row[1] <= end), key=lambda row: row[1])
+
+    def delete_by_age(self, start : int, end : int):
+        deleted = [row[0] for row in self.rows if start <= row[1] <= end]
+        self.rows = [row for row in self.rows if not start <= row[1] <= end]
+        return deleted
+
+    def update_salary(self, name, salary):
+        for row in self.rows:
+            if row[0] == name:
+                row[2] = salary
+                return True
+        return False
+
+def rows(employees):
+    return [[emp.name, emp.age, emp.salary] for emp in employees]
+
+def random_ops(manager, reference, rnd, steps, extra = None):
+    # adds and age range deletes, plus the ops run by `extra` when given
+    for step in range(steps):
+        op = rnd.random()
+        if op < 0.6:
+            args = f'e{rnd.randrange(50)}', rnd.randint(20, 60), rnd.randrange(1000, 5000)
+            manager.add_emp(*args)
+            reference.add_emp(*args)
+        elif op < 0.75 or extra is None:
+            start = rnd.randint(15, 65)
+            end = start + rnd.randrange(5)
+            assert manager.delete_by_age(start, end) == reference.delete_by_age(start, end)
+        else:
+            extra(manager, reference)
+        if step % 50 == 0:
+            start = rnd.randint(15, 65)
+            end = start + rnd.randrange(20)
+            assert rows(manager.find_by_age(start, end)) == reference.find_by_age(start, end)
+            assert len(manager) == len(reference.rows)
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_age_queries_match_reference(cls):
+    manager, reference = cls(), Reference()
+    random_ops(manager, reference, random.Random(2), 2000)
+    assert rows(manager.get_employees()) == reference.rows
+
+def update_salaries(manager, reference):
+    rnd = random.Random(len(reference.rows))
+    if rnd.random() < 0.5:
+        name, salary = f'e{rnd.randrange(60)}', rnd.randrange(1000, 5000)
+        assert manager.update_salary(name, salary) == reference.update_salary(name, salary)
+    else:
+        updates = [(f'e{rnd.randrange(60)}', rnd.randrange(1000, 5000)) for _ in range(5)]
+        missing = [name for name, salary in updates if not reference.update_salary(name, salary)]
+        assert manager.bulk_update_salaries(updates) == missing
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_salary_updates_match_reference(cls):
+    manager, reference = cls(), Reference()
+    random_ops(manager, reference, random.Random(8), 2000, update_salaries)
+    assert rows(manager.get_employees()) == reference.rows
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_columnar_raise_matches_object_store(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(columnar_employee_manager, 'np', None)
+    elif columnar_employee_manager.np is None:
+        pytest.skip('NumPy is not installed')
+    objects, columns = EmployeeManager(), ColumnarEmployeeManager()
+    for manager in objects, columns:
+        manager.add_emps((f'e{i}', 20 + i % 40, 1000 + 37 * i) for i in range(500))
+        manager.delete_by_age(30, 45)
+        manager.apply_raise(3.5)
+    assert rows(columns.get_employees()) == rows(objects.get_employees())
+
+@pytest.mark.parametrize('cls', [EmployeeManager, ColumnarEmployeeManager, SQLiteEmployeeManager])
+def test_pages_match_slices(cls):
+    manager = cls()
+    manager.add_emps((f'e{i}', 20 + i % 40, 1000 + i) for i in range(100))
+    # a few deleted rows leave gaps the columnar store has to skip
+    manager.delete_by_age(25, 27)
+    everyone = rows(manager.get_employees())
+    for offset, limit in [(0, None), (0, 10), (15, 10), (90, 10), (200, 5), (5, 0)]:
+        end = None if limit is None else offset + limit
+        assert rows(manager.iter_employees(offset, limit)) == everyone[offset:end]
+
+def test_sqlite_raise_matches_object_store():
+    objects, database = EmployeeManager(), SQLiteEmployeeManager()
+    for manager in objects, database:
+        # 2% of 25 and of 75 are exact halves, rounded to even
+        manager.add_emps([('a', 30, 25), ('b', 31, 75), ('c', 32, 1999)])
+        manager.apply_raise(2)
+    assert rows(database.get_employees()) == rows(objects.get_employees())
@@ -0,0 +1,40 @@
+import pytest
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.employee_manager import EmployeeManager
+from backend.importer import import_employees
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+
+MANAGERS = [EmployeeManager, ColumnarEmployeeManager, SQLiteEmployeeManager]
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_import_csv_and_jsonl(tmp_path, cls):
+    manager = cls()
+    stats = import_employees(manager, write(tmp_path, 'a.csv', 'name,age,salary\nann,30,100\nbob,40,200\n'))
+    assert stats.rows == 2
+    import_employees(manager, write(tmp_path, 'b.jsonl', '{"name": "cy", "age": 35, "salary": 300}\n\n'))
+    assert [emp.name for emp in manager.find_by_age(30, 40)] == ['ann', 'cy', 'bob']
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_failed_import_leaves_indexes_usable(tmp_path, cls):
+    manager = cls()
+    path = write(tmp_path, 'bad.csv', 'name,age,salary\nann,30,100\nbob,forty,200\n')
+    with pytest.raises(ValueError):
+        import_employees(manager, path, batch_size=1)
+    # the rows before the bad one were stored and must be indexed
+    assert [emp.name for emp in manager.find_by_age(30, 30)] == ['ann']
+    assert manager.update_salary('ann', 150)
+    assert manager.delete_by_age(30, 30) == ['ann']
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_invalid_rows_are_skipped(tmp_path, cls):
+    manager = cls()
+    path = write(tmp_path, 'mixed.csv', 'name,age,salary\nann,30,100\n ,31,100\nbob,-1,100\ncy,32,-5\ndee,33,0\n')
+    stats = import_employees(manager, path, batch_size=2)
+    assert (stats.rows, stats.skipped) == (5, 3)
+    assert str(stats).startswith('Imported 2 of 5 rows')
+    assert [emp.name for emp in manager.find_by_age(0, 100)] == ['ann', 'dee']
@@ -0,0 +1,33 @@
+import threading
+import urllib.request
+from backend.metrics import manager_gauges
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+from common.metrics import Metrics, instrument
+
+def test_scrape_sqlite_manager_from_another_thread(tmp_path):
+    manager, metrics = SQLiteEmployeeManager(str(tmp_path / 'employees.db')), Metrics('employees')
+    instrument(manager, metrics)
+    manager_gauges(metrics, manager)
+    server = metrics.serve(0)
+    url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+    scraped, errors = [], []
+
+    def scrape():
+        try:
+            for _ in range(20):
+                with urllib.request.urlopen(url) as response:
+                    scraped.append(response.read().decode('utf-8'))
+        except Exception as error:
+            errors.append(error)
+
+    scraper = threading.Thread(target=scrape)
+    scraper.start()
+    for i in range(500):
+        manager.add_emp(f'e{i}', 20 + i % 40, 1000)
+    scraper.join()
+    server.shutdown()
+    assert not errors
+    assert len(scraped) == 20 and all('employees_stored ' in text for text in scraped)
+    assert 'employees_stored 500' in metrics.render().splitlines()
+    assert f'employees_calls_total{{method="add_emp"}} 500' in metrics.render().splitlines()
+    manager.close()
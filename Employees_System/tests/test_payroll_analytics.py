@@ -0,0 +1,64 @@
+import statistics
+import pytest
+from backend import payroll_analytics
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.employee_manager import EmployeeManager
+from backend.payroll_analytics import PayrollAnalytics
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+
+# unique salaries from 1000 to 2000, so every salary bin is 100 wide
+ROWS = [(f'e{i}', 20 + i * 7 % 45, 1000 + i * 37 % 1001) for i in range(1001)]
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def numpy(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(payroll_analytics, 'np', None)
+    elif payroll_analytics.np is None:
+        pytest.skip('NumPy is not installed')
+
+@pytest.mark.parametrize('cls', [EmployeeManager, ColumnarEmployeeManager, SQLiteEmployeeManager])
+def test_reports_match_statistics(numpy, cls):
+    manager = cls()
+    manager.add_emps(ROWS)
+    analytics = PayrollAnalytics(manager)
+    salaries = [salary for _, _, salary in ROWS]
+    assert analytics.total_salary() == sum(salaries)
+    assert analytics.mean_salary() == pytest.approx(statistics.mean(salaries))
+    assert analytics.median_salary() == pytest.approx(statistics.median(salaries))
+    cuts = statistics.quantiles(salaries, n=100, method='inclusive')
+    for p in (1, 25, 90, 99):
+        assert analytics.percentile(p) == pytest.approx(cuts[p - 1])
+    top = sorted(ROWS, key=lambda row: -row[2])[:5]
+    assert analytics.top_earners(5) == [(name, salary) for name, _, salary in top]
+    edges, histogram = analytics.salary_histogram_by_age_band(10, 10)
+    assert edges == pytest.approx([1000 + 100 * idx for idx in range(11)])
+    expected = {}
+    for _, age, salary in ROWS:
+        expected.setdefault(age // 10 * 10, [0] * 10)[min((salary - 1000) // 100, 9)] += 1
+    assert histogram == dict(sorted(expected.items()))
+
+def test_empty_reports(numpy):
+    analytics = PayrollAnalytics(EmployeeManager())
+    assert analytics.total_salary() == 0
+    assert analytics.mean_salary() is None and analytics.percentile(50) is None
+    assert analytics.top_earners(3) == []
+    assert analytics.salary_histogram_by_age_band() == ([], {})
+
+def test_top_earners_break_ties_by_id(numpy):
+    # many equal salaries, so the cut falls inside a tie; the same
+    # expected order checks the NumPy and the pure Python path
+    rows = [(f't{i}', 30, 1000 + i * 7 % 5 * 100) for i in range(50)]
+    manager = EmployeeManager()
+    manager.add_emps(rows)
+    ranked = sorted(range(len(rows)), key=lambda row: (-rows[row][2], row))
+    for n in 1, 7, 10, 23, 50, 60:
+        assert PayrollAnalytics(manager).top_earners(n) == [(rows[row][0], rows[row][2]) for row in ranked[:n]]
+
+def test_percentile_outside_0_to_100(numpy):
+    manager = EmployeeManager()
+    manager.add_emps(ROWS)
+    analytics = PayrollAnalytics(manager)
+    assert analytics.percentile(0) == 1000 and analytics.percentile(100) == 2000
+    for p in -1, 100.5:
+        with pytest.raises(ValueError):
+            analytics.percentile(p)
@@ -1,18 +1,103 @@
+import heapq
+import time
 from backend.patient import Patient
+from backend.patient_queue import PatientQueue
+from backend.wait_times import WaitTimes
 class HospitalManager:
     """
     Handles all hospital logic:
     - Managing patient queues per specialization
     - Enforcing capacity limits
     - Handling patient priority ordering
+    - Routing patients to fallback specializations when a queue is full
+    - Serving the next patient hospital-wide
+    - Aging long-waiting patients to a higher priority
+    - Tracking wait times per specialization
+
+    The head of every non-empty queue is kept in a heap keyed by
+    (highest status, earliest arrival), so the next patient hospital-wide
+    is found in O(log S) for S specializations instead of scanning every
+    queue. Heap entries are replaced lazily: when a queue's head changes
+    a new key is pushed and the old one is skipped once it reaches the top.
+
+    With aging, a second heap holds the time each queue next promotes
+    a patient, so serving hospital-wide only promotes in the queues that
+    are due. Operations take an optional `now` (seconds since the epoch,
+    the clock by default) which is journaled, so a replay ages patients
+    exactly as the original run did.
     """
-    def __init__(self):
-        # Create a 2D list:
-        # Each inner list represents a specialization queue
-        # Total specializations = 20
-        self.patients = [[] for _ in range(20)]
+    def __init__(self, specializations = 20, capacity = 10, compact_ratio = 0.5,
+                 fallbacks = None, aging = None, clock = time.time, wait_window = 1000):
+        """
+        Args:
+            specializations (int): Number of specializations (numbered from 1)
+            capacity (int | None): Maximum patients per specialization,
+                                   None for no limit
+            compact_ratio (float): Fraction of removed (tombstoned) entries
+                                   after which a queue is compacted
+            fallbacks (dict | None): specialization -> list of specializations
+                                     tried in order when it is full
+            aging (tuple | None): Seconds since arrival after which a normal
+                                  patient becomes urgent and an urgent one
+                                  super urgent (non-decreasing), None for
+                                  no aging
+            clock: Returns the current time when no `now` is given
+            wait_window (int): Served patients per specialization kept
+                               for the wait time percentiles
+        """
+        self.specializations = specializations
+        self.capacity = capacity
+        self.compact_ratio = compact_ratio
+        self.fallbacks = fallbacks or {}
+        for specialization, others in self.fallbacks.items():
+            if not all(map(self.is_valid_specialization, [specialization, *others])):
+                raise ValueError(f'invalid fallback specializations for {specialization}')
+        if aging is not None:
+            aging = tuple(aging)
+            waits = [wait for wait in aging if wait is not None]
+            # both thresholds count from arrival, so an urgent patient cannot
+            # need less waiting than a normal one to move up
+            if len(aging) != PatientQueue.LEVELS - 1 or any(wait < 0 for wait in waits) or waits != sorted(waits):
+                raise ValueError(f'aging needs {PatientQueue.LEVELS - 1} non-negative, non-decreasing thresholds')
+        self.aging = aging
+        self.clock = clock
+        # Latest time seen, the clock is never allowed to go backwards
+        self.last_time = float('-inf')
+        # Sparse storage: specialization number -> priority queue
+        # A queue is created on first use and dropped once it is empty
+        self.patients = {}
+        # Running count of waiting patients across all specializations
+        self.total = 0
+        # Arrival counter ordering patients across specializations
+        self.arrivals = 0
+        # Heap of (-status, arrival, specialization) queue head keys and the
+        # current key of each queue; heap keys that differ are stale
+        self.heads = []
+        self.head_keys = {}
+        # Heap of (promotion time, specialization) keys, replaced the same way
+        self.promotions = []
+        self.promotion_keys = {}
+        self.waits = WaitTimes(wait_window)
+        # Optional PersistentStore recording every change
+        self.journal = None
 
-    def add_patient(self, name, status, specialization):
+    def is_valid_specialization(self, specialization):
+        """
+        Checks that a specialization number is within the configured range.
+        """
+        return 1 <= specialization <= self.specializations
+
+    def _time(self, now):
+        # Current time, kept monotonic so arrival times follow arrival
+        # numbers even if the wall clock is set back
+        if now is None:
+            now = self.clock()
+        if now < self.last_time:
+            now = self.last_time
+        self.last_time = now
+        return now
+
+    def add_patient(self, name, status, specialization, now = None):
         """
         Adds a patient to the appropriate specialization queue
         while maintaining priority order.
@@ -21,90 +106,302 @@ class HospitalManager:
             - Super urgent (2) patients are served first
             - Urgent (1) patients come after super urgent
             - Normal (0) patients come last
+            - Patients with the same status are served in arrival order
 
-        Each specialization queue can hold up to 10 patients.
+        Each specialization queue can hold up to `capacity` patients.
+        When it is full the patient is added to the first of its
+        fallback specializations that has room.
+        `now` is the arrival time, the clock by default.
 
         Returns:
-            bool: True if patient added successfully, False if specialization is full
+            int | False: Specialization the patient was added to, False if
+                         it and its fallbacks are full or the status or
+                         specialization is invalid
         """
-        # Convert specialization to zero-based index
-        lst = self.patients[specialization - 1]
-        # This specialization is full
-        if len(lst) == 10 :
+        if not 0 <= status < PatientQueue.LEVELS:
             return False
-        # This specialization is empty
-        elif len(lst) == 0:
-            patient = Patient(name, status, specialization)
-            lst.append(patient)
-        else :
-            patient = Patient(name, status, specialization)
-            # Normal patient: always goes to the end
-            if status == 0:
-                lst.append(patient)
-            # Urgent patient
-            elif status == 1:
-                # Insert after the last urgent or super urgent patient
-                for idx in range(len(lst) - 1, -1, -1):
-                    if lst[idx].status == 1 or lst[idx].status == 2:
-                        lst.insert(idx + 1, patient)
-                        break
-                else:
-                    # If no urgent or super urgent found, insert at front
-                    lst.insert(0, patient)
-            # Super urgent patient
-            else:
-                # Insert before normal or urgent patients
-                for idx, p in enumerate(lst):
-                    if p.status == 1:
-                        lst.insert(idx, patient)
-                        break
-                    elif lst[idx].status == 2:
-                        lst.insert(idx + 1, patient)
-                        break
+        if not self.is_valid_specialization(specialization):
+            return False
+        for target in (specialization, *self.fallbacks.get(specialization, ())):
+            queue = self.patients.get(target)
+            # a queue that does not exist yet is empty, which is still
+            # full for a capacity of 0
+            if self.capacity is None or (len(queue) if queue is not None else 0) < self.capacity:
+                break
+        else:
+            # This specialization and its fallbacks are full
+            return False
+        if queue is None:
+            queue = self.patients[target] = PatientQueue(self.compact_ratio, self.aging)
+        now = self._time(now)
+        queue.push(Patient(name, status, target, now), self.arrivals)
+        self.arrivals += 1
+        self.total += 1
+        self._update_head(target)
+        if self.journal is not None:
+            self.journal.record('add_patient', name, status, specialization, now)
+        return target
 
-        return True
+    def add_patients(self, rows):
+        """
+        Adds many (name, status, specialization) rows at once,
+        with the same rules as add_patient.
+
+        Returns:
+            int: Number of rows that could not be added
+        """
+        add = self.add_patient
+        rejected = 0
+        for name, status, specialization in rows:
+            if not add(name, status, specialization):
+                rejected += 1
+        return rejected
 
     def print_patients(self):
         """
-        Returns a shallow copy of all specialization queues
-        if there are any patients in the system.
+        Returns the non-empty specialization queues ordered by
+        specialization number if there are any patients in the system.
 
         Returns:
-            list | False: List of patients or False if no patients exist
+            list | False: List of queues or False if no patients exist
         """
-        # if there is any patient the condition'll be true
-        if any(self.patients):
-            return self.patients.copy()
+        if self.total:
+            return [self.patients[sp] for sp in sorted(self.patients)]
         return False
-    
-    def get_next(self, specialization):
+
+    def iter_patients(self, specialization = None, now = None):
+        """
+        Lazily yields waiting patients without copying any queue.
+        Patients of one specialization come in the order they will be
+        served; with no specialization given, all non-empty
+        specializations are visited in increasing number.
+        Patients due for aging are promoted first.
+        The manager must not be modified while iterating.
+
+        Yields:
+            Patient
+        """
+        if specialization is not None:
+            sp = self.patients.get(specialization)
+            if sp is not None:
+                self._promote(specialization, sp, self._time(now))
+                yield from sp
+            return
+        self._promote_due(self._time(now))
+        for number in sorted(self.patients):
+            yield from self.patients[number]
+
+    def get_next(self, specialization, now = None):
         """
         Retrieves and removes the next patient
         from a given specialization queue.
+        `now` is the time the patient is served, the clock by default.
 
         Returns:
             Patient | False: Next patient or False if queue is empty
         """
         # holds the needed specialization
-        sp = self.patients[specialization - 1]
-        if len(sp) == 0:
+        sp = self.patients.get(specialization)
+        if sp is None:
             return False
-        
-        patient = sp[0]
-        del sp[0]
+
+        now = self._time(now)
+        self._promote(specialization, sp, now)
+        patient = sp.pop()
+        self.waits.record(specialization, now - patient.arrived)
+        self._after_removal(specialization, sp)
+        if self.journal is not None:
+            self.journal.record('get_next', specialization, now)
         return patient
-    
-    def remove_patient(self, name, specialization):
+
+    def peek_next_global(self, now = None):
+        """
+        Returns the patient that get_next_global() would serve, without
+        removing it: the highest status, then earliest arrival, over all
+        specializations. O(log S) amortized.
+
+        Returns:
+            Patient | None: Next patient or None if nobody is waiting
+        """
+        self._promote_due(self._time(now))
+        key = self._global_head()
+        return None if key is None else self.patients[key[2]].peek()
+
+    def get_next_global(self, now = None):
+        """
+        Retrieves and removes the next patient hospital-wide.
+
+        Returns:
+            Patient | False: Next patient or False if nobody is waiting
+        """
+        now = self._time(now)
+        self._promote_due(now)
+        key = self._global_head()
+        if key is None:
+            return False
+        return self.get_next(key[2], now)
+
+    def queue_depth(self, specialization):
+        """
+        Number of patients waiting in one specialization. O(1).
+        """
+        sp = self.patients.get(specialization)
+        return 0 if sp is None else len(sp)
+
+    def queue_depths(self):
+        """
+        Returns:
+            dict: specialization -> waiting patients, for non-empty queues
+        """
+        return {number: len(sp) for number, sp in sorted(self.patients.items())}
+
+    def wait_percentiles(self, specialization = None, percentiles = WaitTimes.PERCENTILES):
+        """
+        Wait time percentiles of recently served patients, from arrival
+        until get_next().
+
+        Returns:
+            dict: percentile -> seconds for one specialization, or
+                  specialization -> that dict when none is given
+        """
+        return self.waits.percentiles(specialization, percentiles)
+
+    def remove_patient(self, name, specialization, now = None):
         """
         Removes a patient by name from a specific specialization.
+        The patient is found through the queue's name index, so this
+        is O(1) amortized.
 
         Returns:
             bool: True if patient removed, False if not found
         """
         # holds the needed specialization
-        sp = self.patients[specialization - 1]
-        for idx, patient in enumerate(sp):
-            if patient.name == name:
-                del sp[idx]
-                return True
-        return False
+        sp = self.patients.get(specialization)
+        if sp is None:
+            return False
+        now = self._time(now)
+        # aging decides which of several namesakes is served first
+        self._promote(specialization, sp, now)
+        if not sp.remove(name):
+            return False
+        self._after_removal(specialization, sp)
+        if self.journal is not None:
+            self.journal.record('remove_patient', name, specialization, now)
+        return True
+
+    def snapshot_state(self):
+        """
+        Returns the state for PersistentStore as a dict of plain data:
+            patients: (name, status, specialization, arrival, arrived, level)
+                      rows, each queue in serving order; level is the
+                      status raised by aging
+            waits: specialization -> recent wait times, oldest first
+            time: latest time seen
+        """
+        return {
+            'patients': [(entry.patient.name, entry.patient.status, entry.patient.specialization,
+                          entry.seq, entry.patient.arrived, entry.level)
+                         for number in sorted(self.patients)
+                         for entry in self.patients[number].entries()],
+            'waits': self.waits.snapshot(),
+            'time': self.last_time,
+        }
+
+    def restore_state(self, state):
+        """
+        Replaces all queues and wait times with the state from
+        snapshot_state(). Older snapshots are a plain list of patient
+        rows and restore with no wait times.
+        Capacity is not enforced, so nobody is lost if it was lowered.
+        """
+        if isinstance(state, dict):
+            rows = state['patients']
+            self.waits.restore(state['waits'])
+            self.last_time = max(self.last_time, state['time'])
+        else:
+            rows = state
+            self.waits.restore({})
+        self.patients = {}
+        self.total = 0
+        self.arrivals = 0
+        self.heads = []
+        self.head_keys = {}
+        self.promotions = []
+        self.promotion_keys = {}
+        for name, status, specialization, *arrival in rows:
+            queue = self.patients.get(specialization)
+            if queue is None:
+                queue = self.patients[specialization] = PatientQueue(self.compact_ratio, self.aging)
+            # rows without an arrival number keep their snapshot order
+            seq = arrival[0] if arrival else self.arrivals
+            # rows of older snapshots have no arrival time, they start waiting now
+            arrived = arrival[1] if len(arrival) > 1 else self._time(None)
+            level = arrival[2] if len(arrival) > 2 else None
+            queue.push(Patient(name, status, specialization, arrived), seq, level)
+            self.arrivals = max(self.arrivals, seq + 1)
+            self.last_time = max(self.last_time, arrived)
+            self.total += 1
+        for number in self.patients:
+            self._update_head(number)
+
+    def _after_removal(self, specialization, sp):
+        # keep the running total and drop empty queues to stay sparse
+        self.total -= 1
+        if len(sp) == 0:
+            del self.patients[specialization]
+        self._update_head(specialization)
+
+    def _update_head(self, specialization):
+        # Re-index the head of one queue after it may have changed, O(log S)
+        sp = self.patients.get(specialization)
+        entry = sp.head() if sp is not None else None
+        if entry is None:
+            self.head_keys.pop(specialization, None)
+            self.promotion_keys.pop(specialization, None)
+            return
+        self._set_key(self.heads, self.head_keys, specialization,
+                      (-entry.level, entry.seq, specialization))
+        if self.aging is not None:
+            due = sp.next_promotion()
+            if due is None:
+                self.promotion_keys.pop(specialization, None)
+            else:
+                self._set_key(self.promotions, self.promotion_keys, specialization,
+                              (due, specialization))
+
+    @staticmethod
+    def _set_key(heap, keys, specialization, key):
+        # Pushes the new key of a queue if it changed
+        if keys.get(specialization) != key:
+            keys[specialization] = key
+            heapq.heappush(heap, key)
+            # rebuild once stale keys outnumber the live ones
+            if len(heap) > 2 * len(keys) + 32:
+                heap[:] = keys.values()
+                heapq.heapify(heap)
+
+    def _promote(self, specialization, sp, now):
+        # Ages the patients of one queue up to now
+        if self.aging is not None and sp.promote(now):
+            self._update_head(specialization)
+
+    def _promote_due(self, now):
+        # Ages the patients of every queue with a promotion due by now,
+        # O(log S) per such queue
+        promotions = self.promotions
+        while promotions and promotions[0][0] <= now:
+            key = heapq.heappop(promotions)
+            if self.promotion_keys.get(key[1]) == key:
+                del self.promotion_keys[key[1]]
+                self.patients[key[1]].promote(now)
+                self._update_head(key[1])
+
+    def _global_head(self):
+        # Pops stale keys and returns the live key on top of the heap, or None
+        heads = self.heads
+        while heads:
+            key = heads[0]
+            if self.head_keys.get(key[2]) == key:
+                return key
+            heapq.heappop(heads)
+        return None
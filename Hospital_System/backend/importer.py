@@ -0,0 +1,19 @@
+from common.importer import import_rows, read_records
+def parse_patients(records):
+    """
+    Converts raw records to (name, status, specialization) tuples.
+    """
+    for record in records:
+        yield record['name'], int(record['status']), int(record['specialization'])
+
+
+def import_patients(manager, path, batch_size = 10000):
+    """
+    Loads patients from a CSV or JSONL file into the manager.
+    Patients that cannot be added (full queue, invalid status or
+    specialization) are counted as skipped.
+
+    Returns:
+        ImportStats
+    """
+    return import_rows(manager.add_patients, parse_patients(read_records(path)), batch_size)
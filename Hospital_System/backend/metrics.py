@@ -0,0 +1,19 @@
+"""
+Hospital gauges for the shared metrics registry (common.metrics).
+"""
+def manager_gauges(metrics, manager):
+    """
+    Registers the waiting-patient and wait time gauges of a hospital manager.
+    """
+    metrics.gauge('patients_waiting', 'Patients waiting in all specializations.',
+                  lambda: manager.total)
+    # call the class method so exports are not counted as manager calls
+    metrics.gauge('queue_length', 'Patients waiting per specialization.',
+                  lambda: type(manager).queue_depths(manager), label='specialization')
+    for percentile in (50, 90, 99):
+        metrics.gauge(f'wait_seconds_p{percentile}',
+                      f'Wait of recently served patients per specialization, {percentile}th percentile.',
+                      lambda percentile=percentile: {
+                          number: waits[percentile]
+                          for number, waits in type(manager).wait_percentiles(manager).items()},
+                      label='specialization')
@@ -9,11 +9,13 @@ class Patient:
                       1 -> Urgent
                       2 -> Super Urgent
         specialization (int): Medical specialization number (1-based)
+        arrived (float): Arrival time in seconds since the epoch
     """
-    def __init__(self, name, status, specialization):
+    def __init__(self, name, status, specialization, arrived = 0.0):
         self.name = name
         self.status = status
         self.specialization = specialization
+        self.arrived = arrived
 
     def __str__(self):
         """
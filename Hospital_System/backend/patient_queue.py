@@ -0,0 +1,225 @@
+from collections import deque
+from heapq import merge
+class QueueEntry:
+    """
+    Handle to a patient waiting in a PatientQueue.
+    A removed entry stays in its deque as a tombstone until it is
+    skipped by pop() or dropped by compaction.
+    """
+    __slots__ = ('patient', 'seq', 'level', 'removed')
+
+    def __init__(self, patient, seq = 0, level = None):
+        self.patient = patient
+        # arrival number, orders patients across specializations
+        self.seq = seq
+        # effective priority: the status, raised by aging
+        self.level = patient.status if level is None else level
+        self.removed = False
+
+class PatientQueue:
+    """
+    Priority queue of patients for a single specialization.
+
+    Keeps FIFO deques per status level:
+        - Higher (effective) status is always served first
+        - Patients with the same status are served in arrival order
+
+    Adding a patient and serving the next one are both O(1).
+    Removing a patient by name is O(1) amortized: its entry is found
+    through a name index and marked removed (tombstoned), and the deques
+    are compacted once tombstones exceed compact_ratio of the entries.
+
+    With aging, a patient who has waited aging[level] seconds since
+    arrival is promoted to the next level, so nobody starves behind a
+    stream of more urgent arrivals. Every level has two deques, patients
+    who arrived with that status and patients aged into it, both in
+    arrival order; the next patient of a level is the earlier of the two
+    heads. Aging only looks at level heads, so each promotion is O(1)
+    and waiting patients are never rescanned.
+    """
+    # Normal (0), Urgent (1), Super urgent (2)
+    LEVELS = 3
+
+    def __init__(self, compact_ratio = 0.5, aging = None):
+        """
+        Args:
+            compact_ratio (float): Fraction of tombstones triggering compaction
+            aging (tuple | None): Seconds of waiting after which a patient
+                                  moves up from level 0 and from level 1,
+                                  None (or a None item) disables aging
+        """
+        # levels[status] = [arrived with that status, aged into it]
+        self.levels = [[deque(), deque()] for _ in range(self.LEVELS)]
+        # name -> live entries with that name in arrival order
+        self.handles = {}
+        self.compact_ratio = compact_ratio
+        self.aging = aging
+        self.size = 0
+        self.tombstones = 0
+
+    def push(self, patient, seq = 0, level = None):
+        """
+        Appends a patient to the back of its status level.
+        seq is the patient's arrival number across all queues; level
+        restores an effective priority raised by aging.
+        """
+        entry = QueueEntry(patient, seq, level)
+        self.levels[entry.level][entry.level > patient.status].append(entry)
+        self.handles.setdefault(patient.name, []).append(entry)
+        self.size += 1
+
+    def _front(self, fifo):
+        # Drops tombstones from the front of a deque, returns its live head or None
+        while fifo and fifo[0].removed:
+            fifo.popleft()
+            self.tombstones -= 1
+        return fifo[0] if fifo else None
+
+    def _level_head(self, level):
+        # Returns the deque of a level holding its earliest arrival, or None
+        native, aged = self.levels[level]
+        first, second = self._front(native), self._front(aged)
+        if first is None:
+            return aged if second is not None else None
+        return native if second is None or first.seq < second.seq else aged
+
+    def _head_level(self):
+        """
+        Drops tombstones from the level fronts and returns the deque
+        holding the next patient, or None.
+        """
+        for level in reversed(range(self.LEVELS)):
+            fifo = self._level_head(level)
+            if fifo is not None:
+                return fifo
+        return None
+
+    def promote(self, now):
+        """
+        Moves every patient who has waited long enough up one level,
+        or several if they waited long enough for each.
+
+        Returns:
+            int: Number of promotions
+        """
+        if self.aging is None:
+            return 0
+        promoted = 0
+        for level, wait in enumerate(self.aging[:self.LEVELS - 1]):
+            if wait is None:
+                continue
+            cutoff = now - wait
+            target = self.levels[level + 1][1]
+            # level heads are the longest waiting, stop at the first who is not due
+            while (fifo := self._level_head(level)) is not None and fifo[0].patient.arrived <= cutoff:
+                entry = fifo.popleft()
+                entry.level = level + 1
+                target.append(entry)
+                promoted += 1
+        return promoted
+
+    def next_promotion(self):
+        """
+        Returns:
+            float | None: Time at which promote() will next move a patient,
+                          None if nobody is going to be promoted
+        """
+        if self.aging is None:
+            return None
+        due = None
+        for level, wait in enumerate(self.aging[:self.LEVELS - 1]):
+            if wait is not None and (fifo := self._level_head(level)) is not None:
+                time = fifo[0].patient.arrived + wait
+                due = time if due is None else min(due, time)
+        return due
+
+    def head(self):
+        """
+        Returns the entry of the next patient without removing it.
+
+        Returns:
+            QueueEntry | None: Next entry or None if the queue is empty
+        """
+        fifo = self._head_level()
+        return fifo[0] if fifo else None
+
+    def peek(self):
+        """
+        Returns the next patient without removing it.
+
+        Returns:
+            Patient | None: Next patient or None if the queue is empty
+        """
+        fifo = self._head_level()
+        return fifo[0].patient if fifo else None
+
+    def pop(self):
+        """
+        Removes and returns the next patient.
+
+        Returns:
+            Patient | None: Next patient or None if the queue is empty
+        """
+        fifo = self._head_level()
+        if fifo is None:
+            return None
+        entry = fifo.popleft()
+        self._drop_handle(entry)
+        self.size -= 1
+        return entry.patient
+
+    def remove(self, name):
+        """
+        Removes a patient by name.
+        If several patients share the name the one served first is removed.
+
+        Returns:
+            bool: True if a patient was removed, False if not found
+        """
+        entries = self.handles.get(name)
+        if not entries:
+            return False
+        # the first in serving order has the highest level, then the earliest arrival
+        entry = max(entries, key=lambda entry: (entry.level, -entry.seq))
+        self._drop_handle(entry)
+        # leave a tombstone instead of searching the deque
+        entry.removed = True
+        self.size -= 1
+        self.tombstones += 1
+        if self.tombstones > self.compact_ratio * (self.size + self.tombstones):
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        Rebuilds the level deques without tombstones. O(n).
+        """
+        self.levels = [[deque(entry for entry in fifo if not entry.removed) for fifo in level]
+                       for level in self.levels]
+        self.tombstones = 0
+
+    def _drop_handle(self, entry):
+        # a name is normally shared by very few patients
+        entries = self.handles[entry.patient.name]
+        entries.remove(entry)
+        if not entries:
+            del self.handles[entry.patient.name]
+
+    def __len__(self):
+        return self.size
+
+    def entries(self):
+        """
+        Iterates over live entries in the order they will be served.
+        """
+        for native, aged in reversed(self.levels):
+            for entry in merge(native, aged, key=lambda entry: entry.seq):
+                if not entry.removed:
+                    yield entry
+
+    def __iter__(self):
+        """
+        Iterates over patients in the order they will be served.
+        """
+        for entry in self.entries():
+            yield entry.patient
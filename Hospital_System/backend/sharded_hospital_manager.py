@@ -0,0 +1,495 @@
+import multiprocessing
+import os
+import threading
+import time
+from backend.hospital_manager import HospitalManager
+from backend.wait_times import WaitTimes
+from common.storage import PersistentStore
+class ShardCrashed(RuntimeError):
+    """
+    Raised when a worker process died while handling a request.
+    The worker is restarted before this is raised; the calls in flight
+    are lost and, without a data directory, so are its queues.
+    """
+
+
+def _head(manager, now):
+    # Key and patient of a shard's next patient hospital-wide, or None
+    manager._promote_due(now)
+    key = manager._global_head()
+    if key is None:
+        return None
+    patient = manager.patients[key[2]].peek()
+    return (key[0], patient.arrived, key[1]), patient
+
+
+class _ShardManager(HospitalManager):
+    """
+    HospitalManager of one worker, whose arrival numbers come from the router.
+    """
+    def add_arrival(self, seq, name, status, specialization, now):
+        """
+        add_patient with an arrival number from the router, so queue heads
+        of different workers are ordered like in a single HospitalManager.
+        Journaled with the number, so a replay orders them the same way.
+        """
+        journal, self.journal = self.journal, None
+        try:
+            self.arrivals = max(self.arrivals, seq)
+            target = self.add_patient(name, status, specialization, now)
+        finally:
+            self.journal = journal
+        if target and journal is not None:
+            journal.record('add_arrival', seq, name, status, specialization, now)
+        return target
+
+
+# worker-side commands that are not plain HospitalManager methods
+_COMMANDS = {
+    'add': _ShardManager.add_arrival,
+    'head': _head,
+    'clock': lambda manager: (manager.arrivals, manager.last_time),
+    'total': lambda manager: manager.total,
+    'iter_patients': lambda manager, *args: list(manager.iter_patients(*args)),
+}
+
+
+def _serve(conn, specializations, capacity, compact_ratio, aging, directory, sync_every,
+           snapshot_every):
+    """
+    Worker process: owns the queues of its specializations and answers
+    lists of (method, args) calls with lists of (ok, result or exception)
+    until it receives None or the router goes away.
+    """
+    manager = _ShardManager(specializations, capacity, compact_ratio, aging=aging)
+    store = None
+    if directory is not None:
+        store = PersistentStore(directory, sync_every, snapshot_every=snapshot_every)
+        store.open(manager)
+    while True:
+        try:
+            calls = conn.recv()
+        except EOFError:
+            break
+        if calls is None:
+            break
+        results = []
+        for method, args in calls:
+            try:
+                command = _COMMANDS.get(method)
+                if command is not None:
+                    results.append((True, command(manager, *args)))
+                else:
+                    results.append((True, getattr(manager, method)(*args)))
+            except Exception as error:
+                results.append((False, error))
+        conn.send(results)
+    if store is not None:
+        store.snapshot()
+        store.close()
+    conn.close()
+
+
+class ShardedHospitalManager:
+    """
+    HospitalManager with the same API whose specializations are
+    partitioned across worker processes, so queue work runs on several
+    cores and a crashing worker only takes its own specializations down.
+
+    Specialization N is owned by worker (N - 1) % workers, which keeps
+    a HospitalManager for it. This router forwards each call over a pipe
+    and does the cross-shard work itself: fallback routing, totals and
+    serving the next patient hospital-wide, which compares the queue
+    head of every worker by (effective status, arrival time).
+
+    One message carries a list of calls, so bulk operations cost one
+    round trip per worker, with all workers running in parallel:
+    add_patients() and execute().
+
+    The router can be shared by threads (e.g. the metrics exporter
+    scraping totals while the main thread serves patients): every
+    request/response exchange on the pipes, and every call made of
+    several exchanges, runs under one re-entrant lock.
+    """
+    # calls execute() can pipeline: position of their specialization
+    # argument and of their `now` argument (None if they have none)
+    PIPELINED = {'add_patient': (2, 3), 'get_next': (0, 1), 'remove_patient': (1, 2),
+                 'queue_depth': (0, None)}
+
+    def __init__(self, specializations = 20, capacity = 10, compact_ratio = 0.5,
+                 fallbacks = None, aging = None, workers = None, data_dir = None,
+                 sync_every = 1, snapshot_every = None, clock = time.time):
+        """
+        Args:
+            specializations (int): Number of specializations (numbered from 1)
+            capacity (int | None): Maximum patients per specialization,
+                                   None for no limit
+            compact_ratio (float): Fraction of removed (tombstoned) entries
+                                   after which a queue is compacted
+            fallbacks (dict | None): specialization -> list of specializations
+                                     tried in order when it is full
+            aging (tuple | None): Aging thresholds, as for HospitalManager
+            workers (int | None): Worker processes, one per CPU by default
+            data_dir (str | None): Directory where every worker keeps its
+                                   queues (journal + snapshots) in shard-N
+            sync_every (int): fsync each worker journal every N operations
+            snapshot_every (int | None): Operations between worker snapshots
+            clock: Returns the current time when no `now` is given
+        """
+        # validates the settings here instead of in every worker
+        HospitalManager(specializations, capacity, compact_ratio, fallbacks, aging)
+        self.specializations = specializations
+        self.capacity = capacity
+        self.compact_ratio = compact_ratio
+        self.fallbacks = fallbacks or {}
+        self.aging = aging
+        self.workers = max(1, min(workers or os.cpu_count() or 1, specializations))
+        self.data_dir = data_dir
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.clock = clock
+        self.last_time = float('-inf')
+        # arrival counter shared by all workers
+        self.arrivals = 0
+        # guards the pipes and the router state, see the class docstring
+        self.lock = threading.RLock()
+        if data_dir is not None:
+            self._check_layout()
+        self.processes = [None] * self.workers
+        self.conns = [None] * self.workers
+        for index in range(self.workers):
+            self._start(index)
+        if data_dir is not None:
+            # go on from the latest arrival number and time of the recovered queues
+            clocks = self._broadcast('clock')
+            self.arrivals = max(arrivals for arrivals, _ in clocks)
+            self.last_time = max(last_time for _, last_time in clocks)
+
+    def _check_layout(self):
+        # Queues on disk only match their workers with the same worker count
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = os.path.join(self.data_dir, 'shards')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                workers = int(file.read())
+            if workers != self.workers:
+                raise ValueError(f'{self.data_dir} holds {workers} shards, not {self.workers}')
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(str(self.workers))
+
+    def _start(self, index):
+        # Starts (or restarts) one worker, which recovers its queues from disk
+        directory = None
+        if self.data_dir is not None:
+            directory = os.path.join(self.data_dir, f'shard-{index}')
+        router, worker = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_serve, name=f'hospital-shard-{index}', daemon=True,
+            args=(worker, self.specializations, self.capacity, self.compact_ratio, self.aging,
+                  directory, self.sync_every, self.snapshot_every))
+        process.start()
+        worker.close()
+        self.processes[index] = process
+        self.conns[index] = router
+
+    def close(self):
+        """
+        Stops the workers; with a data directory each one writes a snapshot first.
+        """
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, conn in zip(self.processes, self.conns):
+            process.join()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shard(self, specialization):
+        """
+        Index of the worker owning a specialization.
+        """
+        return (specialization - 1) % self.workers
+
+    def _request(self, batches):
+        """
+        Sends every worker its list of calls, then collects the answers,
+        so the workers run them in parallel.
+
+        Args:
+            batches (dict): worker index -> list of (method, args)
+
+        Returns:
+            dict: worker index -> list of results in call order
+        """
+        crashed = []
+        answers = {}
+        # a reply must reach the thread that sent the request
+        with self.lock:
+            for index, calls in batches.items():
+                try:
+                    self.conns[index].send(calls)
+                except OSError:
+                    crashed.append(index)
+            for index in batches:
+                if index in crashed:
+                    continue
+                try:
+                    answers[index] = self.conns[index].recv()
+                except (EOFError, OSError):
+                    crashed.append(index)
+            for index in crashed:
+                self.conns[index].close()
+                self.processes[index].join()
+                self._start(index)
+        if crashed:
+            raise ShardCrashed(f'hospital shard(s) {sorted(crashed)} crashed and were restarted')
+        results = {}
+        for index, answer in answers.items():
+            for ok, value in answer:
+                if not ok:
+                    raise value
+            results[index] = [value for _, value in answer]
+        return results
+
+    def _call(self, index, method, *args):
+        # One call on one worker
+        return self._request({index: [(method, args)]})[index][0]
+
+    def _broadcast(self, method, *args):
+        # The same call on every worker, results in worker order
+        results = self._request({index: [(method, args)] for index in range(self.workers)})
+        return [results[index][0] for index in range(self.workers)]
+
+    def _time(self, now):
+        # Router time, kept monotonic like HospitalManager._time so arrival
+        # times from different workers can be compared
+        with self.lock:
+            if now is None:
+                now = self.clock()
+            if now < self.last_time:
+                now = self.last_time
+            self.last_time = now
+            return now
+
+    @property
+    def total(self):
+        """
+        Number of waiting patients across all specializations.
+        """
+        return sum(self._broadcast('total'))
+
+    def is_valid_specialization(self, specialization):
+        """
+        Checks that a specialization number is within the configured range.
+        """
+        return 1 <= specialization <= self.specializations
+
+    def add_patient(self, name, status, specialization, now = None):
+        """
+        Adds a patient to a specialization queue.
+        Same priority, capacity and fallback rules as HospitalManager.add_patient;
+        each fallback is tried on the worker that owns it.
+
+        Returns:
+            int | False: Specialization the patient was added to, False if
+                         it and its fallbacks are full or the status or
+                         specialization is invalid
+        """
+        if not 0 <= status <= 2 or not self.is_valid_specialization(specialization):
+            return False
+        with self.lock:
+            now = self._time(now)
+            for target in (specialization, *self.fallbacks.get(specialization, ())):
+                if self._call(self.shard(target), 'add', self._arrival(), name, status, target, now):
+                    return target
+        return False
+
+    def _arrival(self):
+        with self.lock:
+            self.arrivals += 1
+            return self.arrivals
+
+    def add_patients(self, rows):
+        """
+        Adds many (name, status, specialization) rows, all arriving now,
+        with one message per worker. Rows rejected by a full queue are
+        then retried one by one on their fallbacks.
+
+        Returns:
+            int: Number of rows that could not be added
+        """
+        now = self._time(None)
+        calls = [('add_patient', (name, status, specialization, now))
+                 for name, status, specialization in rows]
+        return sum(1 for added in self.execute(calls) if not added)
+
+    def execute(self, calls):
+        """
+        Runs a batch of add_patient, get_next, remove_patient and
+        queue_depth calls with one message per worker, the workers running
+        in parallel. Calls on the same specialization keep their order;
+        calls on different specializations are independent anyway. Calls
+        without a `now` all happen at the router's current time. Adds
+        rejected by a full queue are retried on their fallbacks after the
+        batch, one by one.
+
+        Args:
+            calls (list): (method name, args) pairs
+
+        Returns:
+            list: Results in call order, as the methods would return them
+        """
+        with self.lock:
+            return self._execute(calls)
+
+    def _execute(self, calls):
+        now = self._time(None)
+        stamped = []
+        for method, args in calls:
+            when = self.PIPELINED[method][1]
+            stamped.append((method, (*args, now) if when is not None and len(args) == when else tuple(args)))
+        batches = {}
+        places = []
+        for method, args in stamped:
+            index = self.shard(args[self.PIPELINED[method][0]])
+            batch = batches.setdefault(index, [])
+            places.append((index, len(batch)))
+            if method == 'add_patient':
+                batch.append(('add', (self._arrival(), *args)))
+            else:
+                batch.append((method, args))
+        answers = self._request(batches)
+        results = [answers[index][position] for index, position in places]
+        if self.fallbacks:
+            for position, (method, args) in enumerate(stamped):
+                if method == 'add_patient' and not results[position] and 0 <= args[1] <= 2 \
+                        and args[2] in self.fallbacks:
+                    name, status, specialization, when = args
+                    for target in self.fallbacks[specialization]:
+                        if self._call(self.shard(target), 'add', self._arrival(), name, status, target, when):
+                            results[position] = target
+                            break
+        return results
+
+    def print_patients(self):
+        """
+        Returns the non-empty specialization queues, each as a list of
+        patients in serving order, if there are any patients in the system.
+
+        Returns:
+            list | False: List of queues or False if no patients exist
+        """
+        queues = {}
+        for patient in self.iter_patients():
+            queues.setdefault(patient.specialization, []).append(patient)
+        return list(queues.values()) or False
+
+    def iter_patients(self, specialization = None, now = None):
+        """
+        Yields waiting patients in serving order, fetched from the workers
+        in one round. With no specialization given, all specializations
+        are visited in increasing number.
+
+        Yields:
+            Patient
+        """
+        now = self._time(now)
+        if specialization is not None:
+            yield from self._call(self.shard(specialization), 'iter_patients', specialization, now)
+            return
+        patients = [patient for shard in self._broadcast('iter_patients', None, now) for patient in shard]
+        # stable: every queue keeps its serving order
+        patients.sort(key=lambda patient: patient.specialization)
+        yield from patients
+
+    def get_next(self, specialization, now = None):
+        """
+        Retrieves and removes the next patient
+        from a given specialization queue.
+
+        Returns:
+            Patient | False: Next patient or False if queue is empty
+        """
+        return self._call(self.shard(specialization), 'get_next', specialization, self._time(now))
+
+    def _global_head(self, now):
+        # (key, patient) of the next patient over all workers, or None
+        heads = [head for head in self._broadcast('head', now) if head is not None]
+        return min(heads, key=lambda head: head[0]) if heads else None
+
+    def peek_next_global(self, now = None):
+        """
+        Returns the patient that get_next_global() would serve, without
+        removing it.
+
+        Returns:
+            Patient | None: Next patient or None if nobody is waiting
+        """
+        head = self._global_head(self._time(now))
+        return None if head is None else head[1]
+
+    def get_next_global(self, now = None):
+        """
+        Retrieves and removes the next patient hospital-wide: the highest
+        effective status, then the earliest arrival, over all workers.
+
+        Returns:
+            Patient | False: Next patient or False if nobody is waiting
+        """
+        # no other thread may serve the head between peeking and serving it
+        with self.lock:
+            now = self._time(now)
+            head = self._global_head(now)
+            if head is None:
+                return False
+            return self.get_next(head[1].specialization, now)
+
+    def queue_depth(self, specialization):
+        """
+        Number of patients waiting in one specialization.
+        """
+        return self._call(self.shard(specialization), 'queue_depth', specialization)
+
+    def queue_depths(self):
+        """
+        Returns:
+            dict: specialization -> waiting patients, for non-empty queues
+        """
+        depths = {}
+        for shard in self._broadcast('queue_depths'):
+            depths.update(shard)
+        return dict(sorted(depths.items()))
+
+    def wait_percentiles(self, specialization = None, percentiles = WaitTimes.PERCENTILES):
+        """
+        Wait time percentiles of recently served patients.
+
+        Returns:
+            dict: percentile -> seconds for one specialization, or
+                  specialization -> that dict when none is given
+        """
+        if specialization is not None:
+            return self._call(self.shard(specialization), 'wait_percentiles', specialization,
+                              percentiles)
+        waits = {}
+        for shard in self._broadcast('wait_percentiles', None, percentiles):
+            waits.update(shard)
+        return dict(sorted(waits.items()))
+
+    def remove_patient(self, name, specialization, now = None):
+        """
+        Removes a patient by name from a specific specialization.
+
+        Returns:
+            bool: True if patient removed, False if not found
+        """
+        return self._call(self.shard(specialization), 'remove_patient', name, specialization,
+                          self._time(now))
@@ -0,0 +1,301 @@
+import sqlite3
+import time
+from backend.patient import Patient
+from backend.wait_times import WaitTimes
+class SQLiteHospitalManager:
+    """
+    HospitalManager with the same API, backed by a SQLite database
+    for queues that do not fit in memory.
+
+    Every patient gets an increasing sequence number and an arrival time.
+    The priority column is the status raised by aging. An index on
+    (specialization, priority DESC, seq) keeps each queue in serving
+    order, so the next patient is the first index entry of its
+    specialization. An index on (specialization, name) serves removals
+    and one on (priority DESC, seq) finds the next patient hospital-wide.
+    Aging is one UPDATE per level over an index on (priority, arrived),
+    touching only the patients it promotes.
+    The database runs in WAL mode and every public method is one transaction.
+    """
+    LEVELS = 3
+
+    def __init__(self, path = ':memory:', specializations = 20, capacity = 10,
+                 fallbacks = None, aging = None, clock = time.time, wait_window = 1000):
+        """
+        Args:
+            path (str): Database file, ':memory:' for a temporary database
+            specializations (int): Number of specializations (numbered from 1)
+            capacity (int | None): Maximum patients per specialization,
+                                   None for no limit
+            fallbacks (dict | None): specialization -> list of specializations
+                                     tried in order when it is full
+            aging (tuple | None): Seconds since arrival after which a normal
+                                  patient becomes urgent and an urgent one
+                                  super urgent (non-decreasing), None for
+                                  no aging
+            clock: Returns the current time when no `now` is given
+            wait_window (int): Served patients per specialization kept
+                               for the wait time percentiles
+        """
+        self.specializations = specializations
+        self.capacity = capacity
+        self.fallbacks = fallbacks or {}
+        for specialization, others in self.fallbacks.items():
+            if not all(map(self.is_valid_specialization, [specialization, *others])):
+                raise ValueError(f'invalid fallback specializations for {specialization}')
+        if aging is not None:
+            aging = tuple(aging)
+            waits = [wait for wait in aging if wait is not None]
+            # both thresholds count from arrival, so an urgent patient cannot
+            # need less waiting than a normal one to move up
+            if len(aging) != self.LEVELS - 1 or any(wait < 0 for wait in waits) or waits != sorted(waits):
+                raise ValueError(f'aging needs {self.LEVELS - 1} non-negative, non-decreasing thresholds')
+        self.aging = aging
+        self.clock = clock
+        self.last_time = float('-inf')
+        self.waits = WaitTimes(wait_window)
+        # the HTTP server calls the manager from its worker thread, one call
+        # at a time, after the main thread has set it up
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        with self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS patients (
+                                     seq INTEGER PRIMARY KEY,
+                                     name TEXT NOT NULL,
+                                     status INTEGER NOT NULL,
+                                     specialization INTEGER NOT NULL,
+                                     arrived REAL NOT NULL DEFAULT 0,
+                                     priority INTEGER NOT NULL DEFAULT 0)''')
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(patients)')}
+            if 'arrived' not in columns:
+                # database of an older version: patients waiting in it arrive now
+                self.conn.execute('ALTER TABLE patients ADD COLUMN arrived REAL NOT NULL DEFAULT 0')
+                self.conn.execute('ALTER TABLE patients ADD COLUMN priority INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute('UPDATE patients SET arrived = ?, priority = status', (self.clock(),))
+                self.conn.execute('DROP INDEX IF EXISTS patients_queue')
+                self.conn.execute('DROP INDEX IF EXISTS patients_global')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS patients_serving
+                                 ON patients (specialization, priority DESC, seq)''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS patients_name
+                                 ON patients (specialization, name)''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS patients_next
+                                 ON patients (priority DESC, seq)''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS patients_aging
+                                 ON patients (priority, arrived)''')
+            self.last_time = self.conn.execute('SELECT MAX(arrived) FROM patients').fetchone()[0] \
+                or self.last_time
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def total(self):
+        """
+        Number of waiting patients across all specializations.
+        """
+        return self.conn.execute('SELECT COUNT(*) FROM patients').fetchone()[0]
+
+    def is_valid_specialization(self, specialization):
+        """
+        Checks that a specialization number is within the configured range.
+        """
+        return 1 <= specialization <= self.specializations
+
+    def _time(self, now):
+        # Current time, kept monotonic like HospitalManager._time
+        if now is None:
+            now = self.clock()
+        if now < self.last_time:
+            now = self.last_time
+        self.last_time = now
+        return now
+
+    def _promote(self, now):
+        # Ages waiting patients up to now inside the caller's transaction;
+        # lower levels first so a patient can move up twice
+        if self.aging is None:
+            return
+        for level, wait in enumerate(self.aging):
+            if wait is not None:
+                self.conn.execute('UPDATE patients SET priority = ? WHERE priority = ? AND arrived <= ?',
+                                  (level + 1, level, now - wait))
+
+    def _add(self, name, status, specialization, now):
+        # Inserts one patient inside the caller's transaction
+        if not 0 <= status <= 2 or not self.is_valid_specialization(specialization):
+            return False
+        for target in (specialization, *self.fallbacks.get(specialization, ())):
+            if self.capacity is None or self.queue_depth(target) < self.capacity:
+                break
+        else:
+            return False
+        self.conn.execute('''INSERT INTO patients (name, status, specialization, arrived, priority)
+                             VALUES (?, ?, ?, ?, ?)''', (name, status, target, now, status))
+        return target
+
+    def add_patient(self, name, status, specialization, now = None):
+        """
+        Adds a patient to a specialization queue.
+        Same priority, capacity and fallback rules as HospitalManager.add_patient.
+
+        Returns:
+            int | False: Specialization the patient was added to, False if
+                         it and its fallbacks are full or the status or
+                         specialization is invalid
+        """
+        with self.conn:
+            return self._add(name, status, specialization, self._time(now))
+
+    def add_patients(self, rows):
+        """
+        Adds many (name, status, specialization) rows in one transaction,
+        all arriving now. Without a capacity limit the rows are inserted
+        with executemany.
+
+        Returns:
+            int: Number of rows that could not be added
+        """
+        now = self._time(None)
+        with self.conn:
+            if self.capacity is None and not self.fallbacks:
+                rows = list(rows)
+                valid = [(name, status, specialization, now, status) for name, status, specialization in rows
+                         if 0 <= status <= 2 and self.is_valid_specialization(specialization)]
+                self.conn.executemany('''INSERT INTO patients (name, status, specialization, arrived, priority)
+                                         VALUES (?, ?, ?, ?, ?)''', valid)
+                return len(rows) - len(valid)
+            rejected = 0
+            for name, status, specialization in rows:
+                if not self._add(name, status, specialization, now):
+                    rejected += 1
+            return rejected
+
+    def print_patients(self):
+        """
+        Returns the non-empty specialization queues, each as a list of
+        patients in serving order, if there are any patients in the system.
+
+        Returns:
+            list | False: List of queues or False if no patients exist
+        """
+        queues = {}
+        for patient in self.iter_patients():
+            queues.setdefault(patient.specialization, []).append(patient)
+        return list(queues.values()) or False
+
+    def iter_patients(self, specialization = None, now = None):
+        """
+        Lazily yields waiting patients in serving order, streaming rows
+        from the cursor. With no specialization given, all specializations
+        are visited in increasing number. Patients due for aging are
+        promoted first.
+
+        Yields:
+            Patient
+        """
+        with self.conn:
+            self._promote(self._time(now))
+        if specialization is None:
+            cursor = self.conn.execute('''SELECT name, status, specialization, arrived FROM patients
+                                          ORDER BY specialization, priority DESC, seq''')
+        else:
+            cursor = self.conn.execute('''SELECT name, status, specialization, arrived FROM patients
+                                          WHERE specialization = ? ORDER BY priority DESC, seq''',
+                                       (specialization,))
+        for row in cursor:
+            yield Patient(*row)
+
+    def get_next(self, specialization, now = None):
+        """
+        Retrieves and removes the next patient
+        from a given specialization queue.
+
+        Returns:
+            Patient | False: Next patient or False if queue is empty
+        """
+        now = self._time(now)
+        with self.conn:
+            self._promote(now)
+            row = self.conn.execute('''SELECT seq, name, status, arrived FROM patients
+                                       WHERE specialization = ? ORDER BY priority DESC, seq LIMIT 1''',
+                                    (specialization,)).fetchone()
+            if row is None:
+                return False
+            self.conn.execute('DELETE FROM patients WHERE seq = ?', (row[0],))
+        self.waits.record(specialization, now - row[3])
+        return Patient(row[1], row[2], specialization, row[3])
+
+    def peek_next_global(self, now = None):
+        """
+        Returns the next patient hospital-wide without removing it.
+
+        Returns:
+            Patient | None: Next patient or None if nobody is waiting
+        """
+        with self.conn:
+            self._promote(self._time(now))
+            row = self.conn.execute('''SELECT name, status, specialization, arrived FROM patients
+                                       ORDER BY priority DESC, seq LIMIT 1''').fetchone()
+        return Patient(*row) if row else None
+
+    def get_next_global(self, now = None):
+        """
+        Retrieves and removes the next patient hospital-wide.
+
+        Returns:
+            Patient | False: Next patient or False if nobody is waiting
+        """
+        now = self._time(now)
+        with self.conn:
+            self._promote(now)
+            row = self.conn.execute('''SELECT seq, name, status, specialization, arrived FROM patients
+                                       ORDER BY priority DESC, seq LIMIT 1''').fetchone()
+            if row is None:
+                return False
+            self.conn.execute('DELETE FROM patients WHERE seq = ?', (row[0],))
+        self.waits.record(row[3], now - row[4])
+        return Patient(*row[1:])
+
+    def queue_depth(self, specialization):
+        """
+        Number of patients waiting in one specialization.
+        """
+        return self.conn.execute('SELECT COUNT(*) FROM patients WHERE specialization = ?',
+                                 (specialization,)).fetchone()[0]
+
+    def queue_depths(self):
+        """
+        Returns:
+            dict: specialization -> waiting patients, for non-empty queues
+        """
+        return dict(self.conn.execute('''SELECT specialization, COUNT(*) FROM patients
+                                         GROUP BY specialization ORDER BY specialization'''))
+
+    def wait_percentiles(self, specialization = None, percentiles = WaitTimes.PERCENTILES):
+        """
+        Wait time percentiles of recently served patients, from arrival
+        until they were served.
+
+        Returns:
+            dict: percentile -> seconds for one specialization, or
+                  specialization -> that dict when none is given
+        """
+        return self.waits.percentiles(specialization, percentiles)
+
+    def remove_patient(self, name, specialization, now = None):
+        """
+        Removes a patient by name from a specific specialization.
+        If several patients share the name the one served first is removed.
+
+        Returns:
+            bool: True if patient removed, False if not found
+        """
+        with self.conn:
+            self._promote(self._time(now))
+            cursor = self.conn.execute('''DELETE FROM patients WHERE seq =
+                                              (SELECT seq FROM patients
+                                               WHERE specialization = ? AND name = ?
+                                               ORDER BY priority DESC, seq LIMIT 1)''',
+                                       (specialization, name))
+            return cursor.rowcount > 0
@@ -0,0 +1,55 @@
+from collections import deque
+class WaitTimes:
+    """
+    Recent wait times of served patients per specialization.
+
+    Keeps the last `window` waits of every specialization in a ring
+    buffer, so recording is O(1) and memory stays bounded however many
+    patients are served. Percentiles are computed on demand from a
+    sorted copy of the window (nearest-rank method).
+    """
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, window = 1000):
+        """
+        Args:
+            window (int): Waits kept per specialization
+        """
+        self.window = window
+        # specialization number -> deque of waits in seconds
+        self.waits = {}
+
+    def record(self, specialization, seconds):
+        waits = self.waits.get(specialization)
+        if waits is None:
+            waits = self.waits[specialization] = deque(maxlen=self.window)
+        waits.append(max(seconds, 0.0))
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: specialization -> kept waits, oldest first
+        """
+        return {number: list(waits) for number, waits in self.waits.items()}
+
+    def restore(self, waits):
+        # Replaces the kept waits with the ones from snapshot()
+        self.waits = {number: deque(seconds, maxlen=self.window) for number, seconds in waits.items()}
+
+    @staticmethod
+    def _percentiles(waits, percentiles):
+        ordered = sorted(waits)
+        return {p: ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in percentiles}
+
+    def percentiles(self, specialization = None, percentiles = PERCENTILES):
+        """
+        Returns:
+            dict: percentile -> seconds for one specialization (empty if
+                  nobody was served yet), or with no specialization given,
+                  specialization -> that dict for every one with data
+        """
+        if specialization is not None:
+            waits = self.waits.get(specialization)
+            return self._percentiles(waits, percentiles) if waits else {}
+        return {number: self._percentiles(waits, percentiles)
+                for number, waits in sorted(self.waits.items())}
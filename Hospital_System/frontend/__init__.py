@@ -0,0 +1,2 @@
+# importing the backend package makes the shared `common` package importable
+import backend
@@ -0,0 +1,87 @@
+from common import batch
+
+class BatchRunner(batch.BatchRunner):
+    """
+    Runs a script of hospital commands (see common.batch.BatchRunner):
+        add NAME STATUS SPECIALIZATION
+        next [SPECIALIZATION]      (hospital-wide without a specialization)
+        remove NAME SPECIALIZATION
+        list [SPECIALIZATION]
+        depths
+        waits [SPECIALIZATION]     (wait time percentiles of served patients)
+
+    With a ShardedHospitalManager, runs of add, next SPECIALIZATION and
+    remove commands go through its execute() in batches.
+    """
+    def __init__(self, manager, out = None, flush_every = 10000, pipeline = 1000):
+        """
+        Args:
+            manager: HospitalManager or any manager with the same API
+            out: Text stream for the output, sys.stdout by default
+            flush_every (int): Output lines buffered before each write
+            pipeline (int): Calls per execute() batch
+        """
+        super().__init__(manager, out, flush_every, pipeline)
+        self.commands = {'add': self.add, 'next': self.next,
+                         'remove': self.remove, 'list': self.list, 'depths': self.depths,
+                         'waits': self.waits}
+        # commands that can be pipelined, returning a call or None
+        self.calls = {'add': self.add_call, 'next': self.next_call, 'remove': self.remove_call}
+
+    # each command returns (succeeded, output text or None)
+
+    # a call is (manager method, args, function turning its result into
+    # the command's return value)
+
+    def add_call(self, name, status, specialization):
+        def finish(added):
+            if added:
+                return True, None
+            return False, f'cannot add {name} to specialization {specialization}'
+        return 'add_patient', (name, int(status), int(specialization)), finish
+
+    def add(self, *fields):
+        return self.run_call(self.add_call(*fields))
+
+    def next_call(self, specialization = None):
+        if specialization is None:
+            # hospital-wide next depends on every queue, it is not pipelined
+            return None
+        def finish(patient):
+            if patient:
+                return True, str(patient)
+            return False, f'no patients in specialization {specialization}'
+        return 'get_next', (int(specialization),), finish
+
+    def next(self, specialization = None):
+        if specialization is None:
+            if patient := self.manager.get_next_global():
+                return True, str(patient)
+            return False, 'no patients waiting'
+        return self.run_call(self.next_call(specialization))
+
+    def remove_call(self, name, specialization):
+        def finish(removed):
+            if removed:
+                return True, None
+            return False, f'{name} is not in specialization {specialization}'
+        return 'remove_patient', (name, int(specialization)), finish
+
+    def remove(self, *fields):
+        return self.run_call(self.remove_call(*fields))
+
+    def list(self, specialization = None):
+        if specialization is not None:
+            specialization = int(specialization)
+        return True, '\n'.join(map(str, self.manager.iter_patients(specialization))) or None
+
+    def depths(self):
+        return True, '\n'.join(f'{number} {depth}' for number, depth in self.manager.queue_depths().items()) or None
+
+    def waits(self, specialization = None):
+        if specialization is None:
+            waits = self.manager.wait_percentiles()
+        else:
+            waits = {int(specialization): self.manager.wait_percentiles(int(specialization))}
+        return True, '\n'.join(f'{number} ' + ' '.join(f'p{p}={seconds:.3f}' for p, seconds in items.items())
+                                for number, items in waits.items() if items) or None
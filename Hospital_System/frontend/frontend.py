@@ -1,4 +1,5 @@
 from backend.hospital_manager import HospitalManager
+from backend.importer import import_patients
 class Frontend:
     """
     Handles user interaction:
@@ -6,15 +7,16 @@ class Frontend:
     - Reads user input
     - Communicates with HospitalManager
     """
-    def __init__(self):
-        self.manager = HospitalManager()
+    def __init__(self, manager = None):
+        self.manager = manager if manager is not None else HospitalManager()
 
     def print_menu(self):
         """
         Displays the main menu options.
         """
         menu = ['1: Add new patient', '2: Print all patients', '3: Get next patient',\
-                '4: Remove a leaving patient', '5: End the program']
+                '4: Remove a leaving patient', '5: Import patients from file',\
+                '6: Get next patient hospital-wide', '7: Print queue depths', '8: End the program']
         print('\n'.join(menu))
     
     def get_choice(self):
@@ -24,8 +26,8 @@ class Frontend:
         Returns:
             int | None: User choice or None if invalid
         """
-        choice = int(input('Enter your choice from 1 to 5: '))
-        if choice < 1 or choice > 5:
+        choice = int(input('Enter your choice from 1 to 8: '))
+        if choice < 1 or choice > 8:
             return
         return choice
 
@@ -43,18 +45,25 @@ class Frontend:
                 status = int(input('Enter patient status: '))
                 specialization = int(input('Enter patient specialization: '))
 
-                if self.manager.add_patient(name, status, specialization):
-                    print(f'{name} added successfully')
+                if not 0 <= status <= 2:
+                    print('Invalid status, enter 0 (normal), 1 (urgent) or 2 (super urgent)')
+                elif not self.manager.is_valid_specialization(specialization):
+                    print('Invalid specialization')
+                elif added := self.manager.add_patient(name, status, specialization):
+                    if added == specialization:
+                        print(f'{name} added successfully')
+                    else:
+                        print(f'{name} added to specialization {added}, {specialization} is full')
                 else:
                     print('Sorry, no free space in this specialization')
 
             elif choice == 2:
-                patients = self.manager.print_patients()
-                if patients:
-                    for specialization in patients:
-                        for patient in specialization:
-                            print(patient)
-                else:
+                # stream the patients instead of copying the queues
+                empty = True
+                for patient in self.manager.iter_patients():
+                    print(patient)
+                    empty = False
+                if empty:
                     print('No patients yet')
 
             elif choice == 3:
@@ -74,6 +83,29 @@ class Frontend:
                 else:
                     print(f"The patient {name} doen't exist in this specialization {specialization}")
             elif choice == 5:
+                # bulk import from a CSV or JSONL file
+                path = input('Enter file path (.csv or .jsonl): ')
+                try:
+                    print(import_patients(self.manager, path))
+                except (OSError, ValueError, KeyError) as error:
+                    print(f'Import failed: {error}')
+            elif choice == 6:
+                if patient := self.manager.get_next_global():
+                    print(f'{patient} (specialization {patient.specialization})')
+                else:
+                    print('No patients yet')
+            elif choice == 7:
+                depths = self.manager.queue_depths()
+                waits = self.manager.wait_percentiles()
+                for specialization in sorted(depths.keys() | waits.keys()):
+                    line = f'Specialization {specialization}: {depths.get(specialization, 0)} waiting'
+                    if specialization in waits:
+                        line += ', served after ' + ', '.join(
+                            f'p{p} {seconds:.0f}s' for p, seconds in waits[specialization].items())
+                    print(line)
+                if not depths and not waits:
+                    print('No patients yet')
+            elif choice == 8:
                 print('Bye, See you later')
                 break
             else:
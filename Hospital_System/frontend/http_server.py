@@ -0,0 +1,278 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+from backend.hospital_manager import HospitalManager
+
+class RequestTooLarge(ValueError):
+    """
+    A request over the server's size limits, answered with `status`.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class HospitalServer:
+    """
+    Non-interactive HTTP/JSON API over a hospital manager, built on asyncio
+    so thousands of triage clients can be connected at once.
+
+    Endpoints:
+        GET    /patients[?specialization=N]        list waiting patients
+        POST   /patients                           add {"name", "status", "specialization"}
+        POST   /next                               serve the next patient hospital-wide
+        GET    /specializations                    queue depth per specialization
+        GET    /waits                              wait time percentiles (seconds)
+                                                   of served patients per specialization
+        POST   /specializations/N/next[?wait=S]    serve the next patient,
+                                                   waiting up to S seconds for one
+        DELETE /specializations/N/patients/NAME    remove a leaving patient
+
+    Manager calls run one at a time on a single worker thread, so each one
+    is atomic and the event loop keeps reading and answering requests while
+    a slow call (a long listing, a journal fsync) is running. Every
+    specialization has its own asyncio.Condition: requests on the same
+    queue are serialized and doctors waiting for a patient are woken by
+    adds to their queue only, while other queues are not blocked.
+    Connections are kept alive (HTTP/1.1) unless the client closes them;
+    a request that cannot be parsed gets a 400 reply, one with too large
+    a body a 413 and one with too many headers a 431, and the connection
+    is closed.
+    """
+    MAX_BODY = 64 * 1024
+    MAX_HEADERS = 100
+
+    def __init__(self, manager = None, host = '127.0.0.1', port = 8080):
+        """
+        Args:
+            manager: HospitalManager or any manager with the same API
+            host (str): Interface to listen on
+            port (int): TCP port, 0 picks a free one
+        """
+        self.manager = manager if manager is not None else HospitalManager()
+        self.host = host
+        self.port = port
+        # specialization number -> Condition, created on first use
+        self.queues = {}
+        self.server = None
+        # one thread: the manager is not thread-safe
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hospital-manager')
+
+    async def call(self, function, *args):
+        """
+        Runs a manager call on the worker thread and waits for its result.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def condition(self, specialization):
+        """
+        Returns the lock/condition guarding one specialization queue.
+        """
+        cond = self.queues.get(specialization)
+        if cond is None:
+            cond = self.queues[specialization] = asyncio.Condition()
+        return cond
+
+    async def start(self):
+        """
+        Starts listening; the bound port is stored in self.port.
+        """
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def handle(self, reader, writer):
+        """
+        Serves requests from one connection until it is closed.
+        """
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except ValueError as error:
+                    # the rest of the stream cannot be framed, so close it
+                    status = error.status if isinstance(error, RequestTooLarge) else HTTPStatus.BAD_REQUEST
+                    writer.write(self.response(status, {'error': f'bad request: {error}'}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except (ValueError, KeyError, TypeError) as error:
+                    status, payload = HTTPStatus.BAD_REQUEST, {'error': f'bad request: {error}'}
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(self.response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """
+        Reads one request.
+
+        Returns:
+            tuple | None: (method, target, headers, body) or None at end of stream
+
+        Raises:
+            ValueError: malformed request line or Content-Length
+            RequestTooLarge: body over MAX_BODY or more than MAX_HEADERS headers
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode('latin-1').split(' ', 2)
+        if len(parts) != 3:
+            raise ValueError(f'malformed request line {line.strip()[:80]!r}')
+        method, target, _ = parts
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            if len(headers) >= self.MAX_HEADERS:
+                raise RequestTooLarge(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                      f'more than {self.MAX_HEADERS} headers')
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length < 0:
+            raise ValueError(f'negative Content-Length {length}')
+        if length > self.MAX_BODY:
+            raise RequestTooLarge(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                  f'body of {length} bytes, the limit is {self.MAX_BODY}')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def response(status, payload, keep_alive = True):
+        """
+        Encodes a JSON response.
+        """
+        body = json.dumps(payload).encode('utf-8')
+        head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        return head.encode('latin-1') + body
+
+    @staticmethod
+    def patient_json(patient):
+        return {'name': patient.name, 'status': patient.status,
+                'specialization': patient.specialization, 'arrived': patient.arrived}
+
+    async def dispatch(self, method, target, body):
+        """
+        Routes a request to its handler.
+
+        Returns:
+            tuple: (HTTPStatus, JSON payload)
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if parts == ['patients']:
+            if method == 'GET':
+                specialization = query.get('specialization')
+                return await self.list_patients(int(specialization[0]) if specialization else None)
+            if method == 'POST':
+                data = json.loads(body or b'{}')
+                return await self.add_patient(str(data['name']), int(data['status']),
+                                              int(data['specialization']))
+        elif parts == ['next'] and method == 'POST':
+            return await self.next_global()
+        elif parts == ['specializations'] and method == 'GET':
+            depths = await self.call(self.manager.queue_depths)
+            return HTTPStatus.OK, {'depths': {str(number): depth for number, depth in depths.items()}}
+        elif parts == ['waits'] and method == 'GET':
+            waits = await self.call(self.manager.wait_percentiles)
+            return HTTPStatus.OK, {'waits': {str(number): {f'p{p}': seconds for p, seconds in items.items()}
+                                             for number, items in waits.items()}}
+        elif len(parts) >= 3 and parts[0] == 'specializations':
+            specialization = int(parts[1])
+            if parts[2:] == ['next'] and method == 'POST':
+                wait = query.get('wait')
+                return await self.next_patient(specialization, float(wait[0]) if wait else 0)
+            if len(parts) == 4 and parts[2] == 'patients' and method == 'DELETE':
+                return await self.remove_patient(parts[3], specialization)
+        return HTTPStatus.NOT_FOUND, {'error': f'no route for {method} {url.path}'}
+
+    def invalid(self, specialization):
+        return HTTPStatus.BAD_REQUEST, {'error': f'invalid specialization {specialization}'}
+
+    async def add_patient(self, name, status, specialization):
+        if not await self.call(self.manager.is_valid_specialization, specialization):
+            return self.invalid(specialization)
+        added = await self.call(self.manager.add_patient, name, status, specialization)
+        if not added:
+            if not 0 <= status <= 2:
+                return HTTPStatus.BAD_REQUEST, {'error': f'invalid status {status}'}
+            return HTTPStatus.CONFLICT, {'error': 'no free space in this specialization'}
+        # the patient may have been routed to a fallback specialization;
+        # wake one doctor waiting on that queue
+        cond = self.condition(added)
+        async with cond:
+            cond.notify()
+        return HTTPStatus.CREATED, {'added': True, 'specialization': added}
+
+    async def next_global(self):
+        # a single manager call is atomic, so no queue lock is needed
+        if patient := await self.call(self.manager.get_next_global):
+            return HTTPStatus.OK, self.patient_json(patient)
+        return HTTPStatus.NOT_FOUND, {'error': 'no patients waiting'}
+
+    async def next_patient(self, specialization, wait = 0):
+        if not await self.call(self.manager.is_valid_specialization, specialization):
+            return self.invalid(specialization)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        cond = self.condition(specialization)
+        async with cond:
+            patient = await self.call(self.manager.get_next, specialization)
+            # an add notifies under the condition, which is held from the
+            # empty get_next until wait() releases it, so no add is missed;
+            # another request may still take the patient first, then wait again
+            while not patient and (remaining := deadline - loop.time()) > 0:
+                try:
+                    await asyncio.wait_for(cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                patient = await self.call(self.manager.get_next, specialization)
+        if not patient:
+            return HTTPStatus.NOT_FOUND, {'error': 'no patients in this specialization'}
+        return HTTPStatus.OK, self.patient_json(patient)
+
+    async def remove_patient(self, name, specialization):
+        if not await self.call(self.manager.is_valid_specialization, specialization):
+            return self.invalid(specialization)
+        async with self.condition(specialization):
+            removed = await self.call(self.manager.remove_patient, name, specialization)
+        if not removed:
+            return HTTPStatus.NOT_FOUND, {'error': f"the patient {name} doesn't exist in this specialization"}
+        return HTTPStatus.OK, {'removed': True}
+
+    def listing(self, specialization = None):
+        # the whole listing is one call on the worker thread, so it is consistent
+        return [self.patient_json(p) for p in self.manager.iter_patients(specialization)]
+
+    async def list_patients(self, specialization = None):
+        if specialization is not None:
+            if not await self.call(self.manager.is_valid_specialization, specialization):
+                return self.invalid(specialization)
+            async with self.condition(specialization):
+                patients = await self.call(self.listing, specialization)
+        else:
+            patients = await self.call(self.listing)
+        return HTTPStatus.OK, {'patients': patients}
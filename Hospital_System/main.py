@@ -10,8 +10,111 @@ Description:
     - Serve the next patient according to priority
     - Remove patients from a specialization
 """
+import argparse
+import asyncio
+import sys
+from backend.hospital_manager import HospitalManager
+from backend.importer import import_patients
+from backend.metrics import manager_gauges
+from backend.sharded_hospital_manager import ShardedHospitalManager
+from backend.sqlite_hospital_manager import SQLiteHospitalManager
+from common.metrics import Metrics, instrument
+from common.storage import PersistentStore
+from frontend.batch import BatchRunner
 from frontend.frontend import Frontend
+from frontend.http_server import HospitalServer
 
 if __name__ == '__main__':
-    app = Frontend()
-    app.run()
+    parser = argparse.ArgumentParser(description='Hospital Queue Management System')
+    parser.add_argument('--import', dest='import_path', metavar='FILE',
+                        help='load patients from a CSV or JSONL file at startup')
+    parser.add_argument('--sqlite', metavar='DB',
+                        help='store the queues in a SQLite database file')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='keep the queues on disk (journal + snapshots) in DIR')
+    parser.add_argument('--sync-every', type=int, default=1, metavar='N',
+                        help='fsync the journal every N operations (default 1)')
+    parser.add_argument('--snapshot-every', type=int, metavar='N',
+                        help='write a snapshot every N operations')
+    parser.add_argument('--serve', action='store_true',
+                        help='run the HTTP/JSON API server instead of the console menu')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address for --serve (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='port for --serve (default 8080)')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands in FILE ('-' for stdin) instead of the console menu")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='record manager metrics and write them (Prometheus text) to FILE on exit')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='record manager metrics and serve them at http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--fallback', action='append', default=[], metavar='SP:ALT[,ALT...]',
+                        help='route patients of a full specialization SP to ALT (repeatable)')
+    parser.add_argument('--aging', metavar='NORMAL,URGENT',
+                        help='seconds since arrival after which a normal patient becomes urgent '
+                             'and an urgent one super urgent, e.g. 3600,5400')
+    parser.add_argument('--shards', type=int, metavar='N',
+                        help='split the specializations across N worker processes')
+    args = parser.parse_args()
+    if args.sqlite and args.data_dir:
+        parser.error('--sqlite cannot be combined with --data-dir')
+    if args.sqlite and args.shards:
+        parser.error('--sqlite cannot be combined with --shards')
+    try:
+        aging = [float(seconds) for seconds in args.aging.split(',')] if args.aging else None
+    except ValueError as error:
+        parser.error(f'--aging: {error}')
+    try:
+        fallbacks = {int(sp): [int(alt) for alt in alts.split(',')]
+                     for sp, alts in (item.split(':') for item in args.fallback)}
+    except ValueError as error:
+        parser.error(f'--fallback: {error}')
+    try:
+        if args.sqlite:
+            manager = SQLiteHospitalManager(args.sqlite, fallbacks=fallbacks, aging=aging)
+        elif args.shards:
+            # every worker recovers and journals its own specializations
+            manager = ShardedHospitalManager(fallbacks=fallbacks, aging=aging, workers=args.shards,
+                                             data_dir=args.data_dir, sync_every=args.sync_every,
+                                             snapshot_every=args.snapshot_every)
+        else:
+            manager = HospitalManager(fallbacks=fallbacks, aging=aging)
+    except ValueError as error:
+        parser.error(str(error))
+    app = Frontend(manager)
+    metrics = None
+    if args.metrics or args.metrics_port:
+        metrics = Metrics('hospital')
+        instrument(app.manager, metrics)
+        manager_gauges(metrics, app.manager)
+        if args.metrics_port:
+            metrics.serve(args.metrics_port)
+    store = None
+    if args.data_dir and not args.shards:
+        store = PersistentStore(args.data_dir, args.sync_every, snapshot_every=args.snapshot_every)
+        print(f'Recovered state, replayed {store.open(app.manager)} operations')
+    if args.import_path:
+        print(import_patients(app.manager, args.import_path))
+    if args.batch:
+        if args.batch == '-':
+            stats = BatchRunner(app.manager).run(sys.stdin)
+        else:
+            with open(args.batch, encoding='utf-8') as file:
+                stats = BatchRunner(app.manager).run(file)
+        print(stats, file=sys.stderr)
+    elif args.serve:
+        server = HospitalServer(app.manager, args.host, args.port)
+        print(f'Serving on http://{args.host}:{args.port}')
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        app.run()
+    if store is not None:
+        store.snapshot()
+        store.close()
+    if args.metrics:
+        metrics.write(args.metrics)
+    if args.shards:
+        manager.close()
@@ -0,0 +1,71 @@
+import io
+import random
+import pytest
+from backend.hospital_manager import HospitalManager
+from backend.sharded_hospital_manager import ShardedHospitalManager
+from frontend.batch import BatchRunner
+
+def script():
+    rnd = random.Random(3)
+    lines = ['# triage']
+    for step in range(400):
+        sp = rnd.randint(1, 6)
+        op = rnd.random()
+        if op < 0.5:
+            lines.append(f'add p{step} {rnd.randrange(4)} {sp}')
+        elif op < 0.75:
+            lines.append(f'next {sp}')
+        elif op < 0.8:
+            lines.append('next')
+        elif op < 0.95:
+            lines.append(f'remove p{rnd.randrange(step + 1)} {sp}')
+        else:
+            lines.append(rnd.choice(['list', f'list {sp}', 'depths']))
+    return lines + ['add x', 'admit y 1 1']
+
+def test_pipelined_run_matches_one_by_one():
+    outputs = []
+    sharded = ShardedHospitalManager(capacity=5, workers=3)
+    try:
+        for manager, pipeline in (HospitalManager(capacity=5), 1000), (sharded, 1000), (sharded, 3):
+            if manager is sharded:
+                # start each sharded run from empty queues
+                while manager.get_next_global():
+                    pass
+            out = io.StringIO()
+            stats = BatchRunner(manager, out, pipeline=pipeline).run(script())
+            outputs.append((stats.commands, stats.failed, out.getvalue()))
+    finally:
+        sharded.close()
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert outputs[0][2].splitlines()[-2:] == ["line 402: wrong number of arguments for 'add'",
+                                               "line 403: unknown command 'admit'"]
+
+class FailingManager(HospitalManager):
+    """
+    Pipelines through execute(), which fails after running its first batch.
+    """
+    def __init__(self):
+        super().__init__(capacity=None)
+        self.batches = 0
+
+    def execute(self, calls):
+        self.batches += 1
+        results = [getattr(self, method)(*args) for method, args in calls]
+        if self.batches == 1:
+            raise ValueError('connection lost')
+        return results
+
+    def queue_depths(self):
+        raise TypeError('bug in the manager')
+
+def test_failed_batch_does_not_run_twice():
+    manager, out = FailingManager(), io.StringIO()
+    stats = BatchRunner(manager, out).run(['add ann 0 1', 'add bob 0 1', 'list', 'add cy 0 2'])
+    assert out.getvalue().splitlines()[0] == 'line 3: connection lost'
+    assert manager.batches == 2 and manager.total == 3
+    assert (stats.commands, stats.failed) == (4, 1)
+
+def test_manager_type_errors_propagate():
+    with pytest.raises(TypeError, match='bug in the manager'):
+        BatchRunner(FailingManager(), io.StringIO()).run(['depths'])
@@ -0,0 +1,18 @@
+from backend.hospital_manager import HospitalManager
+from frontend.frontend import Frontend
+
+def run(monkeypatch, capsys, manager, answers):
+    answers = iter(answers)
+    monkeypatch.setattr('builtins.input', lambda prompt = '': next(answers))
+    Frontend(manager).run()
+    return capsys.readouterr().out
+
+def test_add_reports_why_a_patient_was_rejected(monkeypatch, capsys):
+    manager = HospitalManager(capacity=1)
+    out = run(monkeypatch, capsys, manager, ['1', 'ann', '5', '1',
+                                             '1', 'bob', '0', '1',
+                                             '1', 'cid', '0', '1', '8'])
+    assert 'Invalid status' in out
+    assert 'bob added successfully' in out
+    assert out.count('no free space') == 1
+    assert manager.queue_depths() == {1: 1}
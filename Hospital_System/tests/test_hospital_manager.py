@@ -0,0 +1,219 @@
+import random
+import pytest
+from backend.hospital_manager import HospitalManager
+from backend.sqlite_hospital_manager import SQLiteHospitalManager
+
+class Reference:
+    """
+    The hospital as one list of waiting patients, sorted on every call.
+    """
+    def __init__(self, aging = None):
+        self.aging = aging
+        # (name, status, specialization, arrival number, arrival time)
+        self.waiting = []
+        self.arrivals = 0
+        # specialization -> waits of served patients
+        self.waits = {}
+
+    def add_patient(self, name, status, specialization, now = 0.0):
+        if not 0 <= status <= 2:
+            return False
+        self.waiting.append((name, status, specialization, self.arrivals, now))
+        self.arrivals += 1
+        return specialization
+
+    def level(self, patient, now):
+        # the status, raised once for every aging threshold waited out
+        level = patient[1]
+        while self.aging is not None and level < 2 and self.aging[level] is not None \
+                and now - patient[4] >= self.aging[level]:
+            level += 1
+        return level
+
+    def queue(self, specialization, now = 0.0):
+        # serving order: highest level, then earliest arrival
+        return sorted((p for p in self.waiting if specialization in (None, p[2])),
+                      key=lambda p: (-self.level(p, now), p[3]))
+
+    def get_next(self, specialization, now = 0.0):
+        queue = self.queue(specialization, now)
+        if not queue:
+            return False
+        self.waiting.remove(queue[0])
+        self.waits.setdefault(queue[0][2], []).append(now - queue[0][4])
+        return queue[0][0]
+
+    def remove_patient(self, name, specialization, now = 0.0):
+        # of several namesakes the one served first leaves
+        for patient in self.queue(specialization, now):
+            if patient[0] == name:
+                self.waiting.remove(patient)
+                return True
+        return False
+
+def names(patients):
+    return [patient.name for patient in patients]
+
+MANAGERS = [HospitalManager, SQLiteHospitalManager]
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+def test_serving_order_matches_reference(make):
+    rnd = random.Random(4)
+    manager, reference = make(capacity=None), Reference()
+    for step in range(3000):
+        sp = rnd.randint(1, 5)
+        if rnd.random() < 0.6:
+            status = rnd.randrange(4)
+            assert manager.add_patient(f'p{step}', status, sp, 0.0) == reference.add_patient(f'p{step}', status, sp)
+        else:
+            patient = manager.get_next(sp, 0.0)
+            assert (patient and patient.name) == reference.get_next(sp)
+        if step % 100 == 0:
+            for sp in range(1, 6):
+                assert names(manager.iter_patients(sp, 0.0)) == [p[0] for p in reference.queue(sp)]
+
+@pytest.mark.parametrize('make', [
+    lambda: HospitalManager(capacity=None, compact_ratio=0.1),
+    lambda: HospitalManager(capacity=None, compact_ratio=0.5),
+    lambda: HospitalManager(capacity=None, compact_ratio=2.0),
+    lambda: SQLiteHospitalManager(capacity=None),
+], ids=['compact-often', 'compact-sometimes', 'compact-never', 'sqlite'])
+def test_removal_matches_reference(make):
+    rnd = random.Random(6)
+    manager, reference = make(), Reference()
+    for step in range(3000):
+        sp, name = rnd.randint(1, 3), f'p{rnd.randrange(40)}'
+        op = rnd.random()
+        if op < 0.5:
+            status = rnd.randrange(3)
+            assert manager.add_patient(name, status, sp, 0.0) == reference.add_patient(name, status, sp)
+        elif op < 0.8:
+            assert manager.remove_patient(name, sp, 0.0) == reference.remove_patient(name, sp)
+        else:
+            patient = manager.get_next(sp, 0.0)
+            assert (patient and patient.name) == reference.get_next(sp)
+        if step % 100 == 0:
+            for sp in range(1, 4):
+                assert names(manager.iter_patients(sp, 0.0)) == [p[0] for p in reference.queue(sp)]
+    assert manager.total == len(reference.waiting)
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+def test_zero_capacity_rejects_new_queues(make):
+    manager = make(capacity=0, clock=lambda: 0.0)
+    assert manager.add_patient('ann', 0, 1) is False
+    assert manager.queue_depths() == {}
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+def test_capacity_and_fallbacks(make):
+    manager = make(capacity=1, fallbacks={1: [2]}, clock=lambda: 0.0)
+    assert manager.add_patient('ann', 0, 1) == 1
+    assert manager.add_patient('bob', 0, 1) == 2
+    assert manager.add_patient('cid', 0, 1) is False
+    assert manager.queue_depths() == {1: 1, 2: 1}
+
+def test_specializations_are_configurable_and_sparse():
+    manager = HospitalManager(specializations=1000, capacity=None)
+    assert manager.add_patient('ann', 0, 1000, 0.0) == 1000
+    assert manager.add_patient('bob', 0, 1001, 0.0) is False
+    assert manager.add_patient('cid', 0, 0, 0.0) is False
+    # only specializations with someone waiting hold a queue
+    assert list(manager.patients) == [1000]
+    assert manager.get_next(1000, 0.0).name == 'ann'
+    assert manager.patients == {} and manager.queue_depths() == {}
+
+def test_whole_hospital_listing_follows_specialization_numbers():
+    rnd = random.Random(9)
+    manager, reference = HospitalManager(capacity=None), Reference()
+    for step in range(300):
+        args = f'p{step}', rnd.randrange(3), rnd.randint(1, 20)
+        manager.add_patient(*args, 0.0)
+        reference.add_patient(*args)
+    expected = [p[0] for sp in range(1, 21) for p in reference.queue(sp)]
+    assert names(manager.iter_patients(None, 0.0)) == expected
+    assert names(patient for queue in manager.print_patients() for patient in queue) == expected
+
+def test_snapshot_keeps_wait_times():
+    manager = HospitalManager(capacity=None, wait_window=3)
+    for i in range(5):
+        manager.add_patient(f'p{i}', 0, 1, float(i))
+    for i in range(5):
+        manager.get_next(1, 10.0 + i)
+    restored = HospitalManager(capacity=None, wait_window=3)
+    restored.restore_state(manager.snapshot_state())
+    assert restored.wait_percentiles() == manager.wait_percentiles() == {1: {50: 10.0, 90: 10.0, 99: 10.0}}
+    # snapshots written before wait times were kept are a list of patient rows
+    restored.restore_state([('ann', 1, 2, 0, 5.0, 1)])
+    assert restored.wait_percentiles() == {}
+    assert [p.name for p in restored.iter_patients(2, 5.0)] == ['ann']
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+@pytest.mark.parametrize('aging', [None, (30.0, 60.0), (0.0, None)], ids=['no-aging', 'aging', 'instant-aging'])
+def test_global_triage_matches_reference(make, aging):
+    rnd = random.Random(21)
+    manager, reference = make(capacity=None, aging=aging), Reference(aging)
+    for step in range(2000):
+        now, sp = step * 2.0, rnd.randint(1, 6)
+        op = rnd.random()
+        if op < 0.5:
+            status = rnd.randrange(3)
+            assert manager.add_patient(f'p{step}', status, sp, now) == reference.add_patient(f'p{step}', status, sp, now)
+        elif op < 0.7:
+            patient = manager.get_next(sp, now)
+            assert (patient and patient.name) == reference.get_next(sp, now)
+        elif op < 0.8:
+            patient = manager.peek_next_global(now)
+            assert (patient and patient.name) == (reference.queue(None, now) or [(None,)])[0][0]
+        else:
+            patient = manager.get_next_global(now)
+            assert (patient and patient.name) == reference.get_next(None, now)
+        if step % 100 == 0:
+            for sp in range(1, 7):
+                assert names(manager.iter_patients(sp, now)) == [p[0] for p in reference.queue(sp, now)]
+    assert manager.get_next_global(now) is not False
+    while manager.get_next_global(now):
+        pass
+    assert manager.peek_next_global(now) is None and manager.total == 0
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+def test_wait_percentiles_match_nearest_rank(make):
+    rnd = random.Random(22)
+    manager, reference = make(capacity=None, aging=(50.0, 100.0), wait_window=40), Reference((50.0, 100.0))
+    for step in range(1500):
+        now, sp = float(step), rnd.randint(1, 3)
+        if rnd.random() < 0.55:
+            status = rnd.randrange(3)
+            manager.add_patient(f'p{step}', status, sp, now)
+            reference.add_patient(f'p{step}', status, sp, now)
+        else:
+            patient = manager.get_next(sp, now)
+            assert (patient and patient.name) == reference.get_next(sp, now)
+    expected = {}
+    for sp, waits in sorted(reference.waits.items()):
+        window = sorted(waits[-40:])
+        # nearest rank: the smallest wait with at least p% of the waits at or below it
+        expected[sp] = {p: next(w for w in window if sum(x <= w for x in window) * 100 >= p * len(window))
+                        for p in (50, 90, 99)}
+    assert manager.wait_percentiles() == expected
+    assert manager.wait_percentiles(1, (25, 100)) == {
+        25: sorted(reference.waits[1][-40:])[9], 100: max(reference.waits[1][-40:])}
+    assert manager.wait_percentiles(7) == {}
+
+@pytest.mark.parametrize('make', MANAGERS, ids=['memory', 'sqlite'])
+def test_fallbacks_match_reference(make):
+    rnd = random.Random(23)
+    fallbacks = {1: [2, 3], 2: [3], 4: [1]}
+    manager, reference = make(capacity=4, fallbacks=fallbacks), Reference()
+    for step in range(2000):
+        sp = rnd.randint(1, 4)
+        if rnd.random() < 0.6:
+            # the first of the specialization and its fallbacks with room
+            target = next((target for target in [sp, *fallbacks.get(sp, [])]
+                           if len(reference.queue(target)) < 4), False)
+            assert manager.add_patient(f'p{step}', 0, sp, 0.0) == target
+            if target:
+                reference.add_patient(f'p{step}', 0, target)
+        else:
+            patient = manager.get_next_global(0.0) if sp == 4 else manager.get_next(sp, 0.0)
+            assert (patient and patient.name) == reference.get_next(None if sp == 4 else sp)
+        assert manager.queue_depths() == {
+            sp: len(reference.queue(sp)) for sp in range(1, 5) if reference.queue(sp)}
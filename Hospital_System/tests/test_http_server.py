@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+from backend.hospital_manager import HospitalManager
+from backend.sqlite_hospital_manager import SQLiteHospitalManager
+from frontend.http_server import HospitalServer
+
+async def send(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    reply = await reader.read()
+    writer.close()
+    head, _, body = reply.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+async def request(port, method, target, payload = None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    head = f'{method} {target} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n'
+    return await send(port, head.encode() + body)
+
+def serve(manager, client):
+    # runs client(port) against a server on a free port
+    async def main():
+        server = HospitalServer(manager, port=0)
+        await server.start()
+        try:
+            return await client(server.port)
+        finally:
+            server.server.close()
+            server.executor.shutdown()
+    return asyncio.run(main())
+
+def test_malformed_requests_get_400():
+    async def client(port):
+        assert (await send(port, b'GARBAGE\r\n\r\n'))[0] == 400
+        assert (await send(port, b'POST /patients HTTP/1.1\r\nContent-Length: ten\r\n\r\n'))[0] == 400
+        assert (await send(port, b'POST /patients HTTP/1.1\r\nContent-Length: -1\r\n\r\n'))[0] == 400
+        # the server is still serving
+        assert (await request(port, 'GET', '/patients'))[0] == 200
+    serve(HospitalManager(), client)
+
+def test_oversized_requests_are_answered_before_closing():
+    async def client(port):
+        # only the head is sent: the server answers without reading a body
+        head = f'POST /patients HTTP/1.1\r\nContent-Length: {HospitalServer.MAX_BODY + 1}\r\n\r\n'
+        assert (await send(port, head.encode()))[0] == 413
+        headers = ''.join(f'X-Filler-{i}: {i}\r\n' for i in range(HospitalServer.MAX_HEADERS + 1))
+        assert (await send(port, f'GET /patients HTTP/1.1\r\n{headers}\r\n'.encode()))[0] == 431
+        headers = ''.join(f'X-Filler-{i}: {i}\r\n' for i in range(HospitalServer.MAX_HEADERS - 1))
+        assert (await send(port, f'GET /patients HTTP/1.1\r\nConnection: close\r\n{headers}\r\n'.encode()))[0] == 200
+    serve(HospitalManager(), client)
+
+def run_session(manager):
+    async def client(port):
+        replies = []
+        for i in range(12):
+            replies.append(await request(port, 'POST', '/patients',
+                                         {'name': f'p{i}', 'status': i % 4, 'specialization': i % 3 + 1}))
+        replies.append(await request(port, 'DELETE', '/specializations/2/patients/p1'))
+        replies.append(await request(port, 'POST', '/specializations/1/next'))
+        replies.append(await request(port, 'POST', '/next'))
+        replies.append(await request(port, 'GET', '/specializations'))
+        status, body = await request(port, 'GET', '/patients')
+        for patient in body['patients']:
+            del patient['arrived']
+        replies.append((status, body))
+        return replies
+    return serve(manager, client)
+
+def strip_arrived(replies):
+    return [(status, {key: value for key, value in body.items() if key != 'arrived'})
+            for status, body in replies]
+
+def test_matches_manager_api(tmp_path):
+    reference = strip_arrived(run_session(HospitalManager()))
+    assert [status for status, _ in reference[:12]] == [201, 201, 201, 400] * 3
+    # the SQLite connection is made here and used from the server's worker thread
+    manager = SQLiteHospitalManager(str(tmp_path / 'queues.db'))
+    assert strip_arrived(run_session(manager)) == reference
+
+def test_waiting_doctor_gets_a_later_patient():
+    async def client(port):
+        waiting = asyncio.ensure_future(request(port, 'POST', '/specializations/4/next?wait=5'))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+        await request(port, 'POST', '/patients', {'name': 'late', 'status': 0, 'specialization': 4})
+        status, patient = await asyncio.wait_for(waiting, 5)
+        assert (status, patient['name']) == (200, 'late')
+        assert (await request(port, 'POST', '/specializations/4/next?wait=0.1'))[0] == 404
+    serve(HospitalManager(), client)
+
+class SlowManager(HospitalManager):
+    def queue_depths(self):
+        time.sleep(1)
+        return super().queue_depths()
+
+def test_slow_call_does_not_block_the_loop():
+    async def client(port):
+        slow = asyncio.ensure_future(request(port, 'GET', '/specializations'))
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        # a request that needs no manager call is answered meanwhile
+        assert (await request(port, 'GET', '/nowhere'))[0] == 404
+        assert time.perf_counter() - start < 0.5
+        assert (await slow)[0] == 200
+    serve(SlowManager(), client)
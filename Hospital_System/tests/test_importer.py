@@ -0,0 +1,21 @@
+import pytest
+from backend.hospital_manager import HospitalManager
+from backend.importer import import_patients
+from backend.sqlite_hospital_manager import SQLiteHospitalManager
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('cls', [HospitalManager, SQLiteHospitalManager])
+def test_import_matches_adding_one_by_one(tmp_path, cls):
+    rows = [(f'p{i}', i % 4, i % 3 + 1) for i in range(40)]
+    text = 'name,status,specialization\n' + ''.join(f'{n},{s},{sp}\n' for n, s, sp in rows)
+    manager, reference = cls(capacity=5, clock=lambda: 0.0), HospitalManager(capacity=5, clock=lambda: 0.0)
+    stats = import_patients(manager, write(tmp_path, 'p.csv', text), batch_size=7)
+    rejected = sum(1 for row in rows if not reference.add_patient(*row))
+    assert (stats.rows, stats.skipped) == (40, rejected)
+    import_patients(manager, write(tmp_path, 'p.jsonl', '{"name": "x", "status": 2, "specialization": 4}\n'))
+    reference.add_patient('x', 2, 4)
+    assert [p.name for p in manager.iter_patients()] == [p.name for p in reference.iter_patients()]
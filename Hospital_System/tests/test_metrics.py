@@ -0,0 +1,70 @@
+import random
+import pytest
+from backend.hospital_manager import HospitalManager
+from backend.metrics import manager_gauges
+from common.metrics import Histogram, Metrics, instrument, uninstrument
+
+def lines(metrics, name):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+def test_instrumented_manager_matches_plain_manager():
+    rnd = random.Random(20)
+    plain, manager, metrics = HospitalManager(capacity=3), HospitalManager(capacity=3), Metrics('hospital')
+    instrument(manager, metrics)
+    manager_gauges(metrics, manager)
+    calls = {}
+    for step in range(500):
+        now, sp = float(step), rnd.randint(1, 4)
+        if rnd.random() < 0.6:
+            name, args = 'add_patient', (f'p{step}', rnd.randrange(3), sp, now)
+        else:
+            name, args = 'get_next', (sp, now)
+        calls[name] = calls.get(name, 0) + 1
+        expected = getattr(plain, name)(*args)
+        result = getattr(manager, name)(*args)
+        assert (result.name if hasattr(result, 'name') else result) == \
+               (expected.name if hasattr(expected, 'name') else expected)
+    assert {method: histogram.count for method, histogram in metrics.latency.items()} == calls
+    for method, histogram in metrics.latency.items():
+        # the +Inf bucket ends the cumulative series at the call count
+        assert lines(metrics, f'hospital_call_seconds_bucket{{method="{method}",le="+Inf"}}') == \
+               [f'hospital_call_seconds_bucket{{method="{method}",le="+Inf"}} {calls[method]}']
+    assert lines(metrics, 'hospital_patients_waiting ') == [f'hospital_patients_waiting {plain.total}']
+    assert lines(metrics, 'hospital_queue_length{') == [
+        f'hospital_queue_length{{specialization="{sp}"}} {depth}'
+        for sp, depth in sorted(plain.queue_depths().items())]
+    # exporting the gauges does not count as manager calls
+    assert 'queue_depths' not in metrics.latency
+
+def test_errors_are_counted_and_raised():
+    manager, metrics = HospitalManager(), Metrics('hospital')
+    instrument(manager, metrics, ['get_next'])
+    with pytest.raises(TypeError):
+        manager.get_next()
+    assert metrics.errors == {'get_next': 1} and metrics.latency['get_next'].count == 1
+    assert 'hospital_errors_total{method="get_next"} 1' in metrics.render().splitlines()
+
+def test_uninstrument_restores_plain_methods():
+    manager, metrics = HospitalManager(), Metrics('hospital')
+    attributes = set(vars(manager))
+    instrument(manager, metrics)
+    assert 'add_patient' in vars(manager)
+    uninstrument(manager)
+    assert set(vars(manager)) == attributes
+    manager.add_patient('ann', 0, 1, 0.0)
+    assert metrics.latency == {}
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    for seconds in (Histogram.BUCKETS[0], Histogram.BUCKETS[0] * 1.5, 5.0):
+        histogram.observe(seconds)
+    assert histogram.counts[0] == 1 and histogram.counts[1] == 1 and histogram.counts[-1] == 1
+    assert histogram.count == 3
+
+def test_write_replaces_the_file(tmp_path):
+    metrics = Metrics('hospital')
+    metrics.gauge('answer', 'A constant.', lambda: 42)
+    path = str(tmp_path / 'hospital.prom')
+    metrics.write(path)
+    assert open(path, encoding='utf-8').read().endswith('# TYPE hospital_answer gauge\nhospital_answer 42\n')
+    assert not (tmp_path / 'hospital.prom.tmp').exists()
@@ -0,0 +1,118 @@
+import random
+import threading
+import pytest
+from backend.hospital_manager import HospitalManager
+from backend.sharded_hospital_manager import ShardedHospitalManager
+
+def listing(manager, now):
+    return [(p.name, p.status, p.specialization, p.arrived) for p in manager.iter_patients(None, now)]
+
+@pytest.fixture
+def sharded():
+    manager = ShardedHospitalManager(capacity=None, workers=3)
+    yield manager
+    manager.close()
+
+def test_matches_single_manager(sharded):
+    rnd = random.Random(1)
+    reference = HospitalManager(capacity=None)
+    now = 0.0
+    for step in range(600):
+        now += 1
+        choice = rnd.random()
+        sp = rnd.randint(1, 20)
+        if choice < 0.5:
+            args = (f'p{step}', rnd.randrange(3), sp, now)
+            assert sharded.add_patient(*args) == reference.add_patient(*args)
+        elif choice < 0.7:
+            expected = reference.get_next(sp, now)
+            got = sharded.get_next(sp, now)
+            assert (got and got.name) == (expected and expected.name)
+        elif choice < 0.9:
+            expected = reference.get_next_global(now)
+            got = sharded.get_next_global(now)
+            assert (got and got.name) == (expected and expected.name)
+        else:
+            name = f'p{rnd.randrange(step + 1)}'
+            assert sharded.remove_patient(name, sp, now) == reference.remove_patient(name, sp, now)
+    assert listing(sharded, now) == listing(reference, now)
+    assert sharded.queue_depths() == reference.queue_depths()
+    assert sharded.total == reference.total
+
+def test_execute_matches_one_by_one(sharded):
+    reference = HospitalManager(capacity=None)
+    calls = [('add_patient', (f'p{i}', i % 3, i % 20 + 1, 5.0)) for i in range(200)]
+    calls += [('get_next', (i % 20 + 1, 6.0)) for i in range(50)]
+    calls += [('remove_patient', (f'p{i}', i % 20 + 1, 7.0)) for i in range(0, 200, 7)]
+    results = sharded.execute(calls)
+    expected = [getattr(reference, method)(*args) for method, args in calls]
+    assert [getattr(r, 'name', r) for r in results] == [getattr(r, 'name', r) for r in expected]
+    assert listing(sharded, 8.0) == listing(reference, 8.0)
+
+def test_threads_get_their_own_replies(sharded):
+    # the metrics exporter scrapes from its own thread while commands run
+    errors = []
+    done = threading.Event()
+
+    def scrape():
+        while not done.is_set():
+            try:
+                assert isinstance(sharded.total, int)
+                assert isinstance(sharded.queue_depths(), dict)
+                assert isinstance(sharded.wait_percentiles(), dict)
+            except Exception as error:
+                errors.append(error)
+
+    def serve():
+        for i in range(1000):
+            specialization = i % 20 + 1
+            if sharded.add_patient(f'p{i}', i % 3, specialization) != specialization:
+                errors.append(f'p{i} not added to {specialization}')
+        served.extend(sharded.get_next(i % 20 + 1) for i in range(500))
+
+    served = []
+    scrapers = [threading.Thread(target=scrape, daemon=True) for _ in range(2)]
+    for thread in scrapers:
+        thread.start()
+    # a reply read by the wrong thread leaves a pipe out of step and hangs
+    commands = threading.Thread(target=serve, daemon=True)
+    commands.start()
+    commands.join(30)
+    done.set()
+    hung = commands.is_alive()
+    for thread in scrapers:
+        thread.join(5)
+    if hung:
+        # unblock the stuck threads so the fixture can close the manager
+        for process in sharded.processes:
+            process.kill()
+    assert not hung, 'router hung, replies went to the wrong thread'
+    assert not errors
+    assert all(served)
+    assert len({patient.name for patient in served}) == 500
+    assert sharded.total == 500
+
+def test_reopened_shards_match_single_manager(tmp_path):
+    rnd = random.Random(2)
+    reference = HospitalManager(capacity=None)
+    for run in range(3):
+        sharded = ShardedHospitalManager(capacity=None, workers=3, data_dir=str(tmp_path), snapshot_every=50)
+        assert listing(sharded, run * 1000.0) == listing(reference, run * 1000.0)
+        for step in range(300):
+            # several patients arrive at the same time, across shards
+            now, sp = run * 1000.0 + step // 4, rnd.randint(1, 9)
+            if rnd.random() < 0.6:
+                args = (f'p{run}-{step}', rnd.randrange(3), sp, now)
+                assert sharded.add_patient(*args) == reference.add_patient(*args)
+            else:
+                expected = reference.get_next_global(now)
+                got = sharded.get_next_global(now)
+                assert (got and got.name) == (expected and expected.name)
+        if run == 1:
+            # the workers die without their closing snapshot, the next
+            # run replays their journals
+            for process in sharded.processes:
+                process.kill()
+        sharded.close()
+    with pytest.raises(ValueError):
+        ShardedHospitalManager(capacity=None, workers=2, data_dir=str(tmp_path))
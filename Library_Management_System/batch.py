@@ -0,0 +1,98 @@
+"""
+Library commands for the shared batch runner (common.batch).
+"""
+from common import batch
+
+class BatchRunner(batch.BatchRunner):
+    """
+    Runs a script of library commands (see common.batch.BatchRunner):
+        book ID NAME QUANTITY
+        user NAME ID
+        borrow USER BOOK
+        return USER BOOK
+        books
+        users
+        search PREFIX [LIMIT]
+        find TEXT [TYPOS] [LIMIT]   (any part of the name, ranked, default limit 10)
+        borrowers BOOK
+        reserve USER BOOK           (join the hold queue of a book with no copy left)
+        cancel USER BOOK            (leave the hold queue)
+        holds BOOK                  (users waiting, first in line first)
+        overdue [LIMIT]             (loans past their due date, most overdue first)
+    """
+    def __init__(self, manager, out = None, flush_every = 10000):
+        """
+        @Args:
+            manager (Manager): Manager or any manager with the same API.
+            out: Text stream for the output, sys.stdout by default.
+            flush_every (int): Output lines buffered before each write.
+        """
+        super().__init__(manager, out, flush_every)
+        self.commands = {'book': self.book, 'user': self.user,
+                         'borrow': self.borrow, 'return': self.return_,
+                         'books': self.books, 'users': self.users,
+                         'search': self.search, 'find': self.find, 'borrowers': self.borrowers,
+                         'reserve': self.reserve, 'cancel': self.cancel, 'holds': self.holds,
+                         'overdue': self.overdue}
+
+    # each command returns (succeeded, output text or None)
+
+    def book(self, id, name, quantity):
+        if self.manager.add_book(int(id), name, int(quantity)):
+            return True, None
+        return False, f'a book named {name} or with id {id} already exists'
+
+    def user(self, name, id):
+        if self.manager.add_user(name, int(id)):
+            return True, None
+        return False, f'a user named {name} or with id {id} already exists'
+
+    def borrow(self, user_name, book_name):
+        if self.manager.borrow_book(user_name, book_name):
+            return True, None
+        return False, f"{user_name} can't borrow {book_name}"
+
+    def return_(self, user_name, book_name):
+        if self.manager.return_book(user_name, book_name):
+            return True, None
+        return False, f"{user_name} didn't borrow {book_name}"
+
+    def books(self):
+        return True, '\n'.join(map(str, self.manager.iter_books())) or None
+
+    def users(self):
+        return True, '\n'.join(user.simple_str().rstrip('\n') for user in self.manager.iter_users()) or None
+
+    def search(self, pref, limit = None):
+        books = self.manager.iter_books_by_prefix(pref, None if limit is None else int(limit))
+        return True, '\n'.join(map(str, books)) or None
+
+    def find(self, text, typos = 0, limit = 10):
+        books = self.manager.search_books(text, int(limit), int(typos))
+        return True, '\n'.join(map(str, books or ())) or None
+
+    def borrowers(self, book_name):
+        users = self.manager.users_borrowed(book_name)
+        if users is False:
+            return False, f'no book named {book_name}'
+        return True, '\n'.join(map(repr, users)) or None
+
+    def reserve(self, user_name, book_name):
+        if self.manager.reserve_book(user_name, book_name):
+            return True, None
+        return False, f"{user_name} can't reserve {book_name}"
+
+    def cancel(self, user_name, book_name):
+        if self.manager.cancel_reservation(user_name, book_name):
+            return True, None
+        return False, f"{user_name} didn't reserve {book_name}"
+
+    def holds(self, book_name):
+        users = self.manager.hold_queue(book_name)
+        if users is False:
+            return False, f'no book named {book_name}'
+        return True, '\n'.join(map(repr, users)) or None
+
+    def overdue(self, limit = None):
+        loans = self.manager.print_overdue(limit=None if limit is None else int(limit))
+        return True, '\n'.join(map(str, loans or ())) or None
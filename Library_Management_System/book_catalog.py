@@ -0,0 +1,405 @@
+"""
+Memory-mapped, fixed-width record file for the library book catalog.
+"""
+import bisect
+import heapq
+import mmap
+import os
+import struct
+
+class MappedBook:
+    """
+    A book whose name and quantity live in a BookCatalog record.
+    Has the same interface as Book; borrow() and return_copy() update
+    the borrow counter the catalog keeps in memory for the record.
+    Two MappedBook objects for the same id are equal.
+    """
+    __slots__ = ('catalog', 'id', 'slot')
+
+    def __init__(self, catalog, id, slot):
+        self.catalog = catalog
+        self.id = id
+        self.slot = slot
+
+    @property
+    def name(self):
+        return self.catalog.read_name(self.slot)
+
+    @property
+    def total_quantity(self):
+        return self.catalog.read_quantity(self.slot)
+
+    @property
+    def total_borrowed(self):
+        return self.catalog.borrowed.get(self.slot, 0)
+
+    @total_borrowed.setter
+    def total_borrowed(self, value):
+        if value:
+            self.catalog.borrowed[self.slot] = value
+        else:
+            self.catalog.borrowed.pop(self.slot, None)
+
+    def borrow(self):
+        """
+        Borrow one copy of the book if available.
+
+        @Returns:
+            bool: True if borrowing succeeded, False otherwise.
+        """
+        borrowed = self.total_borrowed
+        if self.total_quantity - borrowed == 0:
+            return False
+        self.total_borrowed = borrowed + 1
+        return True
+
+    def return_copy(self):
+        """
+        Return one borrowed copy.
+        """
+        borrowed = self.total_borrowed
+        assert borrowed > 0
+        self.total_borrowed = borrowed - 1
+
+    def __eq__(self, other):
+        return isinstance(other, MappedBook) and other.catalog is self.catalog and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'name: {self.name}, id: {self.id}, quantity: {self.total_quantity}, borrow: {self.total_borrowed}'
+
+    def __str__(self):
+        return f'Book name: {self.name}\t\t-id: {self.id} - total quantity: {self.total_quantity} - total borrowed: {self.total_borrowed}'
+
+class SortedIndex:
+    """
+    Sorted (key, slot) entries of a BookCatalog: a run in a memory-mapped
+    file plus the entries added since it was written, kept in memory.
+
+    Keys are fixed-width bytes compared as bytes (book ids are stored big
+    endian with the sign bit flipped, names utf-8 and zero padded, which
+    sort like the ids and names themselves), so a key is found by a
+    binary search over the mapped run without reading the rest of it.
+    write() merges the new entries into a new run in one sequential pass.
+
+    Run file layout:
+        header: magic, key size, number of catalog records covered, entries
+        entry: key, slot
+    """
+    MAGIC = b'LIBIDX01'
+    HEADER = struct.Struct('<8sIxxxxQQ')
+    SLOT = struct.Struct('<Q')
+
+    def __init__(self, path, key_size, records):
+        """
+        @Args:
+            path (str): Run file path.
+            key_size (int): Bytes of a key.
+            records (int): Records in the catalog; a run covering more
+                was written for another version of it and is ignored.
+        """
+        self.path = path
+        self.key_size = key_size
+        self.entry_size = key_size + self.SLOT.size
+        self.map = None
+        # catalog records the run indexes, and its number of entries
+        self.covered = self.count = 0
+        if os.path.exists(path) and os.path.getsize(path) >= self.HEADER.size:
+            with open(path, 'rb') as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, key_size, self.covered, self.count = self.HEADER.unpack_from(self.map, 0)
+            if magic != self.MAGIC or key_size != self.key_size:
+                raise ValueError(f'{path} is not an index of this catalog')
+            if self.covered > records:
+                self.map.close()
+                self.map = None
+                self.covered = self.count = 0
+        # key -> slot added since the run was written, and the same keys
+        # sorted, rebuilt when a range is read after an add
+        self.added = {}
+        self.added_keys = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        # key of a run entry, what bisect compares
+        offset = self.HEADER.size + idx * self.entry_size
+        return self.map[offset:offset + self.key_size]
+
+    def _slot(self, idx):
+        return self.SLOT.unpack_from(self.map, self.HEADER.size + idx * self.entry_size + self.key_size)[0]
+
+    def add(self, key, slot):
+        self.added[key] = slot
+        self.added_keys = None
+
+    def find(self, key):
+        """
+        Slot of a key, or None.
+        """
+        slot = self.added.get(key)
+        if slot is None and self.count:
+            idx = bisect.bisect_left(self, key)
+            if idx < self.count and self[idx] == key:
+                slot = self._slot(idx)
+        return slot
+
+    def iter_range(self, start, end = None):
+        """
+        Slots of the keys k with start <= k < end (no upper bound for
+        None), in key order.
+        """
+        lo = bisect.bisect_left(self, start)
+        hi = self.count if end is None else bisect.bisect_left(self, end, lo)
+        if self.added_keys is None:
+            self.added_keys = sorted(self.added)
+        keys = self.added_keys
+        first = bisect.bisect_left(keys, start)
+        last = len(keys) if end is None else bisect.bisect_left(keys, end, first)
+        added = ((keys[idx], self.added[keys[idx]]) for idx in range(first, last))
+        run = ((self[idx], self._slot(idx)) for idx in range(lo, hi))
+        for _, slot in heapq.merge(run, added):
+            yield slot
+
+    def write(self, covered):
+        """
+        Write the run with the added entries merged in, replacing the
+        file atomically; covered is the number of catalog records indexed.
+        """
+        if not self.added and self.map is not None and covered == self.covered:
+            return
+        tmp = self.path + '.tmp'
+        count = self.count + len(self.added)
+        with open(tmp, 'wb') as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.key_size, covered, count))
+            pack = self.SLOT.pack
+            run = ((self[idx], self._slot(idx)) for idx in range(self.count))
+            for key, slot in heapq.merge(run, sorted(self.added.items())):
+                file.write(key + pack(slot))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.path)
+        # other threads may still read the old map, it is closed once unused
+        with open(self.path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.covered, self.count = covered, count
+        self.added = {}
+        self.added_keys = None
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+class BookCatalog:
+    """
+    Book catalog stored as fixed-width records in a memory-mapped file.
+
+    File layout:
+        header: magic, name size, number of books
+        record: book id, total quantity, name length, name (utf-8, padded)
+
+    Records are dense, one slot per book in the order the books were
+    added, so the file size and a scan of all books depend only on the
+    number of books, not on how large the ids are. Books are found by id
+    and by name through two SortedIndex runs next to the catalog (the
+    `.ids` and `.names` files), searched in place, so opening the catalog
+    and looking a book up take the same time whatever its size. Books
+    added since the runs were written are indexed in memory and merged
+    into the runs by flush() and close(); after a crash the records the
+    runs do not cover are indexed again when the catalog is opened.
+
+    Only the books are stored. Users and loans stay in memory, so the
+    borrow counters are kept in memory as well and start at zero every
+    time the catalog is opened.
+    """
+    MAGIC = b'LIBCAT02'
+    HEADER = struct.Struct('<8sIxxxxQ')
+    ID = struct.Struct('<q')
+    QUANTITY = struct.Struct('<8xq')
+    ID_KEY = struct.Struct('>Q')
+
+    def __init__(self, path, name_size = 64):
+        """
+        Open a catalog file, creating it if it does not exist.
+
+        @Args:
+            path (str): Catalog file path.
+            name_size (int): Maximum utf-8 bytes of a book name (new files only).
+        """
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, 'r+b' if exists else 'w+b')
+        self.count = 0
+        if exists:
+            magic, name_size, self.count = self.HEADER.unpack(self.file.read(self.HEADER.size))
+            if magic != self.MAGIC:
+                raise ValueError(f'{path} is not a book catalog')
+        self.name_size = name_size
+        # book id, total quantity, name length, name bytes
+        self.record = struct.Struct(f'<qqH{name_size}s')
+        self.record_size = self.record.size
+        if not exists:
+            self.file.truncate(self.HEADER.size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        if not exists:
+            self._write_header(0)
+        self.ids = SortedIndex(path + '.ids', self.ID_KEY.size, self.count)
+        self.names = SortedIndex(path + '.names', name_size, self.count)
+        # records added after the runs were written, e.g. before a crash
+        for slot in range(min(self.ids.covered, self.names.covered), self.count):
+            id, _, length, name = self.record.unpack_from(self.map, self.offset(slot))
+            if slot >= self.ids.covered:
+                self.ids.add(self.id_key(id), slot)
+            if slot >= self.names.covered:
+                self.names.add(name[:length].ljust(name_size, b'\0'), slot)
+        # borrowed copies per slot, only for books with copies out, not persisted
+        self.borrowed = {}
+
+    def _write_header(self, count):
+        self.HEADER.pack_into(self.map, 0, self.MAGIC, self.name_size, count)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        """
+        Number of records the file has room for.
+        """
+        return (len(self.map) - self.HEADER.size) // self.record_size
+
+    def offset(self, slot):
+        """
+        Byte offset of the record in a slot.
+        """
+        return self.HEADER.size + slot * self.record_size
+
+    def id_key(self, id):
+        # the sign bit flipped, so keys sort like the signed ids
+        return self.ID_KEY.pack(id + (1 << 63))
+
+    def name_key(self, name):
+        """
+        Index key of a name, or None if no record can hold it.
+        """
+        encoded = name.encode('utf-8')
+        if len(encoded) > self.name_size or b'\0' in encoded:
+            return None
+        return encoded.ljust(self.name_size, b'\0')
+
+    def __contains__(self, id):
+        return self.ids.find(self.id_key(id)) is not None
+
+    def __getitem__(self, slot):
+        """
+        The book in a slot, for reading the books in the order they were added.
+        """
+        if not 0 <= slot < self.count:
+            raise IndexError(slot)
+        return MappedBook(self, self.ID.unpack_from(self.map, self.offset(slot))[0], slot)
+
+    def get(self, id):
+        """
+        Find a book by id through the id index.
+
+        @Returns:
+            MappedBook | None
+        """
+        slot = self.ids.find(self.id_key(id))
+        return None if slot is None else MappedBook(self, id, slot)
+
+    def find(self, name):
+        """
+        Find a book by name through the name index.
+
+        @Returns:
+            MappedBook | None
+        """
+        key = self.name_key(name)
+        slot = None if key is None else self.names.find(key)
+        return None if slot is None else self[slot]
+
+    def iter_prefix(self, pref, limit = None):
+        """
+        Lazily yield the books whose name starts with pref, sorted by
+        name. Names are compared as utf-8 bytes, which sort like the
+        strings, so the matches are one range of the name index.
+
+        @Args:
+            pref (str): Name prefix.
+            limit (int | None): Maximum number of books to yield.
+        """
+        encoded = pref.encode('utf-8')
+        if len(encoded) > self.name_size or limit == 0:
+            return
+        # utf-8 has no 0xff byte, so the range ends before the next prefix
+        end = encoded[:-1] + bytes([encoded[-1] + 1]) if encoded else None
+        for count, slot in enumerate(self.names.iter_range(encoded, end), 1):
+            yield self[slot]
+            if count == limit:
+                return
+
+    def add(self, id, name, quantity):
+        """
+        Write a new book record in the next free slot.
+
+        @Returns:
+            MappedBook | False: The new book, or False if the id is used.
+        """
+        key = self.name_key(name)
+        if key is None:
+            raise ValueError(f'book name longer than {self.name_size} bytes or holding a NUL character')
+        if id in self:
+            return False
+        slot = self.count
+        if slot >= self.capacity:
+            # grow geometrically so adding books stays amortized O(1)
+            self._resize(max(16, slot * 2))
+        encoded = key.rstrip(b'\0')
+        self.record.pack_into(self.map, self.offset(slot), id, quantity, len(encoded), encoded)
+        # the header counts the record only once it is fully written
+        self._write_header(slot + 1)
+        self.count = slot + 1
+        self.ids.add(self.id_key(id), slot)
+        self.names.add(key, slot)
+        return MappedBook(self, id, slot)
+
+    def _resize(self, slots):
+        # extend the file and remap; other threads may still read the
+        # old map, so it is left to be closed once unused
+        self.map.flush()
+        self.file.truncate(self.HEADER.size + slots * self.record_size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def read_name(self, slot):
+        _, _, length, name = self.record.unpack_from(self.map, self.offset(slot))
+        return name[:length].decode('utf-8')
+
+    def read_quantity(self, slot):
+        return self.QUANTITY.unpack_from(self.map, self.offset(slot))[0]
+
+    def __iter__(self):
+        """
+        Yield all books in the order they were added.
+        """
+        for slot in range(self.count):
+            yield self[slot]
+
+    def flush(self):
+        """
+        Write changed pages back to the file and merge the books added
+        since the last flush into the index runs.
+        """
+        self.map.flush()
+        self.ids.write(self.count)
+        self.names.write(self.count)
+
+    def close(self):
+        self.flush()
+        self.map.close()
+        self.file.close()
+        self.ids.close()
+        self.names.close()
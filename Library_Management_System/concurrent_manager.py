@@ -0,0 +1,217 @@
+"""
+Thread-safe library Manager with striped per-book locks.
+"""
+import threading
+import time
+from libraray_management_system import Manager
+from loans import DueIndex
+
+class LockedJournal:
+    """
+    Wraps a PersistentStore so record() can be called from several threads.
+    The store no longer snapshots inside record(): the manager calls
+    snapshot() once it is due, holding every lock, so no operation is
+    applied and not yet journaled when the state is written.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        store.auto_snapshot = False
+
+    def record(self, op, *args):
+        with self.lock:
+            self.store.record(op, *args)
+
+    @property
+    def snapshot_due(self):
+        return self.store.snapshot_due
+
+    def snapshot(self):
+        with self.lock:
+            self.store.snapshot()
+
+class LockedDueIndex(DueIndex):
+    """
+    DueIndex shared by the book stripes: loans of any title are added
+    and removed under one lock.
+    """
+    def __init__(self, compact_ratio = 0.5):
+        super().__init__(compact_ratio)
+        self.lock = threading.Lock()
+
+    def add(self, loan):
+        with self.lock:
+            super().add(loan)
+
+    def discard(self, loan):
+        with self.lock:
+            super().discard(loan)
+
+    def due_before(self, before, limit = None):
+        with self.lock:
+            return super().due_before(before, limit)
+
+class ConcurrentManager(Manager):
+    """
+    Manager that can be shared by a pool of threads.
+
+    Borrowing and returning lock only the book involved, taken from a
+    fixed set of striped locks (book id -> stripe), so operations on
+    different titles run in parallel while operations on the same title
+    are serialized and can never hand out more copies than exist.
+    Reserving and the hold queues are guarded by the same book lock;
+    the due date index, shared by all titles, has a lock of its own.
+    Adding books and users takes one catalog lock.
+    Snapshots of an attached PersistentStore are taken after an operation
+    releases its lock, holding the catalog lock and every book lock.
+    Listing methods return a consistent view only while no other thread
+    is changing the library.
+    """
+    def __init__(self, catalog = None, stripes = 64, loan_days = 14, clock = time.time):
+        """
+        @Args:
+            catalog (BookCatalog | None): Optional memory-mapped book catalog.
+            stripes (int): Number of book locks; more stripes, fewer collisions.
+            loan_days (int): Days until a loan is due.
+            clock: Returns the current time when no `now` is given.
+        """
+        super().__init__(catalog, loan_days, clock)
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        # re-entrant: add_users calls add_user
+        self.catalog_lock = threading.RLock()
+
+    def _reset(self):
+        super()._reset()
+        self.due_index = LockedDueIndex()
+
+    @property
+    def journal(self):
+        return self._journal
+
+    @journal.setter
+    def journal(self, store):
+        # PersistentStore attaches itself here; serialize its writes
+        if store is not None and not isinstance(store, LockedJournal):
+            store = LockedJournal(store)
+        self._journal = store
+
+    def book_lock(self, book):
+        """
+        The stripe lock guarding a book.
+        """
+        return self.locks[hash(book.id) % len(self.locks)]
+
+    def snapshot_if_due(self):
+        """
+        Snapshot the attached store if it is due, while no other thread is
+        inside an operation.
+        """
+        journal = self.journal
+        if journal is None or not journal.snapshot_due:
+            return
+        with self.catalog_lock:
+            for lock in self.locks:
+                lock.acquire()
+            try:
+                # another thread may have taken the snapshot meanwhile
+                if journal.snapshot_due:
+                    journal.snapshot()
+            finally:
+                for lock in self.locks:
+                    lock.release()
+
+    def add_book(self, id, name, quantity):
+        with self.catalog_lock:
+            added = super().add_book(id, name, quantity)
+        self.snapshot_if_due()
+        return added
+
+    def add_books(self, rows, reindex = True):
+        with self.catalog_lock:
+            skipped = super().add_books(rows, reindex)
+        self.snapshot_if_due()
+        return skipped
+
+    def reindex(self):
+        with self.catalog_lock:
+            super().reindex()
+        self.snapshot_if_due()
+
+    def add_user(self, name, id):
+        with self.catalog_lock:
+            added = super().add_user(name, id)
+        self.snapshot_if_due()
+        return added
+
+    def add_users(self, rows):
+        with self.catalog_lock:
+            skipped = super().add_users(rows)
+        self.snapshot_if_due()
+        return skipped
+
+    def search_books(self, query, limit = 10, max_distance = 0):
+        # the search index is built and extended under the catalog lock
+        with self.catalog_lock:
+            return super().search_books(query, limit, max_distance)
+
+    def borrow_book(self, user_name, book_name, now = None):
+        """
+        Borrow a book for a user if possible, holding only the book's lock.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                done = super().borrow_book(user_name, book_name, now)
+            self.snapshot_if_due()
+            return done
+        return False
+
+    def return_book(self, user_name, book_name, now = None):
+        """
+        Return a borrowed book, holding only the book's lock.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                done = super().return_book(user_name, book_name, now)
+            self.snapshot_if_due()
+            return done
+        return False
+
+    def reserve_book(self, user_name, book_name):
+        """
+        Join the hold queue of a book, holding only the book's lock.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                done = super().reserve_book(user_name, book_name)
+            self.snapshot_if_due()
+            return done
+        return False
+
+    def cancel_reservation(self, user_name, book_name):
+        """
+        Leave the hold queue of a book, holding only the book's lock.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                done = super().cancel_reservation(user_name, book_name)
+            self.snapshot_if_due()
+            return done
+        return False
+
+    def hold_queue(self, book_name):
+        """
+        Get the users waiting for a book.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                return super().hold_queue(book_name)
+        return False
+
+    def users_borrowed(self, book_name):
+        """
+        Get all users who borrowed a specific book.
+        """
+        if book := self.check_book(book_name):
+            with self.book_lock(book):
+                return super().users_borrowed(book_name)
+        return False
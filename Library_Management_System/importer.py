@@ -0,0 +1,41 @@
+"""
+Streaming bulk import of books and users from CSV or JSONL files.
+Works with any manager that provides add_books, add_users and reindex.
+"""
+from common.importer import import_rows, read_records
+
+def parse_books(records):
+    """
+    Converts raw records to (id, name, quantity) tuples.
+    """
+    for record in records:
+        yield int(record['id']), record['name'], int(record['quantity'])
+
+def parse_users(records):
+    """
+    Converts raw records to (name, id) tuples.
+    """
+    for record in records:
+        yield record['name'], int(record['id'])
+
+def import_books(manager, path, batch_size = 10000):
+    """
+    Loads books (id, name, quantity) from a CSV or JSONL file.
+    Batches skip the prefix index, which is rebuilt once at the end.
+    Books with an already used name or id are skipped.
+
+    @Returns:
+        ImportStats
+    """
+    return import_rows(lambda batch: manager.add_books(batch, reindex=False),
+                       parse_books(read_records(path)), batch_size, manager.reindex)
+
+def import_users(manager, path, batch_size = 10000):
+    """
+    Loads users (name, id) from a CSV or JSONL file.
+    Users with an already used name or id are skipped.
+
+    @Returns:
+        ImportStats
+    """
+    return import_rows(manager.add_users, parse_users(read_records(path)), batch_size)
@@ -1,4 +1,23 @@
 import math
+import argparse
+import bisect
+import os
+import sys
+import time
+from collections import Counter, OrderedDict, deque
+# the repository root, for the shared `common` package (see common/storage.py)
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:
+    sys.path.append(_root)
+from batch import BatchRunner
+from common.metrics import Metrics, instrument
+from common.storage import PersistentStore
+from importer import import_books, import_users
+from metrics import manager_gauges
+from book_catalog import BookCatalog
+from loans import DAY, DueIndex, Loan, format_time
+from trigram_index import TrigramIndex
+
 def get_from_user(msg, start = 1, end = math.inf):
     """
     Safely read an integer input from the user within a given range.
@@ -24,6 +43,19 @@ def get_from_user(msg, start = 1, end = math.inf):
                 continue
         return choice
 
+def iter_page(items, offset = 0, limit = None):
+    """
+    Lazily yield one page of a list without copying it.
+
+    @Args:
+        items (list): Source list.
+        offset (int): Number of items to skip.
+        limit (int | None): Maximum number of items to yield.
+    """
+    end = len(items) if limit is None else min(len(items), offset + limit)
+    for idx in range(offset, end):
+        yield items[idx]
+
 class Book:
     """
     Represents a book in the library.
@@ -64,35 +96,47 @@ class Book:
 class User:
     """
     Represents a library user and the books they borrowed.
+    Borrowed books are a multiset: book -> number of copies held,
+    and loans keeps the Loan of each copy: book -> Loans, oldest first.
     """
     def __init__(self, name, id):
         self.id = id
         self.name = name
-        self.borrowed_books = []
+        self.borrowed_books = Counter()
+        self.loans = {}
 
-    def borrow(self, book):
+    def borrow(self, book, loan = None):
         """
-        Register a borrowed book for the user.
+        Register a borrowed book for the user, with its Loan if known.
         """
-        self.borrowed_books.append(book) 
+        self.borrowed_books[book] += 1
+        if loan is not None:
+            self.loans.setdefault(book, deque()).append(loan)
     
     def is_borrowed(self, book):
         """
         Check whether the user has already borrowed a specific book.
         """
-        for b in self.borrowed_books:
-            if book == b:
-                return True
-        return False
+        return self.borrowed_books[book] > 0
 
     def return_copy(self, book):
         """
-        Remove a borrowed book from the user's list.
+        Remove one borrowed copy of a book from the user's books.
+
+        @Returns:
+            Loan | None: The oldest loan of the book, now closed.
         """
-        for idx, b in enumerate(self.borrowed_books):
-            if book == b:
-                del self.borrowed_books[idx]
-                break
+        if self.borrowed_books[book] > 1:
+            self.borrowed_books[book] -= 1
+        else:
+            self.borrowed_books.pop(book, None)
+        loans = self.loans.get(book)
+        if not loans:
+            return None
+        loan = loans.popleft()
+        if not loans:
+            del self.loans[book]
+        return loan
 
     def simple_str(self):
         """
@@ -100,8 +144,11 @@ class User:
         """
         ret = f'User name: {self.name}\t\t-id: {self.id}'
         ret += f'\n\tBorrowed books:\n'
-        for book in self.borrowed_books:
-            ret += f'\t{book}\n'
+        for book, copies in self.borrowed_books.items():
+            loans = self.loans.get(book, ())
+            for idx in range(copies):
+                due = f' - due: {format_time(loans[idx].due)}' if idx < len(loans) else ''
+                ret += f'\t{book}{due}\n'
         return ret
     
     def __repr__(self):
@@ -110,20 +157,197 @@ class User:
     def __str__(self):
         return self.simple_str()
 
+class PrefixIndex:
+    """
+    Sorted index of names used for prefix search.
+    Names are kept sorted, so all names sharing a prefix sit in one
+    contiguous range found by two binary searches.
+    """
+    def __init__(self):
+        self.names = []
+        self.items = []
+
+    def add(self, name, item):
+        """
+        Insert a name and its item while keeping the index sorted.
+        Equal names keep their insertion order.
+        """
+        idx = bisect.bisect_right(self.names, name)
+        self.names.insert(idx, name)
+        self.items.insert(idx, item)
+
+    def build(self, pairs):
+        """
+        Replace the index content with (name, item) pairs in one sort.
+        Much faster than adding a large batch one by one.
+        """
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        self.names = [name for name, _ in pairs]
+        self.items = [item for _, item in pairs]
+
+    def prefix_range(self, pref):
+        """
+        Find the [start, end) range of names starting with pref.
+
+        @Args:
+            pref (str): Name prefix.
+
+        @Returns:
+            tuple: (start, end) indexes into the sorted names.
+        """
+        start = bisect.bisect_left(self.names, pref)
+        # empty prefix matches everything
+        if not pref:
+            return start, len(self.names)
+        last = ord(pref[-1])
+        # no character sorts after the max code point, walk the range instead
+        if last == 0x10FFFF:
+            end = start
+            while end < len(self.names) and self.names[end].startswith(pref):
+                end += 1
+            return start, end
+        # smallest string greater than every name that has this prefix
+        upper = pref[:-1] + chr(last + 1)
+        return start, bisect.bisect_left(self.names, upper, start)
+
+    def iter_prefix(self, pref, limit = None):
+        """
+        Lazily yield items whose name starts with pref, in name order.
+
+        @Args:
+            pref (str): Name prefix.
+            limit (int | None): Maximum number of items to yield.
+        """
+        start, end = self.prefix_range(pref)
+        if limit is not None:
+            end = min(end, start + limit)
+        for idx in range(start, end):
+            yield self.items[idx]
+
+    def __len__(self):
+        return len(self.names)
+
 class Manager:
     """
     Core system logic.
     Manages books, users, borrowing, and returning.
+
+    Every loan is due loan_days after it is made. Open loans are kept in
+    a DueIndex sorted by due date for the overdue report. A user can
+    reserve a title with no copy left: each title has a FIFO queue of
+    holds and a returned copy goes straight to the first user in it.
+    Borrow and return times (`now`, the clock by default) are journaled,
+    so a replay gives the same due dates.
     """
-    def __init__(self):
-        self.books = []
+    def __init__(self, catalog = None, loan_days = 14, clock = time.time):
+        self.loan_days = loan_days
+        self.clock = clock
+        # optional PersistentStore recording every change
+        self.journal = None
+        # optional BookCatalog keeping the books in a memory-mapped file;
+        # it indexes them by id and by name on disk, so the in-memory book
+        # indexes stay empty and books holds the catalog itself
+        self.catalog = catalog
+        self._reset()
+
+    def _reset(self):
+        # Empty the in-memory books, users and loans, keeping the
+        # configuration, the catalog and the journal
+        self.books = [] if self.catalog is None else self.catalog
         self.users = []
+        # sorted book names for prefix search
+        self.books_index = PrefixIndex()
+        # trigram index for substring and fuzzy search,
+        # built on the first search and kept up to date afterwards
+        self.books_search = None
+        # hash indexes for O(1) lookups
+        self.books_by_name = {}
+        self.books_by_id = {}
+        self.users_by_name = {}
+        self.users_by_id = {}
+        # reverse loan index: book id -> {user id: user} of current borrowers
+        self.borrowers = {}
+        # open loans by due date
+        self.due_index = DueIndex()
+        # hold queues: book id -> {user id: user} in reservation order,
+        # only for titles with no copy left
+        self.holds = {}
+        if self.catalog is not None:
+            # the catalog's borrowed counts come back with the loans
+            self.catalog.borrowed.clear()
+
+    def _book_used(self, id, name):
+        # Whether a book already has this id or name
+        if self.catalog is not None:
+            return id in self.catalog or self.catalog.find(name) is not None
+        return name in self.books_by_name or id in self.books_by_id
+
+    def _store_book(self, id, name, quantity):
+        # Write a record to the catalog when there is one, else index a Book object
+        if self.catalog is not None:
+            return self.catalog.add(id, name, quantity)
+        book = Book(id, name, quantity)
+        self.books.append(book)
+        self.books_by_name[name] = book
+        self.books_by_id[id] = book
+        return book
 
     def add_book(self, id, name, quantity):
         """
         Add a new book to the library.
+
+        @Returns:
+            bool: True if added, False if the name or id is already used.
         """
-        self.books.append(Book(id, name, quantity))
+        if self._book_used(id, name):
+            return False
+        book = self._store_book(id, name, quantity)
+        if self.catalog is None:
+            self.books_index.add(name, book)
+        if self.books_search is not None:
+            self.books_search.add(name, book)
+        if self.journal is not None:
+            self.journal.record('add_book', id, name, quantity)
+        return True
+
+    def add_books(self, rows, reindex = True):
+        """
+        Add many (id, name, quantity) rows at once.
+        With reindex=False the prefix index is left stale,
+        so reindex() must be called after the last batch.
+
+        @Returns:
+            int: Number of rows skipped because the name or id is used.
+        """
+        if self.journal is not None:
+            rows = list(rows)
+        skipped = 0
+        for id, name, quantity in rows:
+            if self._book_used(id, name):
+                skipped += 1
+                continue
+            book = self._store_book(id, name, quantity)
+            if reindex:
+                if self.catalog is None:
+                    self.books_index.add(name, book)
+                if self.books_search is not None:
+                    self.books_search.add(name, book)
+        # journaled once applied, see PersistentStore
+        if self.journal is not None:
+            self.journal.record('add_books', rows, reindex)
+        return skipped
+
+    def reindex(self):
+        """
+        Rebuild the book prefix index from all books.
+        The search index is rebuilt on the next search.
+        A catalog keeps its own indexes up to date.
+        """
+        if self.catalog is None:
+            self.books_index.build((book.name, book) for book in self.books)
+        self.books_search = None
+        if self.journal is not None:
+            self.journal.record('reindex')
 
     def print_books(self):
         """
@@ -134,12 +358,43 @@ class Manager:
             return False
         # Return a copy to protect internal state
         return [book for book in self.books]
+
+    def iter_books(self, offset = 0, limit = None):
+        """
+        Lazily yield books in insertion order without copying the list.
+        A catalog reads only the records of the page.
+        """
+        return iter_page(self.books, offset, limit)
     
     def add_user(self, name, id):
         """
         Add a new user to the system.
+
+        @Returns:
+            bool: True if added, False if the name or id is already used.
+        """
+        if name in self.users_by_name or id in self.users_by_id:
+            return False
+        user = User(name, id)
+        self.users.append(user)
+        self.users_by_name[name] = user
+        self.users_by_id[id] = user
+        if self.journal is not None:
+            self.journal.record('add_user', name, id)
+        return True
+
+    def add_users(self, rows):
+        """
+        Add many (name, id) rows at once.
+
+        @Returns:
+            int: Number of rows skipped because the name or id is used.
         """
-        self.users.append(User(name, id))
+        skipped = 0
+        for name, id in rows:
+            if not self.add_user(name, id):
+                skipped += 1
+        return skipped
 
     def print_users(self):
         """
@@ -150,70 +405,273 @@ class Manager:
             return False
         return [user for user in self.users]    # for security reason
 
-    def print_books_by_prefix(self, pref):
+    def iter_users(self, offset = 0, limit = None):
+        """
+        Lazily yield users in insertion order without copying the list.
+        """
+        return iter_page(self.users, offset, limit)
+
+    def iter_books_by_prefix(self, pref, limit = None):
+        """
+        Lazily yield books whose name starts with pref, sorted by name.
+        Only the matching range of the index is visited.
+        """
+        index = self.books_index if self.catalog is None else self.catalog
+        return index.iter_prefix(pref, limit)
+
+    def print_books_by_prefix(self, pref, limit = None):
         """
         Search books by name prefix.
+        Returns at most limit books when a limit is given.
         """
-        books = [book for book in self.books if book.name[: len(pref)] == pref]  # manually check, i can use startswith()
+        books = list(self.iter_books_by_prefix(pref, limit))
         # ther's no books with this prefix
         if len(books) == 0:
             return False
         return books
 
+    def search_books(self, query, limit = 10, max_distance = 0):
+        """
+        Search books whose name contains query anywhere, ignoring case,
+        optionally with typos. Answered from a trigram index, so only
+        names sharing trigrams with the query are looked at.
+
+        @Args:
+            query (str): Word or part of a book name.
+            limit (int | None): Maximum number of books returned.
+            max_distance (int): Typos allowed (inserted, deleted or
+                replaced characters), lowered by trigram_index.fuzzy_distance()
+                for a short query over many books.
+
+        @Returns:
+            list | bool: Books ranked best match first, False if none.
+        """
+        if self.books_search is None:
+            # with a catalog, the first search reads every record once
+            self.books_search = TrigramIndex()
+            self.books_search.build((book.name, book) for book in self.books)
+        return self.books_search.search(query, limit, max_distance) or False
+
     def check_user(self, user_name):
         """
         Find and return a user by name.
         """
-        for user in self.users:
-            if user.name == user_name:
-                return user
-        return False
+        return self.users_by_name.get(user_name, False)
             
     def check_book(self, book_name):
         """
         Find and return a book by name.
+        A catalog answers from its name index, without loading it.
         """
-        for book in self.books:
-            if book.name == book_name:
-                return book
-        return False
+        if self.catalog is not None:
+            return self.catalog.find(book_name) or False
+        return self.books_by_name.get(book_name, False)
+
+    def get_user_by_id(self, id):
+        """
+        Find and return a user by id.
+        """
+        return self.users_by_id.get(id, False)
+
+    def get_book_by_id(self, id):
+        """
+        Find and return a book by id.
+        A catalog answers directly from the file, without loading it.
+        """
+        if self.catalog is not None:
+            return self.catalog.get(id) or False
+        return self.books_by_id.get(id, False)
+
+    def _lend(self, user, book, now):
+        # Borrow one copy of book for user, due loan_days after now
+        if not book.borrow():
+            return False
+        loan = Loan(user, book, now + self.loan_days * DAY)
+        user.borrow(book, loan)
+        self.borrowers.setdefault(book.id, {})[user.id] = user
+        self.due_index.add(loan)
+        return True
 
-    def borrow_book(self, user_name, book_name):
+    def borrow_book(self, user_name, book_name, now = None):
         """
         Borrow a book for a user if possible.
+        `now` is the borrowing time, the clock by default.
         """
         if (user := self.check_user(user_name)) and (book := self.check_book(book_name)):
-            if book.borrow():
-                user.borrow(book)
+            if now is None:
+                now = self.clock()
+            if self._lend(user, book, now):
+                if self.journal is not None:
+                    self.journal.record('borrow_book', user_name, book_name, now)
                 return True
         return False
 
-    def return_book(self, user_name, book_name):
+    def return_book(self, user_name, book_name, now = None):
         """
-        Return a borrowed book.
+        Return a borrowed book. If users are waiting for it, the copy
+        is lent to the first one at once, from time now (the clock by
+        default).
         """
         if (user := self.check_user(user_name)) and (book := self.check_book(book_name)):
                 if user.is_borrowed(book):
-                    user.return_copy(book)
+                    if now is None:
+                        now = self.clock()
+                    loan = user.return_copy(book)
+                    if loan is not None:
+                        self.due_index.discard(loan)
                     book.return_copy()
+                    # drop the user once they hold no more copies
+                    if not user.is_borrowed(book):
+                        borrowers = self.borrowers[book.id]
+                        del borrowers[user.id]
+                        if not borrowers:
+                            del self.borrowers[book.id]
+                    if holds := self.holds.get(book.id):
+                        # hand the copy to the first user in the hold queue
+                        _, holder = holds.popitem(last=False)
+                        if not holds:
+                            del self.holds[book.id]
+                        self._lend(holder, book, now)
+                    if self.journal is not None:
+                        self.journal.record('return_book', user_name, book_name, now)
                     return True
         return False
 
+    def reserve_book(self, user_name, book_name):
+        """
+        Put a user in the hold queue of a book with no copy left.
+
+        @Returns:
+            bool: True if queued, False if the user or book does not exist,
+                  a copy can be borrowed now, the user already holds a
+                  copy (it would be lent straight back to them) or is
+                  already queued.
+        """
+        if (user := self.check_user(user_name)) and (book := self.check_book(book_name)):
+            if book.total_borrowed < book.total_quantity or user.is_borrowed(book):
+                return False
+            holds = self.holds.setdefault(book.id, OrderedDict())
+            if user.id in holds:
+                return False
+            holds[user.id] = user
+            if self.journal is not None:
+                self.journal.record('reserve_book', user_name, book_name)
+            return True
+        return False
+
+    def cancel_reservation(self, user_name, book_name):
+        """
+        Take a user out of the hold queue of a book.
+
+        @Returns:
+            bool: True if the user was waiting for the book.
+        """
+        if (user := self.check_user(user_name)) and (book := self.check_book(book_name)):
+            holds = self.holds.get(book.id)
+            if holds and user.id in holds:
+                del holds[user.id]
+                if not holds:
+                    del self.holds[book.id]
+                if self.journal is not None:
+                    self.journal.record('cancel_reservation', user_name, book_name)
+                return True
+        return False
+
+    def hold_queue(self, book_name):
+        """
+        Get the users waiting for a book, first in line first.
+        """
+        if book := self.check_book(book_name):
+            return list(self.holds.get(book.id, {}).values())
+        return False
+
+    def print_overdue(self, now = None, limit = None):
+        """
+        Loans not returned by their due date, most overdue first.
+        Answered from the due date index, without scanning the users.
+
+        @Args:
+            now (float | None): Report time, the clock by default.
+            limit (int | None): Maximum number of loans returned.
+
+        @Returns:
+            list | bool: Loan objects, False if none is overdue.
+        """
+        if now is None:
+            now = self.clock()
+        return self.due_index.due_before(now, limit) or False
+
     def users_borrowed(self, book_name):
         """
         Get all users who borrowed a specific book.
         """
         if book := self.check_book(book_name):
-            return [user for user in self.users if user.is_borrowed(book)]
+            return list(self.borrowers.get(book.id, {}).values())
         return False
 
+    def snapshot_state(self):
+        """
+        Plain data copy of all books, users and loans for PersistentStore.
+
+        @Returns:
+            dict: books as (id, name, quantity), users as (name, id),
+                  loans as (user id, book id, copies held), the
+                  borrower ids of each book in borrowing order, the due
+                  dates as (user id, book id, due times oldest first)
+                  and the hold queues as (book id, user ids).
+        """
+        return {
+            'books': [(book.id, book.name, book.total_quantity) for book in self.books],
+            'users': [(user.name, user.id) for user in self.users],
+            'loans': [(user.id, book.id, copies) for user in self.users
+                      for book, copies in user.borrowed_books.items()],
+            'borrowers': [(book_id, list(users)) for book_id, users in self.borrowers.items()],
+            'due': [(user.id, book.id, [loan.due for loan in loans]) for user in self.users
+                    for book, loans in user.loans.items()],
+            'holds': [(book_id, list(users)) for book_id, users in self.holds.items()],
+        }
+
+    def restore_state(self, state):
+        """
+        Replace everything with the data from snapshot_state().
+        A catalog keeps its records: only snapshot books it lacks are added.
+        """
+        journal, self.journal = self.journal, None
+        try:
+            self._reset()
+            self.add_books(state['books'], reindex=False)
+            self.reindex()
+            self.add_users(state['users'])
+            self._restore_loans(state)
+        finally:
+            self.journal = journal
+
+    def _restore_loans(self, state):
+        # Rebuild the loans, borrowers and hold queues of a snapshot
+        due = {(user_id, book_id): dues for user_id, book_id, dues in state.get('due', ())}
+        # snapshots from before due dates: the loans start now
+        default = self.clock() + self.loan_days * DAY
+        for user_id, book_id, copies in state['loans']:
+            book = self.get_book_by_id(book_id)
+            book.total_borrowed += copies
+            user = self.users_by_id[user_id]
+            user.borrowed_books[book] = copies
+            loans = user.loans[book] = deque(Loan(user, book, at)
+                                             for at in due.get((user_id, book_id), [default] * copies))
+            for loan in loans:
+                self.due_index.add(loan)
+        for book_id, user_ids in state['borrowers']:
+            self.borrowers[book_id] = {user_id: self.users_by_id[user_id] for user_id in user_ids}
+        for book_id, user_ids in state.get('holds', ()):
+            self.holds[book_id] = OrderedDict((user_id, self.users_by_id[user_id]) for user_id in user_ids)
+
 class Frontend:
     """
     Console-based user interface.
     Handles input/output and delegates logic to Manager.
     """
-    def __init__(self):
-        self.admin = Manager()
+    def __init__(self, admin = None):
+        self.admin = admin if admin is not None else Manager()
 
     def print_menu(self):
         """
@@ -221,7 +679,9 @@ class Frontend:
         """
         print('Program options:')
         choices = ['Add book', 'Print library books', 'Print books by prefix', 'Add user',
-                   'Borrow book', 'Return book', 'Print users borrowed book', 'Print users', 'End the program']
+                   'Borrow book', 'Return book', 'Print users borrowed book', 'Print users',
+                   'Import books from file', 'Import users from file', 'Search books',
+                   'Reserve book', 'Print overdue loans', 'End the program']
         choices = [f'\t{idx + 1}) {sen}' for idx, sen in enumerate(choices)]
         self.num_choices = len(choices)
         print('\n'.join(choices))
@@ -241,17 +701,24 @@ class Frontend:
                 id = get_from_user('Enter book id: ')
                 name = input('Enter book name: ')
                 quantity = get_from_user('How many copies: ')
-                # add
-                self.admin.add_book(id, name, quantity)
+                # add (a catalog file rejects names that do not fit its records)
+                try:
+                    added = self.admin.add_book(id, name, quantity)
+                except ValueError as error:
+                    print(error)
+                else:
+                    if not added:
+                        print('A book with this name or id already exists')
 
             # print all books
             elif choice == 2:
-                # there's a book available
-                if books := self.admin.print_books():
-                    for book in books:
-                        print(book)
+                # stream the books instead of copying them
+                empty = True
+                for book in self.admin.iter_books():
+                    print(book)
+                    empty = False
                 # no books exist
-                else:
+                if empty:
                     print('No books yet!')
             
             # print books by prefix
@@ -269,7 +736,8 @@ class Frontend:
                 name = input('Enter user name: ')
                 id = get_from_user('Enter user id: ')
                 # add
-                self.admin.add_user(name, id)
+                if not self.admin.add_user(name, id):
+                    print('A user with this name or id already exists')
             
             # borrow a book
             elif choice == 5:
@@ -280,7 +748,7 @@ class Frontend:
                 if self.admin.borrow_book(user_name, book_name):
                     print(f'{user_name} borrowed {book_name} successfully')
                 else:
-                    print(f"{user_name} can't borrow {book_name}")
+                    print(f"{user_name} can't borrow {book_name} (option 12 reserves a copy)")
 
             # return a book
             elif choice == 6:
@@ -288,8 +756,12 @@ class Frontend:
                 user_name = input('Enter user name: ')
                 book_name = input('Enter book name: ')
 
+                # the first user waiting for the book gets the returned copy
+                waiting = self.admin.hold_queue(book_name)
                 if self.admin.return_book(user_name, book_name):
                     print(f'{user_name} returned {book_name}')
+                    if waiting:
+                        print(f'{book_name} is now lent to {waiting[0].name}, who reserved it')
                 else:
                     print(f"{user_name} didn't borrow {book_name}")
 
@@ -305,15 +777,54 @@ class Frontend:
 
             # print all users
             elif choice == 8:
-                # there's a user available
-                if users := self.admin.print_users():
-                    for user in users:
-                        print(user)
+                # stream the users instead of copying them
+                empty = True
+                for user in self.admin.iter_users():
+                    print(user)
+                    empty = False
                 # no users exist
-                else:
+                if empty:
                     print('No users yet!')
+            # bulk import books or users from a CSV or JSONL file
+            elif choice in (9, 10):
+                path = input('Enter file path (.csv or .jsonl): ')
+                load = import_books if choice == 9 else import_users
+                try:
+                    print(load(self.admin, path))
+                except (OSError, ValueError, KeyError) as error:
+                    print(f'Import failed: {error}')
+
+            # search books by any part of the name, with typos
+            elif choice == 11:
+                query = input('Enter part of the book name: ')
+                typos = get_from_user('Typos allowed (0 for exact): ', 0, 3)
+                if books := self.admin.search_books(query, 10, typos):
+                    for book in books:
+                        print(book)
+                else:
+                    print('No such books')
+
+            # join the hold queue of a book with no copy left
+            elif choice == 12:
+                user_name = input('Enter user name: ')
+                book_name = input('Enter book name: ')
+                if self.admin.reserve_book(user_name, book_name):
+                    print(f'{user_name} will get the next returned copy of {book_name} '
+                          f'after {len(self.admin.hold_queue(book_name)) - 1} other users')
+                else:
+                    print(f"{user_name} can't reserve {book_name}: it has copies left, "
+                          f"they already reserved it or it doesn't exist")
+
+            # loans past their due date, most overdue first
+            elif choice == 13:
+                if loans := self.admin.print_overdue():
+                    for loan in loans:
+                        print(loan)
+                else:
+                    print('No overdue loans')
+
             # exit the program
-            elif choice == 9:
+            elif choice == 14:
                 print('Good bye')
                 break
 
@@ -330,8 +841,77 @@ def add_dummy_data(app):
         app.admin.add_user(f'user{i + 1}', i ** 5 + 10)
 
 if __name__ == '__main__':
-    app = Frontend()
+    parser = argparse.ArgumentParser(description='Library Management System')
+    parser.add_argument('--import-books', metavar='FILE',
+                        help='load books from a CSV or JSONL file at startup')
+    parser.add_argument('--import-users', metavar='FILE',
+                        help='load users from a CSV or JSONL file at startup')
+    parser.add_argument('--sqlite', metavar='DB',
+                        help='store the library in a SQLite database file')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='keep the library on disk (journal + snapshots) in DIR')
+    parser.add_argument('--sync-every', type=int, default=1, metavar='N',
+                        help='fsync the journal every N operations (default 1)')
+    parser.add_argument('--snapshot-every', type=int, metavar='N',
+                        help='write a snapshot every N operations')
+    parser.add_argument('--loan-days', type=int, default=14, metavar='N',
+                        help='days until a borrowed book is due (default 14)')
+    parser.add_argument('--catalog', metavar='FILE',
+                        help='keep the books in a memory-mapped catalog file')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands in FILE ('-' for stdin) instead of the menu")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='record manager metrics and write them (Prometheus text) to FILE on exit')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='record manager metrics and serve them at http://127.0.0.1:PORT/metrics')
+    args = parser.parse_args()
+    if args.sqlite and args.data_dir:
+        parser.error('--sqlite cannot be combined with --data-dir')
+    if args.catalog and (args.sqlite or args.data_dir):
+        parser.error('--catalog cannot be combined with --sqlite or --data-dir')
+    catalog = None
+    if args.catalog:
+        catalog = BookCatalog(args.catalog)
+        app = Frontend(Manager(catalog, args.loan_days))
+    elif args.sqlite:
+        # imported here because sqlite_manager imports this module
+        from sqlite_manager import SQLiteManager
+        app = Frontend(SQLiteManager(args.sqlite, args.loan_days))
+    else:
+        app = Frontend(Manager(loan_days=args.loan_days))
     # add_dummy_data(app)     
-    app.run()
+    metrics = None
+    if args.metrics or args.metrics_port:
+        # opt-in: only an instrumented manager pays for timing
+        metrics = Metrics('library')
+        instrument(app.admin, metrics)
+        manager_gauges(metrics, app.admin)
+        if args.metrics_port:
+            metrics.serve(args.metrics_port)
+    store = None
+    if args.data_dir:
+        store = PersistentStore(args.data_dir, args.sync_every, snapshot_every=args.snapshot_every)
+        print(f'Recovered state, replayed {store.open(app.admin)} operations')
+    if args.import_books:
+        print(import_books(app.admin, args.import_books))
+    if args.import_users:
+        print(import_users(app.admin, args.import_users))
+    if args.batch:
+        # replay a command script without menus
+        if args.batch == '-':
+            stats = BatchRunner(app.admin).run(sys.stdin)
+        else:
+            with open(args.batch, encoding='utf-8') as file:
+                stats = BatchRunner(app.admin).run(file)
+        print(stats, file=sys.stderr)
+    else:
+        app.run()
+    if store is not None:
+        store.snapshot()
+        store.close()
+    if catalog is not None:
+        catalog.close()
+    if args.metrics:
+        metrics.write(args.metrics)
 
     
\ No newline at end of file
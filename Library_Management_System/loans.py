@@ -0,0 +1,110 @@
+"""
+Loans with due dates and the due date index behind the overdue report.
+"""
+import bisect
+import itertools
+import time
+
+DAY = 24 * 60 * 60
+
+def format_time(seconds):
+    """
+    Local date and time of a timestamp, to the minute.
+    """
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(seconds))
+
+class Loan:
+    """
+    One borrowed copy of a book: who holds it and when it is due back.
+    """
+    __slots__ = ('user', 'book', 'due', 'returned')
+
+    def __init__(self, user, book, due):
+        self.user = user
+        self.book = book
+        self.due = due
+        self.returned = False
+
+    def overdue_days(self, now):
+        """
+        Whole days the loan is late at time now, 0 if it is not overdue.
+        """
+        return max(0, int((now - self.due) // DAY))
+
+    def __repr__(self):
+        return f'user: {self.user.name}, book: {self.book.name}, due: {self.due}'
+
+    def __str__(self):
+        return f'User name: {self.user.name}\t\t-book: {self.book.name} - due: {format_time(self.due)}'
+
+class DueIndex:
+    """
+    Open loans sorted by due date, so the loans overdue at a given time
+    are one prefix of the list found by a binary search, without
+    looking at every user.
+
+    With a fixed loan period new loans are due after all the older
+    ones and land at the end of the list, so adding is O(log n).
+    A returned loan is only marked and skipped by reports; the list is
+    compacted once returned loans outnumber compact_ratio of its
+    entries, which keeps returning O(1) amortized.
+    """
+    def __init__(self, compact_ratio = 0.5):
+        # (due, seq, loan) sorted by due then seq; seq keeps equal due
+        # dates in lending order and is never equal, so loans are not compared
+        self.entries = []
+        self.seq = itertools.count()
+        self.returned = 0
+        self.compact_ratio = compact_ratio
+
+    def add(self, loan):
+        """
+        Index an open loan.
+        """
+        entry = (loan.due, next(self.seq), loan)
+        entries = self.entries
+        if not entries or entries[-1] < entry:
+            entries.append(entry)
+        else:
+            entries.insert(bisect.bisect_right(entries, entry), entry)
+
+    def discard(self, loan):
+        """
+        Drop a loan that was returned.
+        """
+        loan.returned = True
+        self.returned += 1
+        if self.returned > len(self.entries) * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """
+        Remove the returned loans from the list.
+        """
+        self.entries = [entry for entry in self.entries if not entry[2].returned]
+        self.returned = 0
+
+    def due_before(self, before, limit = None):
+        """
+        Open loans due before a time, earliest due first.
+
+        @Args:
+            before (float): Loans due strictly before this time are returned.
+            limit (int | None): Maximum number of loans returned.
+
+        @Returns:
+            list: Loan objects.
+        """
+        entries = self.entries
+        end = bisect.bisect_left(entries, (before,))
+        loans = []
+        for idx in range(end):
+            loan = entries[idx][2]
+            if not loan.returned:
+                if limit is not None and len(loans) >= limit:
+                    break
+                loans.append(loan)
+        return loans
+
+    def __len__(self):
+        return len(self.entries) - self.returned
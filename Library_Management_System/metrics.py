@@ -0,0 +1,16 @@
+"""
+Library gauges for the shared metrics registry (common.metrics).
+"""
+def manager_gauges(metrics, manager):
+    """
+    Register the collection size gauges of an in-memory library manager.
+    """
+    if hasattr(manager, 'books'):
+        metrics.gauge('books', 'Book titles in the library.', lambda: len(manager.books))
+        metrics.gauge('users', 'Registered users.', lambda: len(manager.users))
+        metrics.gauge('titles_on_loan', 'Titles with at least one borrowed copy.',
+                      lambda: len(manager.borrowers))
+        metrics.gauge('open_loans', 'Borrowed copies not returned yet.',
+                      lambda: len(manager.due_index))
+        metrics.gauge('titles_reserved', 'Titles with users in their hold queue.',
+                      lambda: len(manager.holds))
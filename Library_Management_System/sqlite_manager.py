@@ -0,0 +1,423 @@
+"""
+SQLite-backed alternative to the in-memory library Manager.
+"""
+import heapq
+import sqlite3
+import time
+from libraray_management_system import Book, User
+from collections import deque
+from loans import DAY, Loan
+from trigram_index import fuzzy_distance, rank_key, trigrams, verify
+
+class SQLiteManager:
+    """
+    Library Manager with the same API, backed by a SQLite database
+    for catalogs that do not fit in memory.
+
+    Book and user names and ids are unique and indexed, loans are
+    indexed by book, and prefix search is a `LIKE 'p%'` query that
+    SQLite answers from the name index. Substring and fuzzy search use
+    an FTS5 trigram index of the names, kept up to date by a trigger,
+    and rank the candidates like Manager.search_books(). Every borrowed
+    copy has a due date row, indexed by date for the overdue report, and
+    hold queues are rows ordered by reservation. The database runs in WAL mode,
+    every public method is one transaction, and batches go through
+    executemany.
+
+    Returned Book and User objects are copies: change them through the
+    manager methods, not by calling borrow()/return_copy() on them.
+    """
+    def __init__(self, path = ':memory:', loan_days = 14, clock = time.time):
+        self.loan_days = loan_days
+        self.clock = clock
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        # case sensitive LIKE, like str.startswith, lets SQLite use the name index
+        self.conn.execute('PRAGMA case_sensitive_like = ON')
+        with self.conn:
+            # seq keeps insertion order, ids are chosen by the admin
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS books (
+                                     seq INTEGER PRIMARY KEY,
+                                     id INTEGER NOT NULL UNIQUE,
+                                     name TEXT NOT NULL UNIQUE,
+                                     total_quantity INTEGER NOT NULL,
+                                     total_borrowed INTEGER NOT NULL DEFAULT 0)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS users (
+                                     seq INTEGER PRIMARY KEY,
+                                     id INTEGER NOT NULL UNIQUE,
+                                     name TEXT NOT NULL UNIQUE)''')
+            # rowid keeps the order in which users first borrowed a book
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS loans (
+                                     user_id INTEGER NOT NULL,
+                                     book_id INTEGER NOT NULL,
+                                     copies INTEGER NOT NULL,
+                                     PRIMARY KEY (user_id, book_id))''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS loans_book ON loans (book_id)')
+            # one row per borrowed copy
+            exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'loan_dues'").fetchone()
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS loan_dues (
+                                     user_id INTEGER NOT NULL,
+                                     book_id INTEGER NOT NULL,
+                                     due REAL NOT NULL)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS loan_dues_loan ON loan_dues (user_id, book_id, due)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS loan_dues_due ON loan_dues (due)')
+            if not exists:
+                # loans of a database created by an older version start now
+                due = self.clock() + self.loan_days * DAY
+                self.conn.executemany('INSERT INTO loan_dues (user_id, book_id, due) VALUES (?, ?, ?)',
+                                      [(user_id, book_id, due) for user_id, book_id, copies
+                                       in self.conn.execute('SELECT user_id, book_id, copies FROM loans')
+                                       for _ in range(copies)])
+            # seq keeps the reservation order of each hold queue
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS holds (
+                                     seq INTEGER PRIMARY KEY,
+                                     book_id INTEGER NOT NULL,
+                                     user_id INTEGER NOT NULL,
+                                     UNIQUE (book_id, user_id))''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS holds_queue ON holds (book_id, seq)')
+            try:
+                exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_search'").fetchone()
+                self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS books_search USING fts5(
+                                         name, content = 'books', content_rowid = 'seq',
+                                         tokenize = 'trigram')''')
+                self.conn.execute('''CREATE TRIGGER IF NOT EXISTS books_search_insert AFTER INSERT ON books
+                                     BEGIN INSERT INTO books_search (rowid, name) VALUES (new.seq, new.name); END''')
+                if not exists:
+                    # index the books of a database created by an older version
+                    self.conn.execute("INSERT INTO books_search (books_search) VALUES ('rebuild')")
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite without FTS5 or its trigram tokenizer (before 3.34): search scans all names
+                self.fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def _book(self, row):
+        # Builds a Book copy from an (id, name, total_quantity, total_borrowed) row
+        book = Book(row[0], row[1], row[2])
+        book.total_borrowed = row[3]
+        return book
+
+    def _user(self, row):
+        # Builds a User copy from a (name, id) row, including borrowed books
+        user = User(row[0], row[1])
+        cursor = self.conn.execute('''SELECT b.id, b.name, b.total_quantity, b.total_borrowed, l.copies
+                                      FROM loans l JOIN books b ON b.id = l.book_id
+                                      WHERE l.user_id = ? ORDER BY l.rowid''', (row[1],))
+        books = {}
+        for *book_row, copies in cursor:
+            book = books[book_row[0]] = self._book(book_row)
+            user.borrowed_books[book] = copies
+        cursor = self.conn.execute('SELECT book_id, due FROM loan_dues WHERE user_id = ? ORDER BY due, rowid',
+                                   (row[1],))
+        for book_id, due in cursor:
+            book = books[book_id]
+            user.loans.setdefault(book, deque()).append(Loan(user, book, due))
+        return user
+
+    def add_book(self, id, name, quantity):
+        """
+        Add a new book to the library.
+
+        @Returns:
+            bool: True if added, False if the name or id is already used.
+        """
+        with self.conn:
+            cursor = self.conn.execute('INSERT OR IGNORE INTO books (id, name, total_quantity) VALUES (?, ?, ?)',
+                                       (id, name, quantity))
+        return cursor.rowcount > 0
+
+    def add_books(self, rows, reindex = True):
+        """
+        Add many (id, name, quantity) rows in one transaction.
+        SQLite keeps its indexes up to date, reindex is accepted for
+        compatibility with Manager.
+
+        @Returns:
+            int: Number of rows skipped because the name or id is used.
+        """
+        rows = list(rows)
+        with self.conn:
+            # rowcount, unlike total_changes, leaves out the search index trigger's rows
+            cursor = self.conn.executemany('INSERT OR IGNORE INTO books (id, name, total_quantity) VALUES (?, ?, ?)',
+                                           rows)
+        return len(rows) - cursor.rowcount
+
+    def reindex(self):
+        """
+        Refresh the query planner statistics after bulk loads.
+        """
+        self.conn.execute('ANALYZE')
+
+    def print_books(self):
+        """
+        Return a list of all books.
+        """
+        return list(self.iter_books()) or False
+
+    def iter_books(self, offset = 0, limit = None):
+        """
+        Lazily yield books in insertion order, streaming from the cursor.
+        """
+        cursor = self.conn.execute('''SELECT id, name, total_quantity, total_borrowed FROM books
+                                      ORDER BY seq LIMIT ? OFFSET ?''',
+                                   (-1 if limit is None else limit, offset))
+        for row in cursor:
+            yield self._book(row)
+
+    def add_user(self, name, id):
+        """
+        Add a new user to the system.
+
+        @Returns:
+            bool: True if added, False if the name or id is already used.
+        """
+        with self.conn:
+            cursor = self.conn.execute('INSERT OR IGNORE INTO users (id, name) VALUES (?, ?)', (id, name))
+        return cursor.rowcount > 0
+
+    def add_users(self, rows):
+        """
+        Add many (name, id) rows in one transaction.
+
+        @Returns:
+            int: Number of rows skipped because the name or id is used.
+        """
+        rows = list(rows)
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO users (name, id) VALUES (?, ?)', rows)
+        return len(rows) - (self.conn.total_changes - before)
+
+    def print_users(self):
+        """
+        Return a list of all users.
+        """
+        return list(self.iter_users()) or False
+
+    def iter_users(self, offset = 0, limit = None):
+        """
+        Lazily yield users in insertion order, streaming from the cursor.
+        """
+        cursor = self.conn.execute('SELECT name, id FROM users ORDER BY seq LIMIT ? OFFSET ?',
+                                   (-1 if limit is None else limit, offset))
+        for row in cursor:
+            yield self._user(row)
+
+    def iter_books_by_prefix(self, pref, limit = None):
+        """
+        Lazily yield books whose name starts with pref, sorted by name.
+        """
+        # escape LIKE wildcards so the prefix is matched literally
+        pattern = pref.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        cursor = self.conn.execute('''SELECT id, name, total_quantity, total_borrowed FROM books
+                                      WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?''',
+                                   (pattern, -1 if limit is None else limit))
+        for row in cursor:
+            yield self._book(row)
+
+    def print_books_by_prefix(self, pref, limit = None):
+        """
+        Search books by name prefix.
+        Returns at most limit books when a limit is given.
+        """
+        return list(self.iter_books_by_prefix(pref, limit)) or False
+
+    def search_books(self, query, limit = 10, max_distance = 0):
+        """
+        Search books whose name contains query anywhere, ignoring case,
+        optionally with typos.
+
+        @Args:
+            query (str): Word or part of a book name.
+            limit (int | None): Maximum number of books returned.
+            max_distance (int): Typos allowed (inserted, deleted or
+                replaced characters), lowered by trigram_index.fuzzy_distance()
+                for a short query over many books.
+
+        @Returns:
+            list | bool: Books ranked best match first, False if none.
+        """
+        folded = query.casefold()
+        max_distance = fuzzy_distance(folded, max_distance,
+                                      lambda: self.conn.execute('SELECT COUNT(*) FROM books').fetchone()[0])
+        grams = trigrams(folded)
+        need = len(grams) - 3 * max_distance if max_distance else 0
+        match = None
+        if self.fts and grams and (not max_distance or need >= 1):
+            # every name within max_distance shares one of the query trigrams,
+            # an exact match contains the whole query
+            quote = lambda text: '"' + text.replace('"', '""') + '"'
+            match = ' OR '.join(map(quote, grams)) if max_distance else quote(query)
+        if match is None:
+            cursor = self.conn.execute('SELECT id, name, total_quantity, total_borrowed FROM books')
+        else:
+            cursor = self.conn.execute('''SELECT b.id, b.name, b.total_quantity, b.total_borrowed
+                                          FROM books_search s JOIN books b ON b.seq = s.rowid
+                                          WHERE books_search MATCH ?''', (match,))
+        matches = ((rank_key(folded, name, distance), row) for row in cursor
+                   if (distance := verify(folded, name := row[1].casefold(), max_distance, need)) is not None)
+        ranked = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+        return [self._book(row) for _, row in ranked] or False
+
+    def check_user(self, user_name):
+        """
+        Find and return a user by name.
+        """
+        row = self.conn.execute('SELECT name, id FROM users WHERE name = ?', (user_name,)).fetchone()
+        return self._user(row) if row else False
+
+    def check_book(self, book_name):
+        """
+        Find and return a book by name.
+        """
+        row = self.conn.execute('SELECT id, name, total_quantity, total_borrowed FROM books WHERE name = ?',
+                                (book_name,)).fetchone()
+        return self._book(row) if row else False
+
+    def get_user_by_id(self, id):
+        """
+        Find and return a user by id.
+        """
+        row = self.conn.execute('SELECT name, id FROM users WHERE id = ?', (id,)).fetchone()
+        return self._user(row) if row else False
+
+    def get_book_by_id(self, id):
+        """
+        Find and return a book by id.
+        """
+        row = self.conn.execute('SELECT id, name, total_quantity, total_borrowed FROM books WHERE id = ?',
+                                (id,)).fetchone()
+        return self._book(row) if row else False
+
+    def _ids(self, user_name, book_name):
+        # (user id, book id) or None if either does not exist
+        user = self.conn.execute('SELECT id FROM users WHERE name = ?', (user_name,)).fetchone()
+        book = self.conn.execute('SELECT id FROM books WHERE name = ?', (book_name,)).fetchone()
+        if user is None or book is None:
+            return None
+        return user[0], book[0]
+
+    def _lend(self, user_id, book_id, now):
+        # Borrow one copy inside the caller's transaction, due loan_days after now
+        # only succeeds while a copy is available
+        cursor = self.conn.execute('''UPDATE books SET total_borrowed = total_borrowed + 1
+                                      WHERE id = ? AND total_borrowed < total_quantity''', (book_id,))
+        if cursor.rowcount == 0:
+            return False
+        self.conn.execute('''INSERT INTO loans (user_id, book_id, copies) VALUES (?, ?, 1)
+                             ON CONFLICT (user_id, book_id) DO UPDATE SET copies = copies + 1''',
+                          (user_id, book_id))
+        self.conn.execute('INSERT INTO loan_dues (user_id, book_id, due) VALUES (?, ?, ?)',
+                          (user_id, book_id, now + self.loan_days * DAY))
+        return True
+
+    def borrow_book(self, user_name, book_name, now = None):
+        """
+        Borrow a book for a user if possible.
+        `now` is the borrowing time, the clock by default.
+        """
+        with self.conn:
+            if (ids := self._ids(user_name, book_name)) is None:
+                return False
+            return self._lend(*ids, self.clock() if now is None else now)
+
+    def return_book(self, user_name, book_name, now = None):
+        """
+        Return a borrowed book. If users are waiting for it, the copy
+        is lent to the first one at once, from time now (the clock by
+        default).
+        """
+        with self.conn:
+            if (ids := self._ids(user_name, book_name)) is None:
+                return False
+            cursor = self.conn.execute('UPDATE loans SET copies = copies - 1 WHERE user_id = ? AND book_id = ?', ids)
+            if cursor.rowcount == 0:
+                return False
+            self.conn.execute('DELETE FROM loans WHERE user_id = ? AND book_id = ? AND copies = 0', ids)
+            # close the oldest loan of the copies held
+            self.conn.execute('''DELETE FROM loan_dues WHERE rowid = (
+                                     SELECT rowid FROM loan_dues WHERE user_id = ? AND book_id = ?
+                                     ORDER BY due, rowid LIMIT 1)''', ids)
+            self.conn.execute('UPDATE books SET total_borrowed = total_borrowed - 1 WHERE id = ?', (ids[1],))
+            hold = self.conn.execute('SELECT seq, user_id FROM holds WHERE book_id = ? ORDER BY seq LIMIT 1',
+                                     (ids[1],)).fetchone()
+            if hold is not None:
+                # hand the copy to the first user in the hold queue
+                self.conn.execute('DELETE FROM holds WHERE seq = ?', (hold[0],))
+                self._lend(hold[1], ids[1], self.clock() if now is None else now)
+        return True
+
+    def reserve_book(self, user_name, book_name):
+        """
+        Put a user in the hold queue of a book with no copy left.
+
+        @Returns:
+            bool: True if queued, False if the user or book does not exist,
+                  a copy can be borrowed now, the user already holds a
+                  copy or is already queued.
+        """
+        with self.conn:
+            if (ids := self._ids(user_name, book_name)) is None:
+                return False
+            cursor = self.conn.execute('''INSERT OR IGNORE INTO holds (book_id, user_id)
+                                          SELECT id, ? FROM books WHERE id = ? AND total_borrowed >= total_quantity
+                                          AND NOT EXISTS (SELECT 1 FROM loans WHERE user_id = ?1 AND book_id = ?2)''',
+                                       ids)
+        return cursor.rowcount > 0
+
+    def cancel_reservation(self, user_name, book_name):
+        """
+        Take a user out of the hold queue of a book.
+
+        @Returns:
+            bool: True if the user was waiting for the book.
+        """
+        with self.conn:
+            if (ids := self._ids(user_name, book_name)) is None:
+                return False
+            cursor = self.conn.execute('DELETE FROM holds WHERE user_id = ? AND book_id = ?', ids)
+        return cursor.rowcount > 0
+
+    def hold_queue(self, book_name):
+        """
+        Get the users waiting for a book, first in line first.
+        """
+        book = self.conn.execute('SELECT id FROM books WHERE name = ?', (book_name,)).fetchone()
+        if book is None:
+            return False
+        cursor = self.conn.execute('''SELECT u.name, u.id FROM holds h JOIN users u ON u.id = h.user_id
+                                      WHERE h.book_id = ? ORDER BY h.seq''', book)
+        return [self._user(row) for row in cursor.fetchall()]
+
+    def print_overdue(self, now = None, limit = None):
+        """
+        Loans not returned by their due date, most overdue first,
+        read from the due date index.
+
+        @Args:
+            now (float | None): Report time, the clock by default.
+            limit (int | None): Maximum number of loans returned.
+
+        @Returns:
+            list | bool: Loan objects, False if none is overdue.
+        """
+        cursor = self.conn.execute('''SELECT u.name, u.id, b.id, b.name, b.total_quantity, b.total_borrowed, d.due
+                                      FROM loan_dues d JOIN users u ON u.id = d.user_id
+                                      JOIN books b ON b.id = d.book_id
+                                      WHERE d.due < ? ORDER BY d.due, d.rowid LIMIT ?''',
+                                   (self.clock() if now is None else now, -1 if limit is None else limit))
+        return [Loan(self._user(row[:2]), self._book(row[2:6]), row[6]) for row in cursor.fetchall()] or False
+
+    def users_borrowed(self, book_name):
+        """
+        Get all users who borrowed a specific book.
+        """
+        book = self.conn.execute('SELECT id FROM books WHERE name = ?', (book_name,)).fetchone()
+        if book is None:
+            return False
+        cursor = self.conn.execute('''SELECT u.name, u.id FROM loans l JOIN users u ON u.id = l.user_id
+                                      WHERE l.book_id = ? ORDER BY l.rowid''', book)
+        return [self._user(row) for row in cursor.fetchall()]
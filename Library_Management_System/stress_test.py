@@ -0,0 +1,112 @@
+"""
+Stress test for concurrent borrowing: many threads borrow and return
+random books and the copy counts are checked afterwards.
+
+    python stress_test.py --threads 8 --ops 200000
+    python stress_test.py --unsafe     # plain Manager, to see it break
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent_manager import ConcurrentManager
+from libraray_management_system import Manager
+
+def worker(manager, books, users, ops, seed, counts):
+    """
+    Run random borrow/return operations and count the successful ones
+    and the ones that crashed.
+    """
+    rnd = random.Random(seed)
+    borrowed = returned = errors = 0
+    # loans made by this worker, so most returns are valid
+    held = []
+    for _ in range(ops):
+        try:
+            if held and rnd.random() < 0.5:
+                i = rnd.randrange(len(held))
+                held[i], held[-1] = held[-1], held[i]
+                returned += manager.return_book(*held.pop())
+            else:
+                user, book = rnd.choice(users), rnd.choice(books)
+                if manager.borrow_book(user, book):
+                    borrowed += 1
+                    held.append((user, book))
+        except Exception:
+            # only the unsynchronized Manager gets here
+            errors += 1
+    counts.append((borrowed, returned, errors))
+
+def check(manager, quantity):
+    """
+    Check that no book is oversubscribed and that books, users, the
+    borrowers index and the due date index agree on who holds what.
+
+    @Returns:
+        list: Problems found, empty if the state is consistent.
+    """
+    problems = []
+    held = {}
+    for user in manager.users:
+        for book, copies in user.borrowed_books.items():
+            held[book.id] = held.get(book.id, 0) + copies
+            if user.id not in manager.borrowers.get(book.id, {}):
+                problems.append(f'{user.name} holds {book.name} but is not in its borrowers')
+    for book in manager.books:
+        if not 0 <= book.total_borrowed <= quantity:
+            problems.append(f'{book.name}: {book.total_borrowed} of {quantity} copies borrowed')
+        if book.total_borrowed != held.get(book.id, 0):
+            problems.append(f'{book.name}: counter {book.total_borrowed}, users hold {held.get(book.id, 0)}')
+    if len(manager.due_index) != sum(held.values()):
+        problems.append(f'{len(manager.due_index)} loans in the due index, users hold {sum(held.values())} copies')
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent borrow/return stress test')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200000, help='operations in total')
+    parser.add_argument('--books', type=int, default=50)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--quantity', type=int, default=3, help='copies of each book')
+    parser.add_argument('--stripes', type=int, default=64)
+    parser.add_argument('--unsafe', action='store_true', help='use the unsynchronized Manager')
+    args = parser.parse_args()
+
+    # switch threads as often as possible to provoke races
+    sys.setswitchinterval(1e-6)
+    manager = Manager() if args.unsafe else ConcurrentManager(stripes=args.stripes)
+    books = [f'book{i}' for i in range(args.books)]
+    users = [f'user{i}' for i in range(args.users)]
+    manager.add_books((i, name, args.quantity) for i, name in enumerate(books))
+    manager.add_users((name, i) for i, name in enumerate(users))
+
+    counts = []
+    threads = [threading.Thread(target=worker,
+                                args=(manager, books, users, args.ops // args.threads, seed, counts))
+               for seed in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    borrowed = sum(b for b, _, _ in counts)
+    returned = sum(r for _, r, _ in counts)
+    errors = sum(e for _, _, e in counts)
+    outstanding = sum(book.total_borrowed for book in manager.books)
+    print(f'{type(manager).__name__}: {args.threads} threads, '
+          f'{args.ops / elapsed:,.0f} ops/s, {borrowed} borrows, {returned} returns')
+    problems = check(manager, args.quantity)
+    if errors:
+        problems.append(f'{errors} operations raised an exception')
+    if borrowed - returned != outstanding:
+        problems.append(f'{borrowed - returned} copies should be out, counters say {outstanding}')
+    for problem in problems[:10]:
+        print('  ' + problem)
+    print('consistent' if not problems else f'INCONSISTENT ({len(problems)} problems)')
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the library modules import each other by name and the shared code as
+# `common`; run the tests from this system's directory: python -m pytest
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.append(os.path.dirname(HERE))
@@ -0,0 +1,46 @@
+import io
+import pytest
+from batch import BatchRunner
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+
+SCRIPT = '''# a day at the library
+book 1 dune 1
+book\t2\tthe hobbit\t2
+book 3 dune 5
+user ann 1
+user bob 2
+borrow ann dune
+borrow bob dune
+reserve bob dune
+borrow\tann\tthe hobbit
+holds dune
+return ann dune
+borrowers dune
+search the
+find hobit 1
+books
+users
+lend ann dune
+borrow ann
+'''
+
+@pytest.mark.parametrize('cls', [Manager, SQLiteManager])
+def test_script_output(cls):
+    out = io.StringIO()
+    stats = BatchRunner(cls(clock=lambda: 0.0), out, flush_every=2).run(io.StringIO(SCRIPT))
+    assert (stats.commands, stats.failed) == (18, 4)
+    lines = out.getvalue().splitlines()
+    assert lines[:3] == ['line 4: a book named dune or with id 3 already exists',
+                         "line 8: bob can't borrow dune",
+                         'name: bob, id: 2']
+    assert lines[-2:] == ["line 18: unknown command 'lend'",
+                          "line 19: wrong number of arguments for 'borrow'"]
+
+def test_managers_print_the_same():
+    outputs = []
+    for manager in Manager(clock=lambda: 0.0), SQLiteManager(clock=lambda: 0.0):
+        out = io.StringIO()
+        BatchRunner(manager, out).run(SCRIPT.splitlines())
+        outputs.append(out.getvalue())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,101 @@
+import os
+import random
+from book_catalog import BookCatalog
+from common.storage import PersistentStore
+from libraray_management_system import Manager
+
+def books(manager):
+    return [(book.id, book.name, book.total_quantity, book.total_borrowed)
+            for book in manager.iter_books()]
+
+def test_matches_in_memory_manager(tmp_path):
+    catalog = BookCatalog(str(tmp_path / 'books.cat'))
+    mapped, plain = Manager(catalog, clock=lambda: 0.0), Manager(clock=lambda: 0.0)
+    rnd = random.Random(7)
+    for manager in mapped, plain:
+        manager.add_users((f'user{i}', i) for i in range(20))
+    for _ in range(2000):
+        op = rnd.random()
+        if op < 0.2:
+            args = rnd.randrange(10 ** 9), f'book{rnd.randrange(300)}', rnd.randint(1, 3)
+            assert mapped.add_book(*args) == plain.add_book(*args)
+        else:
+            name = 'borrow_book' if op < 0.7 else 'return_book'
+            args = f'user{rnd.randrange(20)}', f'book{rnd.randrange(300)}'
+            assert getattr(mapped, name)(*args) == getattr(plain, name)(*args)
+    assert books(mapped) == books(plain)
+    catalog.close()
+
+def lookups(manager, names):
+    return ([(book.id, book.name) for book in manager.iter_books_by_prefix('')],
+            [[book.name for book in manager.iter_books_by_prefix(pref, 3)] for pref in names + ['b', 'é', '']],
+            [(book := manager.check_book(name)) and (book.id, book.name) for name in names],
+            [(book := manager.get_book_by_id(id)) and book.name for id in range(-5, 60)],
+            [(book.id, book.name) for book in manager.iter_books(7, 9)])
+
+def test_indexes_survive_reopening_and_crashes(tmp_path):
+    path = str(tmp_path / 'books.cat')
+    rnd = random.Random(8)
+    plain, catalog = Manager(), BookCatalog(path)
+    names = ['a', 'b', 'ba', 'bé', 'é', 'z\U0010ffff', 'aa', 'ab'] + [f'b{i}' for i in range(40)]
+    for step in range(4):
+        mapped = Manager(catalog)
+        for _ in range(15):
+            args = rnd.randrange(-5, 60), rnd.choice(names), 1
+            assert mapped.add_book(*args) == plain.add_book(*args)
+        assert lookups(mapped, names) == lookups(plain, names)
+        if step % 2:
+            catalog.close()
+        else:
+            # a crash: the index runs miss the books added since the last flush
+            catalog.map.flush()
+        catalog = BookCatalog(path)
+        if step % 2:
+            # a cleanly closed catalog opens without reading its records
+            assert catalog.ids.added == {} and catalog.names.added == {}
+    assert lookups(Manager(catalog), names) == lookups(plain, names)
+    catalog.close()
+
+def test_sparse_ids_keep_the_file_small(tmp_path):
+    path = str(tmp_path / 'books.cat')
+    catalog = BookCatalog(path)
+    catalog.add(10 ** 12, 'far', 1)
+    catalog.add(3, 'near', 2)
+    assert [(book.id, book.name) for book in catalog] == [(10 ** 12, 'far'), (3, 'near')]
+    catalog.close()
+    assert os.path.getsize(path) < 100 * 1024
+
+def test_reopened_catalog_starts_with_no_loans(tmp_path):
+    path = str(tmp_path / 'books.cat')
+    manager = Manager(BookCatalog(path))
+    manager.add_book(5, 'Dune', 1)
+    manager.add_user('ann', 1)
+    assert manager.borrow_book('ann', 'Dune')
+    manager.catalog.close()
+    # users and loans are not in the file, so neither are the borrowed copies
+    reopened = Manager(BookCatalog(path))
+    assert reopened.get_book_by_id(5).total_borrowed == 0
+    reopened.add_user('bob', 2)
+    assert reopened.borrow_book('bob', 'Dune')
+    assert books(reopened) == [(5, 'Dune', 1, 1)]
+    reopened.catalog.close()
+
+def test_restore_keeps_the_catalog_and_journal(tmp_path):
+    catalog = BookCatalog(str(tmp_path / 'books.cat'))
+    manager = Manager(catalog, clock=lambda: 0.0)
+    manager.add_books([(5, 'Dune', 2), (6, 'Emma', 1)])
+    manager.add_user('ann', 1)
+    assert manager.borrow_book('ann', 'Dune')
+    state = manager.snapshot_state()
+    assert manager.borrow_book('ann', 'Emma')
+    store = PersistentStore(str(tmp_path / 'data'))
+    store.open(manager)
+    manager.restore_state(state)
+    assert manager.catalog is catalog and manager.books is catalog
+    assert manager.journal is store and store.seq == 0
+    assert books(manager) == [(5, 'Dune', 2, 1), (6, 'Emma', 1, 0)]
+    # new books still reach both the catalog file and the journal
+    assert manager.add_book(7, 'Ulysses', 1)
+    assert len(catalog) == 3 and store.seq == 1
+    store.close()
+    catalog.close()
@@ -0,0 +1,22 @@
+import random
+from libraray_management_system import Manager
+
+def test_borrowers_match_a_scan():
+    rnd = random.Random(11)
+    manager = Manager(clock=lambda: 0.0)
+    manager.add_books((i, f'book{i}', 3) for i in range(10))
+    manager.add_users((f'user{i}', i) for i in range(15))
+    for step in range(2000):
+        user, book = f'user{rnd.randrange(15)}', f'book{rnd.randrange(10)}'
+        op = rnd.random()
+        if op < 0.5:
+            manager.borrow_book(user, book)
+        elif op < 0.9:
+            manager.return_book(user, book)
+        else:
+            manager.reserve_book(user, book)
+        if step % 50 == 0:
+            for book in manager.books:
+                holders = [user.id for user in manager.users if user.is_borrowed(book)]
+                assert sorted(user.id for user in manager.users_borrowed(book.name)) == holders
+    assert manager.users_borrowed('missing') is False
@@ -0,0 +1,163 @@
+import pickle
+import random
+import sys
+import threading
+import pytest
+from book_catalog import BookCatalog
+from common.storage import PersistentStore
+from concurrent_manager import ConcurrentManager, LockedDueIndex
+from libraray_management_system import Manager
+from stress_test import check
+
+BOOKS = [f'book{i}' for i in range(100)]
+USERS = [f'user{i}' for i in range(50)]
+
+def populate(manager, quantity = 2):
+    manager.add_books((i, name, quantity) for i, name in enumerate(BOOKS))
+    manager.add_users((name, i) for i, name in enumerate(USERS))
+
+def hammer(manager, threads = 8, ops = 2000):
+    def work(seed):
+        rnd = random.Random(seed)
+        held = []
+        for _ in range(ops):
+            if held and rnd.random() < 0.5:
+                manager.return_book(*held.pop(rnd.randrange(len(held))), 0.0)
+            else:
+                user, book = rnd.choice(USERS), rnd.choice(BOOKS)
+                if manager.borrow_book(user, book, 0.0):
+                    held.append((user, book))
+                elif rnd.random() < 0.3:
+                    manager.reserve_book(user, book)
+    workers = [threading.Thread(target=work, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+@pytest.fixture
+def busy_switching():
+    # switch threads often, so some sit between changing the library and
+    # journaling the change when another one snapshots
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+class KeepingStore(PersistentStore):
+    """
+    Keeps every journaled operation and every snapshot written.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history = []
+        self.snapshots = []
+
+    def record(self, op, *args):
+        seq = self.seq + 1
+        super().record(op, *args)
+        self.history.append((seq, op, args))
+
+    def snapshot(self):
+        super().snapshot()
+        with open(self.path(self.SNAPSHOT), 'rb') as file:
+            self.snapshots.append(pickle.load(file))
+
+def loans(manager):
+    return sorted((user.name, book.name, copies) for user in manager.users
+                  for book, copies in user.borrowed_books.items())
+
+def test_parallel_borrowing_stays_consistent():
+    manager = ConcurrentManager(stripes=8)
+    populate(manager)
+    hammer(manager)
+    assert check(manager, 2) == []
+
+def test_snapshots_hold_no_unjournaled_operations(tmp_path, busy_switching):
+    manager = ConcurrentManager(stripes=8)
+    store = KeepingStore(str(tmp_path), sync_every=10000, snapshot_every=20)
+    store.open(manager)
+    populate(manager)
+    hammer(manager)
+    store.close()
+    assert len(store.snapshots) > 100
+    # an operation already in a snapshot would fail when replayed on it
+    for (seq, state), (end, _) in zip(store.snapshots, store.snapshots[1:]):
+        replica = Manager()
+        replica.restore_state(state)
+        for op_seq, op, args in store.history:
+            if seq < op_seq <= end:
+                assert getattr(replica, op)(*args) is not False, (op_seq, op, args)
+
+def test_snapshots_under_load_recover_the_same_state(tmp_path, busy_switching):
+    manager = ConcurrentManager(stripes=8)
+    store = PersistentStore(str(tmp_path), sync_every=10000, snapshot_every=20)
+    store.open(manager)
+    populate(manager)
+    hammer(manager)
+    store.close()
+    recovered = Manager()
+    reopened = PersistentStore(str(tmp_path))
+    reopened.open(recovered)
+    reopened.close()
+    assert loans(recovered) == loans(manager)
+    assert [(book.name, book.total_borrowed) for book in recovered.books] == \
+           [(book.name, book.total_borrowed) for book in manager.books]
+    assert recovered.snapshot_state()['holds'] == manager.snapshot_state()['holds']
+
+def test_restored_manager_stays_thread_safe(tmp_path, busy_switching):
+    source = Manager()
+    populate(source)
+    manager = ConcurrentManager(stripes=8)
+    locks = manager.locks
+    store = PersistentStore(str(tmp_path))
+    store.open(manager)
+    manager.restore_state(source.snapshot_state())
+    assert manager.locks is locks and manager.journal is not None
+    assert isinstance(manager.due_index, LockedDueIndex)
+    hammer(manager)
+    store.close()
+    assert sum(book.total_borrowed for book in manager.books) == len(manager.due_index)
+
+def test_matches_plain_manager():
+    rnd = random.Random(17)
+    reference, manager = Manager(loan_days=1), ConcurrentManager(stripes=4, loan_days=1)
+    for library in reference, manager:
+        populate(library, quantity=1)
+    for step in range(3000):
+        now = step * 3600.0
+        user, book = rnd.choice(USERS[:10]), rnd.choice(BOOKS[:10])
+        op = rnd.choice(['borrow_book', 'return_book', 'reserve_book', 'cancel_reservation'])
+        args = (user, book, now) if op in ('borrow_book', 'return_book') else (user, book)
+        assert getattr(manager, op)(*args) == getattr(reference, op)(*args)
+        if step % 100 == 0:
+            assert loans(manager) == loans(reference)
+            for name in BOOKS[:10]:
+                assert [user.name for user in manager.hold_queue(name)] == \
+                       [user.name for user in reference.hold_queue(name)]
+                assert sorted(user.name for user in manager.users_borrowed(name) or []) == \
+                       sorted(user.name for user in reference.users_borrowed(name) or [])
+            assert [(loan.user.name, loan.book.name) for loan in manager.print_overdue(now) or []] == \
+                   [(loan.user.name, loan.book.name) for loan in reference.print_overdue(now) or []]
+
+def test_first_borrows_wait_for_the_catalog(tmp_path, busy_switching):
+    catalog = BookCatalog(str(tmp_path / 'books.cat'))
+    for i in range(20000):
+        catalog.add(i, f'title{i}', 1)
+    manager = ConcurrentManager(catalog, stripes=8)
+    manager.add_users((f'user{i}', i) for i in range(8))
+    results = {}
+    barrier = threading.Barrier(8)
+
+    def borrow(i):
+        barrier.wait()
+        # the last titles are indexed last by the first lookup
+        results[i] = manager.borrow_book(f'user{i}', f'title{19999 - i}', 0.0)
+
+    workers = [threading.Thread(target=borrow, args=(i,)) for i in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    catalog.close()
+    assert results == {i: True for i in range(8)}
@@ -0,0 +1,26 @@
+import pytest
+from importer import import_books, import_users
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('cls', [Manager, SQLiteManager])
+def test_import_books_and_users(tmp_path, cls):
+    manager = cls()
+    stats = import_books(manager, write(tmp_path, 'b.csv', 'id,name,quantity\n1,alpha,2\n2,beta,1\n1,dup,1\n'))
+    assert (stats.rows, stats.skipped) == (3, 1)
+    import_users(manager, write(tmp_path, 'u.jsonl', '{"name": "ann", "id": 1}\n'))
+    assert [book.name for book in manager.print_books_by_prefix('')] == ['alpha', 'beta']
+    assert manager.check_user('ann')
+
+def test_failed_import_leaves_prefix_index_usable(tmp_path):
+    manager = Manager()
+    path = write(tmp_path, 'bad.csv', 'id,name,quantity\n1,alpha,2\n2,beta,many\n')
+    with pytest.raises(ValueError):
+        import_books(manager, path, batch_size=1)
+    assert manager.check_book('alpha')
+    assert [book.name for book in manager.print_books_by_prefix('a')] == ['alpha']
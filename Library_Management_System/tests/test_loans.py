@@ -0,0 +1,118 @@
+import random
+import pytest
+from concurrent_manager import ConcurrentManager
+from libraray_management_system import Manager
+from loans import DAY, DueIndex, Loan
+from sqlite_manager import SQLiteManager
+
+MANAGERS = [Manager, ConcurrentManager, SQLiteManager]
+
+def library(cls):
+    manager = cls(clock=lambda: 0.0)
+    manager.add_book(1, 'dune', 1)
+    for id, name in enumerate(('u1', 'u2', 'u3'), 1):
+        manager.add_user(name, id)
+    return manager
+
+@pytest.mark.parametrize('cls', MANAGERS)
+def test_holder_cannot_reserve_own_copy(cls):
+    manager = library(cls)
+    assert manager.borrow_book('u1', 'dune')
+    assert not manager.reserve_book('u1', 'dune')
+    assert manager.reserve_book('u2', 'dune')
+    assert manager.return_book('u1', 'dune')
+    assert [user.name for user in manager.users_borrowed('dune')] == ['u2']
+
+class Reference:
+    """
+    Loans and hold queues as plain lists, scanned on every call.
+    """
+    def __init__(self, copies, loan_days):
+        self.copies = copies
+        self.loan_days = loan_days
+        # [due, lending number, user, book] of the open loans
+        self.loans = []
+        self.lent = 0
+        # book -> users waiting, first in line first
+        self.holds = {}
+
+    def open(self, user = None, book = None):
+        return [loan for loan in self.loans if user in (None, loan[2]) and book in (None, loan[3])]
+
+    def lend(self, user, book, now):
+        if len(self.open(book=book)) >= self.copies[book]:
+            return False
+        self.loans.append([now + self.loan_days * DAY, self.lent, user, book])
+        self.lent += 1
+        return True
+
+    def return_book(self, user, book, now):
+        loans = self.open(user, book)
+        if not loans:
+            return False
+        # the oldest copy goes back
+        self.loans.remove(min(loans, key=lambda loan: loan[1]))
+        if self.holds.get(book):
+            self.lend(self.holds[book].pop(0), book, now)
+        return True
+
+    def reserve_book(self, user, book):
+        if len(self.open(book=book)) < self.copies[book] or self.open(user, book) \
+                or user in self.holds.get(book, []):
+            return False
+        self.holds.setdefault(book, []).append(user)
+        return True
+
+    def cancel_reservation(self, user, book):
+        if user not in self.holds.get(book, []):
+            return False
+        self.holds[book].remove(user)
+        return True
+
+    def overdue(self, now):
+        return [(loan[2], loan[3], loan[0]) for loan in sorted(self.loans) if loan[0] < now]
+
+def test_loans_match_reference():
+    rnd = random.Random(26)
+    copies = {f'book{i}': i % 3 + 1 for i in range(8)}
+    manager, reference = Manager(loan_days=2), Reference(copies, 2)
+    manager.add_books((i, name, count) for i, (name, count) in enumerate(copies.items()))
+    manager.add_users((f'user{i}', i) for i in range(12))
+    now = 0.0
+    for step in range(4000):
+        now += rnd.random() * DAY / 4
+        user, book = f'user{rnd.randrange(12)}', f'book{rnd.randrange(8)}'
+        op = rnd.random()
+        if op < 0.35:
+            assert manager.borrow_book(user, book, now) == reference.lend(user, book, now)
+        elif op < 0.7:
+            assert manager.return_book(user, book, now) == reference.return_book(user, book, now)
+        elif op < 0.9:
+            assert manager.reserve_book(user, book) == reference.reserve_book(user, book)
+        else:
+            assert manager.cancel_reservation(user, book) == reference.cancel_reservation(user, book)
+        if step % 50 == 0:
+            overdue = [(loan.user.name, loan.book.name, loan.due) for loan in manager.print_overdue(now) or []]
+            assert overdue == reference.overdue(now)
+            assert [(loan.user.name, loan.book.name, loan.due) for loan in manager.print_overdue(now, 3) or []] \
+                   == reference.overdue(now)[:3]
+            for book in copies:
+                assert [user.name for user in manager.hold_queue(book)] == reference.holds.get(book, [])
+                assert sorted(user.name for user in manager.users_borrowed(book) or []) == \
+                       sorted({loan[2] for loan in reference.open(book=book)})
+    assert len(manager.due_index) == len(reference.loans)
+
+def test_due_index_compacts_returned_loans():
+    index = DueIndex(compact_ratio=0.5)
+    loans = [Loan(None, None, due) for due in (5.0, 1.0, 3.0, 3.0, 2.0)]
+    for loan in loans:
+        index.add(loan)
+    assert index.due_before(3.5) == [loans[1], loans[4], loans[2], loans[3]]
+    index.discard(loans[2])
+    index.discard(loans[1])
+    assert len(index.entries) == 5 and len(index) == 3
+    # returned loans now outnumber half the entries
+    index.discard(loans[4])
+    assert len(index.entries) == 2 and len(index) == 2
+    assert index.due_before(10.0) == [loans[3], loans[0]]
+    assert index.due_before(10.0, 1) == [loans[3]]
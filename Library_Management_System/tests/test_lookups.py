@@ -0,0 +1,23 @@
+import random
+from libraray_management_system import Manager
+
+def scan(items, attr, value):
+    return next((item for item in items if getattr(item, attr) == value), False)
+
+def test_lookups_match_a_scan():
+    rnd = random.Random(5)
+    manager = Manager()
+    for _ in range(500):
+        id, name = rnd.randrange(200), f'name{rnd.randrange(200)}'
+        if rnd.random() < 0.5:
+            used = scan(manager.books, 'id', id) or scan(manager.books, 'name', name)
+            assert manager.add_book(id, name, 1) == (not used)
+        else:
+            used = scan(manager.users, 'id', id) or scan(manager.users, 'name', name)
+            assert manager.add_user(name, id) == (not used)
+    for value in range(200):
+        name = f'name{value}'
+        assert manager.check_book(name) is scan(manager.books, 'name', name)
+        assert manager.get_book_by_id(value) is scan(manager.books, 'id', value)
+        assert manager.check_user(name) is scan(manager.users, 'name', name)
+        assert manager.get_user_by_id(value) is scan(manager.users, 'id', value)
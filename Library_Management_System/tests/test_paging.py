@@ -0,0 +1,16 @@
+import pytest
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+
+@pytest.mark.parametrize('cls', [Manager, SQLiteManager])
+def test_pages_match_slices(cls):
+    manager = cls()
+    manager.add_books((i, f'book{i}', 1) for i in range(50))
+    manager.add_users((f'user{i}', i) for i in range(50))
+    books = [book.name for book in manager.print_books()]
+    users = [user.name for user in manager.print_users()]
+    assert books == [f'book{i}' for i in range(50)] and users == [f'user{i}' for i in range(50)]
+    for offset, limit in [(0, None), (0, 10), (15, 10), (45, 10), (100, 5), (5, 0)]:
+        end = None if limit is None else offset + limit
+        assert [book.name for book in manager.iter_books(offset, limit)] == books[offset:end]
+        assert [user.name for user in manager.iter_users(offset, limit)] == users[offset:end]
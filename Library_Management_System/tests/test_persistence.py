@@ -0,0 +1,48 @@
+import random
+import pytest
+from common.storage import PersistentStore
+from libraray_management_system import Manager
+
+def run(manager, rnd, steps, start = 0):
+    for step in range(start, start + steps):
+        now = step * 3600.0
+        user, book = f'user{rnd.randrange(10)}', f'book{rnd.randrange(10)}'
+        op = rnd.random()
+        if op < 0.05:
+            manager.add_books([(100 + step, f'extra{step}', 1)])
+        elif op < 0.5:
+            manager.borrow_book(user, book, now)
+        elif op < 0.8:
+            manager.return_book(user, book, now)
+        elif op < 0.95:
+            manager.reserve_book(user, book)
+        else:
+            manager.cancel_reservation(user, book)
+
+def crash(store, directory):
+    # stop without a final snapshot, leaving half a record behind
+    store.close()
+    with open(directory / PersistentStore.JOURNAL, 'a', encoding='utf-8') as file:
+        file.write('[999,"borrow_bo')
+
+@pytest.mark.parametrize('snapshot_every', [None, 1, 7])
+def test_recovery_matches_the_live_manager(tmp_path, snapshot_every):
+    live = Manager()
+    store = PersistentStore(str(tmp_path), sync_every=5, snapshot_every=snapshot_every)
+    store.open(live)
+    live.add_books((i, f'book{i}', 2) for i in range(10))
+    live.add_users((f'user{i}', i) for i in range(10))
+    run(live, random.Random(1), 300)
+    crash(store, tmp_path)
+    recovered = Manager()
+    store = PersistentStore(str(tmp_path), snapshot_every=snapshot_every)
+    store.open(recovered)
+    assert recovered.snapshot_state() == live.snapshot_state()
+    # new records go after the torn one was cut off
+    run(recovered, random.Random(2), 100, 300)
+    store.close()
+    again = Manager()
+    PersistentStore(str(tmp_path)).open(again)
+    assert again.snapshot_state() == recovered.snapshot_state()
+    assert [loan.due for loan in again.print_overdue(10 ** 9) or []] == \
+           [loan.due for loan in recovered.print_overdue(10 ** 9) or []]
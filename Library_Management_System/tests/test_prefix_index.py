@@ -0,0 +1,27 @@
+import random
+from libraray_management_system import Manager, PrefixIndex
+
+NAMES = ['a', 'ab', 'abc', 'abd', 'b', 'ba', '', 'z\U0010ffff', 'z\U0010ffffa', 'z', 'é', 'éa']
+
+def expected(pairs, pref):
+    return [item for name, item in sorted(pairs, key=lambda pair: pair[0]) if name.startswith(pref)]
+
+def test_matches_a_scan():
+    rnd = random.Random(3)
+    pairs = [(rnd.choice(NAMES) + ''.join(rnd.choices('ab', k=rnd.randrange(3))), i) for i in range(300)]
+    added, built = PrefixIndex(), PrefixIndex()
+    for name, item in pairs:
+        added.add(name, item)
+    built.build(pairs)
+    for pref in NAMES + ['abz', 'c', 'z\U0010ffff\U0010ffff']:
+        for index in added, built:
+            assert list(index.iter_prefix(pref)) == expected(pairs, pref)
+            assert list(index.iter_prefix(pref, 2)) == expected(pairs, pref)[:2]
+
+def test_manager_prefix_search():
+    manager = Manager()
+    manager.add_books([(1, 'python basics', 1), (2, 'pyramids', 1), (3, 'rust', 1)])
+    manager.add_book(4, 'python advanced', 1)
+    assert [book.name for book in manager.print_books_by_prefix('pyt')] == ['python advanced', 'python basics']
+    assert [book.name for book in manager.print_books_by_prefix('py', 1)] == ['pyramids']
+    assert manager.print_books_by_prefix('java') is False
@@ -0,0 +1,80 @@
+import functools
+import random
+import pytest
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+import trigram_index
+from trigram_index import TrigramIndex, fuzzy_distance, rank_key
+
+def levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (x != y))
+    return row[-1]
+
+@functools.cache
+def distance(query, name):
+    # edit distance from query to the closest substring of name
+    return min(levenshtein(query, name[i:j]) for i in range(len(name) + 1) for j in range(i, len(name) + 1))
+
+def brute_force(names, query, limit, max_distance):
+    query, matches = query.casefold(), []
+    for name in names:
+        folded = name.casefold()
+        if (edits := distance(query, folded)) <= max_distance:
+            matches.append((rank_key(query, folded, edits), name))
+    return [name for _, name in sorted(matches)][:limit]
+
+WORDS = ['the', 'hobbit', 'python', 'pythons', 'art', 'of', 'war', 'Tale', 'ab', 'ba']
+
+def random_names(rnd, count):
+    names = set()
+    while len(names) < count:
+        names.add(' '.join(rnd.choices(WORDS, k=rnd.randint(1, 3))))
+    return sorted(names)
+
+def queries(rnd):
+    return ['', 'a', 'th', 'HOB', 'pyton', 'pythno', 'tale of', 'xyz', 'war art'] + \
+           [''.join(rnd.choices('abhoprtwy ', k=rnd.randint(1, 6))) for _ in range(20)]
+
+def test_index_matches_brute_force():
+    rnd = random.Random(24)
+    names = random_names(rnd, 120)
+    index = TrigramIndex()
+    for name in names:
+        index.add(name, name)
+    for query in queries(rnd):
+        for max_distance in 0, 1, 2:
+            for limit in 5, None:
+                assert index.search(query, limit, max_distance) == brute_force(names, query, limit, max_distance)
+
+@pytest.mark.parametrize('manager_class', ['memory', 'sqlite'])
+def test_managers_match_brute_force(tmp_path, manager_class):
+    rnd = random.Random(25)
+    names = random_names(rnd, 80)
+    manager = Manager() if manager_class == 'memory' else SQLiteManager(str(tmp_path / 'library.db'))
+    manager.add_books((i, name, 1) for i, name in enumerate(names[:60]))
+    manager.search_books('warm up the index')
+    # books added after the first search are found as well
+    for i, name in enumerate(names[60:], 60):
+        manager.add_book(i, name, 1)
+    for query in queries(rnd):
+        for max_distance in 0, 1:
+            found = manager.search_books(query, 8, max_distance)
+            assert [book.name for book in found or []] == brute_force(names, query, 8, max_distance)
+
+def test_short_fuzzy_queries_skip_the_full_scan_on_large_indexes(monkeypatch, tmp_path):
+    # 'pyton' has 3 trigrams: 1 typo leaves none a match must share
+    assert fuzzy_distance('pyton', 1, 10) == 1
+    assert fuzzy_distance('pyton', 1, trigram_index.FULL_SCAN_LIMIT + 1) == 0
+    assert fuzzy_distance('pythonic war', 3, trigram_index.FULL_SCAN_LIMIT + 1) == 3
+    monkeypatch.setattr(trigram_index, 'FULL_SCAN_LIMIT', 50)
+    names = random_names(random.Random(26), 80)
+    for manager in Manager(), SQLiteManager(str(tmp_path / 'library.db')):
+        manager.add_books((i, name, 1) for i, name in enumerate(names))
+        # only the exact matches, not the full scan's 'python' matches
+        assert manager.search_books('pyton', None, 1) is False
+        found = manager.search_books('pythons war', None, 1)
+        assert [book.name for book in found] == brute_force(names, 'pythons war', None, 1)
@@ -0,0 +1,38 @@
+import random
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+
+def names(items):
+    return [item.name for item in items or []]
+
+def view(manager, now):
+    return {
+        'books': [(book.id, book.name, book.total_quantity, book.total_borrowed) for book in manager.iter_books()],
+        'users': [(user.name, user.id) for user in manager.iter_users()],
+        'borrowers': {book: names(manager.users_borrowed(book)) for book in ('book1', 'book2', 'book3')},
+        'holds': {book: names(manager.hold_queue(book)) for book in ('book1', 'book2', 'book3')},
+        'overdue': [(loan.user.name, loan.book.name, loan.due) for loan in manager.print_overdue(now) or []],
+        'prefix': names(manager.print_books_by_prefix('book1')),
+    }
+
+def test_matches_in_memory_manager(tmp_path):
+    rnd = random.Random(12)
+    reference, database = Manager(loan_days=1), SQLiteManager(str(tmp_path / 'library.db'), loan_days=1)
+    for manager in reference, database:
+        assert manager.add_books([(i, f'book{i}', i % 3 + 1) for i in range(15)] + [(99, 'book1', 1)]) == 1
+        assert manager.add_users([(f'user{i}', i) for i in range(10)] + [('user1', 99)]) == 1
+    for step in range(1500):
+        now = step * 3600.0
+        user, book = f'user{rnd.randrange(11)}', f'book{rnd.randrange(16)}'
+        op = rnd.random()
+        if op < 0.4:
+            assert database.borrow_book(user, book, now) == reference.borrow_book(user, book, now)
+        elif op < 0.7:
+            assert database.return_book(user, book, now) == reference.return_book(user, book, now)
+        elif op < 0.9:
+            assert database.reserve_book(user, book) == reference.reserve_book(user, book)
+        else:
+            assert database.cancel_reservation(user, book) == reference.cancel_reservation(user, book)
+        if step % 100 == 0:
+            assert view(database, now) == view(reference, now)
+    database.close()
@@ -0,0 +1,217 @@
+"""
+Inverted trigram index over book names for substring and typo tolerant search.
+"""
+import bisect
+import heapq
+from array import array
+
+def trigrams(text):
+    """
+    Set of the 3 character substrings of a text.
+    """
+    return {text[idx:idx + 3] for idx in range(len(text) - 2)}
+
+def substring_distance(pattern, text, limit):
+    """
+    Smallest edit distance between pattern and any substring of text
+    (Sellers' algorithm, O(len(pattern) * len(text))).
+
+    @Args:
+        pattern (str): Searched text.
+        text (str): Text searched in.
+        limit (int): Largest distance of interest.
+
+    @Returns:
+        int | None: The distance, or None if it is above limit.
+    """
+    size = len(pattern)
+    # prev[i]: distance of pattern[:i] to the best substring ending at the current position
+    prev = list(range(size + 1))
+    best = prev[size]
+    for char in text:
+        cur = [0]
+        for idx in range(1, size + 1):
+            cur.append(min(prev[idx - 1] + (pattern[idx - 1] != char), prev[idx] + 1, cur[idx - 1] + 1))
+        if cur[size] < best:
+            best = cur[size]
+            if best == 0:
+                break
+        prev = cur
+    return best if best <= limit else None
+
+# most names a fuzzy search checks one by one, see fuzzy_distance()
+FULL_SCAN_LIMIT = 10000
+
+def fuzzy_distance(query, max_distance, count):
+    """
+    Typos a search for query is run with among count names.
+
+    A query with fewer than 3k + 1 trigrams has no trigram a name within
+    k typos must share, so every name has to be checked with a Python
+    edit distance. Up to FULL_SCAN_LIMIT names that full scan is done;
+    above it the query gets only the typos its trigrams can filter
+    (none for a query under 6 characters). count may be a function,
+    called only when the limit matters.
+
+    @Returns:
+        int: max_distance, or lower for a large collection.
+    """
+    usable = max(0, (len(trigrams(query)) - 1) // 3)
+    if max_distance > usable and (count() if callable(count) else count) > FULL_SCAN_LIMIT:
+        return usable
+    return max_distance
+
+def rank_key(query, name, distance):
+    """
+    Sort key of a match, best first: fewest edits, then whole name, name
+    start, word start, anywhere else, then shorter names.
+
+    @Args:
+        query (str): Casefolded query.
+        name (str): Casefolded book name.
+        distance (int): Edits needed to find query in name.
+    """
+    if distance:
+        kind = 4
+    elif name == query:
+        kind = 0
+    elif name.startswith(query):
+        kind = 1
+    elif ' ' + query in name:
+        kind = 2
+    else:
+        kind = 3
+    return distance, kind, len(name), name
+
+def verify(query, name, max_distance, need = 0):
+    """
+    Edits needed to find query in name, or None if more than max_distance.
+    need is the number of query trigrams a close enough name must
+    contain, checked first as a cheap filter.
+    """
+    if query in name:
+        return 0
+    if not max_distance:
+        return None
+    if need > 0 and sum(gram in name for gram in trigrams(query)) < need:
+        return None
+    return substring_distance(query, name, max_distance)
+
+class TrigramIndex:
+    """
+    Maps every trigram of the (casefolded) names to the sorted ids of
+    the names containing it.
+
+    A substring query only looks at names containing all its trigrams,
+    found by intersecting their posting lists from the shortest one.
+    A query with up to k typos still shares all but 3k of its trigrams
+    with the matching name, so candidates come from the 3k + 1 rarest
+    query trigrams only. Candidates are verified and ranked with
+    rank_key(). Postings are compact arrays of ids and grow in place,
+    so adding a name is O(len(name)).
+
+    A query with too few trigrams for its typos falls back to checking
+    every name, see fuzzy_distance().
+    """
+    def __init__(self):
+        self.names = []
+        self.items = []
+        # trigram -> ids of names containing it, ascending
+        self.postings = {}
+        # ids of names too short to have a trigram
+        self.short = []
+
+    def add(self, name, item):
+        """
+        Index one name and its item.
+        """
+        id = len(self.items)
+        name = name.casefold()
+        self.names.append(name)
+        self.items.append(item)
+        grams = trigrams(name)
+        if not grams:
+            self.short.append(id)
+        postings = self.postings
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('I')
+            posting.append(id)
+
+    def build(self, pairs):
+        """
+        Replace the index content with (name, item) pairs.
+        """
+        self.__init__()
+        for name, item in pairs:
+            self.add(name, item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _substring_candidates(self, query):
+        # ids of names that may contain query
+        grams = trigrams(query)
+        if not grams:
+            if not query:
+                return range(len(self.items))
+            # 1 or 2 characters: every name with a trigram containing them
+            ids = set(self.short)
+            for gram, posting in self.postings.items():
+                if query in gram:
+                    ids.update(posting)
+            return sorted(ids)
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        ids = lists[0]
+        for posting in lists[1:]:
+            if not ids:
+                break
+            ids = [id for id in ids if self._contains(posting, id)]
+        return ids
+
+    @staticmethod
+    def _contains(posting, id):
+        idx = bisect.bisect_left(posting, id)
+        return idx < len(posting) and posting[idx] == id
+
+    def _fuzzy_candidates(self, query, max_distance):
+        # ids of names that may contain query with up to max_distance edits,
+        # and the number of query trigrams they must contain
+        grams = trigrams(query)
+        need = len(grams) - 3 * max_distance
+        if need < 1:
+            # too short a query for its typos: no trigram is guaranteed to
+            # match, fuzzy_distance() allows this on small indexes only
+            return range(len(self.items)), 0
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        ids = set()
+        for posting in lists[:len(grams) - need + 1]:
+            ids.update(posting)
+        return sorted(ids), need
+
+    def search(self, query, limit = 10, max_distance = 0):
+        """
+        Find items whose name contains query, ignoring case, best matches first.
+
+        @Args:
+            query (str): Text to look for anywhere in the names.
+            limit (int | None): Maximum number of items returned.
+            max_distance (int): Typos (inserted, deleted or replaced
+                characters) allowed between query and the matched text,
+                lowered by fuzzy_distance() on large indexes.
+
+        @Returns:
+            list: Matching items ranked by rank_key().
+        """
+        query = query.casefold()
+        max_distance = fuzzy_distance(query, max_distance, len(self.items))
+        if max_distance:
+            ids, need = self._fuzzy_candidates(query, max_distance)
+        else:
+            ids, need = self._substring_candidates(query), 0
+        names = self.names
+        matches = ((rank_key(query, names[id], distance), id) for id in ids
+                   if (distance := verify(query, names[id], max_distance, need)) is not None)
+        ranked = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+        return [self.items[id] for _, id in ranked]
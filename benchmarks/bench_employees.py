@@ -0,0 +1,45 @@
+"""
+Employee system benchmarks: add_emp, update_salary, delete_by_age.
+"""
+from harness import case, main, use_system
+
+use_system('Employees_System')
+from backend.columnar_employee_manager import ColumnarEmployeeManager
+from backend.employee_manager import EmployeeManager
+from backend.sqlite_employee_manager import SQLiteEmployeeManager
+
+MANAGERS = {'default': EmployeeManager, 'columnar': ColumnarEmployeeManager,
+            'sqlite': SQLiteEmployeeManager}
+
+def rows(count, rnd, first = 0):
+    return [(f'emp{i}', rnd.randint(18, 65), rnd.randint(1000, 10000))
+            for i in range(first, first + count)]
+
+def populated(scale, rnd, manager):
+    employees = MANAGERS[manager]()
+    employees.add_emps(rows(scale, rnd))
+    return employees
+
+@case
+def add_emp(scale, ops, rnd, manager):
+    # the last `ops` of `scale` employees are added one by one
+    ops = min(ops, scale)
+    employees = populated(scale - ops, rnd, manager)
+    return employees.add_emp, rows(ops, rnd, scale - ops)
+
+@case
+def update_salary(scale, ops, rnd, manager):
+    employees = populated(scale, rnd, manager)
+    return employees.update_salary, [(f'emp{rnd.randrange(scale)}', rnd.randint(1000, 10000))
+                                     for _ in range(ops)]
+
+@case
+def delete_by_age(scale, ops, rnd, manager):
+    # each call deletes one age, so there are at most 48 calls
+    employees = populated(scale, rnd, manager)
+    ages = list(range(18, 66))
+    rnd.shuffle(ages)
+    return employees.delete_by_age, [(age, age) for age in ages[:ops]]
+
+if __name__ == '__main__':
+    main(tuple(MANAGERS))
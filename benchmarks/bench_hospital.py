@@ -0,0 +1,45 @@
+"""
+Hospital system benchmarks: add_patient, get_next, remove_patient.
+"""
+from harness import case, main, use_system
+
+use_system('Hospital_System')
+from backend.hospital_manager import HospitalManager
+from backend.sharded_hospital_manager import ShardedHospitalManager
+from backend.sqlite_hospital_manager import SQLiteHospitalManager
+
+SPECIALIZATIONS = 20
+MANAGERS = {'default': lambda: HospitalManager(SPECIALIZATIONS, capacity=None),
+            'sqlite': lambda: SQLiteHospitalManager(specializations=SPECIALIZATIONS, capacity=None),
+            'sharded': lambda: ShardedHospitalManager(SPECIALIZATIONS, capacity=None, workers=4)}
+
+def rows(count, rnd, first = 0):
+    # patient i waits in specialization i % 20 + 1
+    return [(f'patient{i}', rnd.randrange(3), i % SPECIALIZATIONS + 1)
+            for i in range(first, first + count)]
+
+def populated(scale, rnd, manager):
+    hospital = MANAGERS[manager]()
+    hospital.add_patients(rows(scale, rnd))
+    return hospital
+
+@case
+def add_patient(scale, ops, rnd, manager):
+    # the last `ops` of `scale` patients are added one by one
+    ops = min(ops, scale)
+    hospital = populated(scale - ops, rnd, manager)
+    return hospital.add_patient, rows(ops, rnd, scale - ops)
+
+@case
+def get_next(scale, ops, rnd, manager):
+    hospital = populated(scale, rnd, manager)
+    return hospital.get_next, [(rnd.randrange(SPECIALIZATIONS) + 1,) for _ in range(min(ops, scale))]
+
+@case
+def remove_patient(scale, ops, rnd, manager):
+    hospital = populated(scale, rnd, manager)
+    return hospital.remove_patient, [(f'patient{i}', i % SPECIALIZATIONS + 1)
+                                     for i in rnd.sample(range(scale), min(ops, scale))]
+
+if __name__ == '__main__':
+    main(tuple(MANAGERS))
@@ -0,0 +1,54 @@
+"""
+Library system benchmarks: borrow_book, return_book,
+print_books_by_prefix, users_borrowed.
+"""
+from harness import case, main, use_system
+
+use_system('Library_Management_System')
+from concurrent_manager import ConcurrentManager
+from libraray_management_system import Manager
+from sqlite_manager import SQLiteManager
+
+MANAGERS = {'default': Manager, 'concurrent': ConcurrentManager, 'sqlite': SQLiteManager}
+
+def populated(scale, rnd, manager, copies = 1):
+    # scale books with zero padded names, one user per ten books
+    library = MANAGERS[manager]()
+    library.add_books((i, f'book{i:08d}', copies) for i in range(scale))
+    library.add_users((f'user{i}', i) for i in range(scale // 10 + 1))
+    return library
+
+def random_loans(scale, count, rnd):
+    return [(f'user{rnd.randrange(scale // 10 + 1)}', f'book{rnd.randrange(scale):08d}')
+            for _ in range(count)]
+
+@case
+def borrow_book(scale, ops, rnd, manager):
+    library = populated(scale, rnd, manager, copies=ops)
+    return library.borrow_book, random_loans(scale, ops, rnd)
+
+@case
+def return_book(scale, ops, rnd, manager):
+    library = populated(scale, rnd, manager, copies=ops)
+    loans = random_loans(scale, ops, rnd)
+    for user, book in loans:
+        library.borrow_book(user, book)
+    rnd.shuffle(loans)
+    return library.return_book, loans
+
+@case
+def print_books_by_prefix(scale, ops, rnd, manager):
+    # dropping the last two digits matches up to 100 books
+    library = populated(scale, rnd, manager)
+    return library.print_books_by_prefix, [(f'book{rnd.randrange(scale):08d}'[:-2],)
+                                           for _ in range(ops)]
+
+@case
+def users_borrowed(scale, ops, rnd, manager):
+    library = populated(scale, rnd, manager, copies=scale)
+    for user, book in random_loans(scale, scale, rnd):
+        library.borrow_book(user, book)
+    return library.users_borrowed, [(f'book{rnd.randrange(scale):08d}',) for _ in range(ops)]
+
+if __name__ == '__main__':
+    main(tuple(MANAGERS))
@@ -0,0 +1,127 @@
+"""
+Shared timing code for the benchmark modules.
+
+A benchmark module defines cases with the @case decorator. A case gets
+the dataset scale, a seeded Random and the manager variant name, builds
+its dataset (not timed) and returns the operation to time together with
+the list of argument tuples to call it with:
+
+    @case
+    def get_next(scale, ops, rnd, manager):
+        ...
+        return hospital.get_next, [(sp,) for sp in ...]
+
+Each case runs in its own process (see run.py), so peak memory is the
+process's peak resident set size and the three systems, which all use a
+package named `backend`, never meet in one interpreter. Worker processes
+a manager starts (the sharded hospital) are reported separately as
+workers_peak_rss_kb.
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+CASES = {}
+
+def case(function):
+    """
+    Registers a benchmark case under its function name.
+    """
+    CASES[function.__name__] = function
+    return function
+
+def use_system(name):
+    """
+    Makes a system directory importable, e.g. use_system('Hospital_System').
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), name))
+
+def percentile(ordered, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return 0
+    return ordered[max(0, -(-q * len(ordered) // 100) - 1)]
+
+def workers_peak_rss_kb():
+    """
+    Summed peak resident set size of the worker processes, in kilobytes.
+
+    RUSAGE_CHILDREN only covers children that were already waited for,
+    and only the largest of them, so running workers are read from
+    /proc/<pid>/status (VmHWM) instead.
+    """
+    total = 0
+    for child in multiprocessing.active_children():
+        try:
+            with open(f'/proc/{child.pid}/status', encoding='ascii') as file:
+                total += next((int(line.split()[1]) for line in file if line.startswith('VmHWM:')), 0)
+        except OSError:
+            pass
+    return total + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+def measure(op, calls):
+    """
+    Calls op(*args) for every args tuple and returns the latency of each
+    call in nanoseconds.
+    """
+    clock = time.perf_counter_ns
+    latencies = [0] * len(calls)
+    for idx, args in enumerate(calls):
+        start = clock()
+        op(*args)
+        latencies[idx] = clock() - start
+    return latencies
+
+def run_case(name, scale, ops, seed, manager):
+    """
+    Builds and times one case.
+
+    Returns:
+        dict: ops, seconds, ops_per_sec, p50_us, p99_us, setup_seconds, peak_rss_kb,
+        workers_peak_rss_kb
+    """
+    rnd = random.Random(seed)
+    start = time.perf_counter()
+    op, calls = CASES[name](scale, ops, rnd, manager)
+    setup = time.perf_counter() - start
+    gc.collect()
+    latencies = measure(op, calls)
+    total = sum(latencies) / 1e9
+    latencies.sort()
+    return {
+        'ops': len(calls),
+        'seconds': total,
+        'ops_per_sec': len(calls) / total if total else float('inf'),
+        'p50_us': percentile(latencies, 50) / 1000,
+        'p99_us': percentile(latencies, 99) / 1000,
+        'setup_seconds': setup,
+        # kilobytes on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'workers_peak_rss_kb': workers_peak_rss_kb(),
+    }
+
+def main(managers = ('default',)):
+    """
+    Command line entry point of a benchmark module: runs one case and
+    prints its result as JSON, or lists the cases with --list.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--list', action='store_true', help='print the case names and managers')
+    parser.add_argument('--case')
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--ops', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--manager', default=managers[0], choices=managers)
+    args = parser.parse_args()
+    if args.list:
+        print(json.dumps({'cases': list(CASES), 'managers': list(managers)}))
+        return
+    print(json.dumps(run_case(args.case, args.scale, args.ops, args.seed, args.manager)))
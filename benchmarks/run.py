@@ -0,0 +1,129 @@
+"""
+Runs the benchmark suite and writes the results as JSON.
+
+    python benchmarks/run.py --scales 1000 100000 --output results.json
+    python benchmarks/run.py --systems hospital --managers default sqlite
+    python benchmarks/run.py --output new.json --compare results.json
+
+Every (system, manager, case, scale) runs in a fresh process and
+reports ops/sec, p50/p99 latency in microseconds and peak RSS (the
+benchmark process plus any worker processes it started).
+With --compare, ops/sec is checked against an earlier results file and
+the exit status is 1 if any case got slower than --threshold percent.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SYSTEMS = {'employees': 'bench_employees.py', 'hospital': 'bench_hospital.py',
+           'library': 'bench_library.py'}
+
+def bench(system, *args):
+    """
+    Runs a benchmark module with arguments and returns its JSON output.
+    """
+    output = subprocess.run([sys.executable, os.path.join(HERE, SYSTEMS[system]), *map(str, args)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_mb(result):
+    # results written before worker memory was measured have no workers entry
+    return (result['peak_rss_kb'] + result.get('workers_peak_rss_kb', 0)) / 1024
+
+def key(result):
+    return result['system'], result['case'], result['manager'], result['scale']
+
+def compare(results, baseline, threshold):
+    """
+    Prints the ops/sec change of every case found in the baseline.
+
+    Returns:
+        int: Number of regressions beyond the threshold
+    """
+    old = {key(result): result for result in baseline['results']}
+    regressions = 0
+    for result in results:
+        if (before := old.get(key(result))) is None:
+            continue
+        change = (result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100
+        slower = change < -threshold
+        regressions += slower
+        print(f'{" ".join(map(str, key(result))):<50} {change:+7.1f}%{"  REGRESSION" if slower else ""}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for the three management systems')
+    parser.add_argument('--systems', nargs='+', default=list(SYSTEMS), choices=list(SYSTEMS))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1000, 10000, 100000],
+                        help='dataset sizes, e.g. 1000 up to 10000000')
+    parser.add_argument('--ops', type=int, default=100000,
+                        help='maximum timed operations per case (default 100000)')
+    parser.add_argument('--managers', nargs='+', default=['default'],
+                        help='manager variants to run, where a system has them')
+    parser.add_argument('--cases', nargs='+', help='only run these cases')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='ops/sec drop in percent counted as a regression (default 10)')
+    args = parser.parse_args()
+    available = {system: bench(system, '--list') for system in args.systems}
+    # a name no selected system knows would silently run nothing
+    for option, names in ('managers', args.managers), ('cases', args.cases or []):
+        known = {name for listing in available.values() for name in listing[option]}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            parser.error(f'unknown {option} {", ".join(unknown)} (available: {", ".join(sorted(known))})')
+
+    results = []
+    print(f'{"system":<10} {"case":<22} {"manager":<10} {"scale":>9} '
+          f'{"ops/s":>12} {"p50 us":>9} {"p99 us":>9} {"peak MB":>8}')
+    for system in args.systems:
+        for manager in [m for m in args.managers if m in available[system]['managers']]:
+            for name in available[system]['cases']:
+                if args.cases and name not in args.cases:
+                    continue
+                for scale in args.scales:
+                    result = bench(system, '--case', name, '--scale', scale, '--ops', args.ops,
+                                   '--seed', args.seed, '--manager', manager)
+                    result = {'system': system, 'case': name, 'manager': manager,
+                              'scale': scale, **result}
+                    results.append(result)
+                    print(f'{system:<10} {name:<22} {manager:<10} {scale:>9} '
+                          f'{result["ops_per_sec"]:>12,.0f} {result["p50_us"]:>9.2f} '
+                          f'{result["p99_us"]:>9.2f} {peak_mb(result):>8.1f}', flush=True)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'revision': git_revision(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': args.seed,
+            'ops': args.ops,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Code shared by the Employees, Hospital and Library systems: the journal
+and snapshot store, opt-in metrics and the batch command runner.
+"""
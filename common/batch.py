@@ -0,0 +1,171 @@
+"""
+Batch command runner shared by the three systems: replays a script of
+commands without menus. Each system subclasses BatchRunner with its own
+command table.
+"""
+import inspect
+import sys
+import time
+
+class BatchStats:
+    """
+    Result of a batch run: commands executed, commands failed and time taken.
+    """
+    def __init__(self, commands, failed, seconds):
+        self.commands = commands
+        self.failed = failed
+        self.seconds = seconds
+
+    @property
+    def rate(self):
+        """
+        Commands per second.
+        """
+        return self.commands / self.seconds if self.seconds else float('inf')
+
+    def __str__(self):
+        return (f'Ran {self.commands} commands ({self.failed} failed) '
+                f'in {self.seconds:.2f}s ({self.rate:,.0f} commands/s)')
+
+
+class BatchRunner:
+    """
+    Runs a script of commands against a manager without menus or prompts,
+    for replaying a day's transactions or load testing.
+
+    One command per line, fields separated by whitespace, or by tabs
+    when a line contains a tab (for names with spaces). Blank lines and
+    lines starting with # are skipped.
+
+    Subclasses fill self.commands: command name -> method taking the
+    fields and returning (succeeded, output text or None).
+
+    Output is collected and written in chunks of `flush_every` lines.
+    Failed commands are reported as 'line N: reason'. The number of
+    fields is checked against the command's method before it runs, so
+    a TypeError raised by the manager itself is not mistaken for one.
+
+    When the manager has an execute(calls) method, the commands listed in
+    self.calls are sent to it in batches of up to `pipeline` calls
+    instead of one by one. Any other command runs after the batch before
+    it, so output stays in line order.
+    """
+    def __init__(self, manager, out = None, flush_every = 10000, pipeline = 1000):
+        """
+        Args:
+            manager: Manager the commands run against
+            out: Text stream for the output, sys.stdout by default
+            flush_every (int): Output lines buffered before each write
+            pipeline (int): Calls per execute() batch
+        """
+        self.manager = manager
+        self.out = out if out is not None else sys.stdout
+        self.flush_every = flush_every
+        self.pipeline = pipeline
+        self.execute = getattr(manager, 'execute', None)
+        self.commands = {}
+        # commands that can be pipelined: name -> method taking the fields
+        # and returning a call (see run_call) or None to run the command itself
+        self.calls = {}
+
+    def run(self, lines):
+        """
+        Executes every command read from an iterable of lines
+        (an open file, sys.stdin or a list).
+
+        Returns:
+            BatchStats
+        """
+        commands = self.commands
+        calls = self.calls if self.execute is not None else {}
+        # command name -> signature of its method, to check the arity
+        signatures = {}
+        buffer = []
+        # (line number, call) waiting for the next execute() batch
+        pending = []
+        count = failed = 0
+        start = time.perf_counter()
+        for number, line in enumerate(lines, 1):
+            fields = line.rstrip('\r\n').split('\t') if '\t' in line else line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            count += 1
+            handler = commands.get(fields[0])
+            try:
+                if handler is None:
+                    raise ValueError(f'unknown command {fields[0]!r}')
+                signature = signatures.get(fields[0])
+                if signature is None:
+                    # a pipelined command's fields are those of its call method
+                    signature = signatures[fields[0]] = inspect.signature(self.calls.get(fields[0], handler))
+                try:
+                    signature.bind(*fields[1:])
+                except TypeError:
+                    raise ValueError(f'wrong number of arguments for {fields[0]!r}') from None
+                call = calls[fields[0]](*fields[1:]) if fields[0] in calls else None
+                if call is not None:
+                    pending.append((number, call))
+                    if len(pending) >= self.pipeline:
+                        failed += self.drain(pending, buffer)
+                    continue
+                failed += self.drain(pending, buffer)
+                ok, output = handler(*fields[1:])
+            except ValueError as error:
+                ok, output = False, str(error)
+            failed += self.drain(pending, buffer)
+            failed += self.emit(number, ok, output, buffer)
+        failed += self.drain(pending, buffer)
+        self.flush(buffer)
+        return BatchStats(count, failed, time.perf_counter() - start)
+
+    def emit(self, number, ok, output, buffer):
+        """
+        Buffers the output of one command.
+
+        Returns:
+            int: 1 if the command failed, else 0
+        """
+        if not ok:
+            output = f'line {number}: {output}'
+        if output:
+            buffer.append(output)
+            if len(buffer) >= self.flush_every:
+                self.flush(buffer)
+        return not ok
+
+    def drain(self, pending, buffer):
+        """
+        Runs the pending calls in one execute() batch and buffers their output.
+        The calls leave the queue even if the batch raises, so they never
+        run twice.
+
+        Returns:
+            int: Number of failed commands
+        """
+        if not pending:
+            return 0
+        batch = pending[:]
+        try:
+            results = self.execute([(method, args) for _, (method, args, _) in batch])
+        finally:
+            pending.clear()
+        failed = 0
+        for (number, (_, _, finish)), result in zip(batch, results):
+            failed += self.emit(number, *finish(result), buffer)
+        return failed
+
+    def flush(self, buffer):
+        """
+        Writes the buffered output lines at once.
+        """
+        if buffer:
+            self.out.write('\n'.join(buffer) + '\n')
+            buffer.clear()
+
+    def run_call(self, call):
+        """
+        Runs one call directly. A call is (manager method name, args,
+        function turning the method's result into (succeeded, output)).
+        """
+        method, args, finish = call
+        return finish(getattr(self.manager, method)(*args))
@@ -0,0 +1,81 @@
+"""
+Streaming bulk import pipeline shared by the three systems: records are
+read from CSV or JSONL files, parsed, and fed to a manager in batches.
+Each system provides its own parser and bulk add method.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+class ImportStats:
+    """
+    Result of a bulk import: rows read, rows skipped and time taken.
+    """
+    def __init__(self, rows, skipped, seconds):
+        self.rows = rows
+        self.skipped = skipped
+        self.seconds = seconds
+
+    @property
+    def rate(self):
+        """
+        Rows per second.
+        """
+        return self.rows / self.seconds if self.seconds else float('inf')
+
+    def __str__(self):
+        return (f'Imported {self.rows - self.skipped} of {self.rows} rows '
+                f'in {self.seconds:.2f}s ({self.rate:,.0f} rows/s)')
+
+
+def read_records(path):
+    """
+    Streams records from a CSV file with a header row or a JSONL file
+    (one JSON object per line) as dicts, one line at a time.
+    The format is chosen by the file extension.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.endswith('.jsonl'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def batched(rows, size):
+    """
+    Groups rows into lists of at most `size` rows.
+    """
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def import_rows(add_many, rows, batch_size, finish = None):
+    """
+    Feeds batches of parsed rows to a bulk add method, so only one batch
+    is held in memory at a time, then calls finish() once (used to
+    rebuild indexes skipped during the batches). finish() also runs when
+    a bad row stops the import, so the rows added before it are indexed.
+
+    Args:
+        add_many: Adds a list of rows, returns the number it rejected
+        rows: Iterable of parsed rows
+        batch_size (int): Rows per add_many call
+        finish: Called once after the last batch, or None
+
+    Returns:
+        ImportStats
+    """
+    start = time.perf_counter()
+    count = skipped = 0
+    try:
+        for batch in batched(rows, batch_size):
+            skipped += add_many(batch)
+            count += len(batch)
+    finally:
+        if finish is not None:
+            finish()
+    return ImportStats(count, skipped, time.perf_counter() - start)
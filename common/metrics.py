@@ -0,0 +1,194 @@
+"""
+Opt-in manager metrics in the Prometheus text format, shared by the
+three systems. Each system registers its own gauges.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Histogram:
+    """
+    Latency histogram with fixed, cumulative-on-export buckets (seconds).
+    """
+    BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+               1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self):
+        # one extra slot for values above the last bucket (+Inf)
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Metrics:
+    """
+    Registry of call counts, latency histograms, error counts and gauges
+    for one manager, exported in the Prometheus text format.
+
+    Gauges are functions evaluated at export time, returning a number or
+    a dict of label value -> number.
+    """
+    def __init__(self, prefix):
+        """
+        Args:
+            prefix (str): Metric name prefix, e.g. 'hospital'
+        """
+        self.prefix = prefix
+        self.latency = {}
+        self.errors = {}
+        self.gauges = {}
+
+    def observe(self, method, seconds):
+        histogram = self.latency.get(method)
+        if histogram is None:
+            histogram = self.latency[method] = Histogram()
+        histogram.observe(seconds)
+
+    def error(self, method):
+        self.errors[method] = self.errors.get(method, 0) + 1
+
+    def gauge(self, name, help, function, label = None):
+        """
+        Registers a gauge.
+
+        Args:
+            name (str): Metric name without the prefix
+            help (str): Description shown in the export
+            function: Returns the current value, or a dict of
+                      label value -> value when label is given
+            label (str | None): Label name for dict values
+        """
+        self.gauges[name] = (help, function, label)
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        p = self.prefix
+        lines = [f'# HELP {p}_calls_total Manager method calls.',
+                 f'# TYPE {p}_calls_total counter']
+        for method, histogram in sorted(self.latency.items()):
+            lines.append(f'{p}_calls_total{{method="{method}"}} {histogram.count}')
+        lines += [f'# HELP {p}_errors_total Manager method calls that raised.',
+                  f'# TYPE {p}_errors_total counter']
+        for method, count in sorted(self.errors.items()):
+            lines.append(f'{p}_errors_total{{method="{method}"}} {count}')
+        lines += [f'# HELP {p}_call_seconds Manager method latency.',
+                  f'# TYPE {p}_call_seconds histogram']
+        for method, histogram in sorted(self.latency.items()):
+            total = 0
+            for bound, count in zip(Histogram.BUCKETS + ('+Inf',), histogram.counts):
+                total += count
+                lines.append(f'{p}_call_seconds_bucket{{method="{method}",le="{bound}"}} {total}')
+            lines.append(f'{p}_call_seconds_sum{{method="{method}"}} {histogram.sum}')
+            lines.append(f'{p}_call_seconds_count{{method="{method}"}} {histogram.count}')
+        for name, (help, function, label) in sorted(self.gauges.items()):
+            lines += [f'# HELP {p}_{name} {help}', f'# TYPE {p}_{name} gauge']
+            value = function()
+            if label is None:
+                lines.append(f'{p}_{name} {value}')
+            else:
+                for key, item in sorted(value.items()):
+                    lines.append(f'{p}_{name}{{{label}="{key}"}} {item}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Writes the metrics to a file, replacing it atomically so a
+        scraper (e.g. the node exporter textfile collector) never reads
+        a partial file.
+        """
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port, host = '127.0.0.1'):
+        """
+        Serves the metrics at http://host:port/metrics from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: Call shutdown() on it to stop serving
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def instrument(manager, metrics, methods = None):
+    """
+    Times the public methods of one manager object and records them in
+    metrics. The wrappers are set on the instance only, so managers that
+    are not instrumented keep running the plain methods with no overhead.
+    Generator methods (iter_*) are timed until they return the iterator.
+    Calls a manager method makes to other methods of the same manager
+    are part of the outer call and are not counted on their own.
+
+    Args:
+        manager: Manager object to instrument
+        metrics (Metrics): Registry receiving the measurements
+        methods (list | None): Method names, all public methods by default
+    """
+    if methods is None:
+        methods = [name for name in dir(type(manager))
+                   if not name.startswith('_') and callable(getattr(type(manager), name))]
+    # per thread: whether an instrumented call of this manager is running
+    local = threading.local()
+    for name in methods:
+        setattr(manager, name, _timed(getattr(manager, name), name, metrics, local))
+    return manager
+
+
+def uninstrument(manager):
+    """
+    Removes the wrappers set by instrument().
+    """
+    for name, value in list(vars(manager).items()):
+        if getattr(value, '__wrapped__', None) is not None and callable(value):
+            delattr(manager, name)
+
+
+def _timed(method, name, metrics, local):
+    clock = time.perf_counter
+    observe = metrics.observe
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if getattr(local, 'active', False):
+            return method(*args, **kwargs)
+        local.active = True
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            metrics.error(name)
+            raise
+        finally:
+            observe(name, clock() - start)
+            local.active = False
+    return wrapper
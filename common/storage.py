@@ -0,0 +1,193 @@
+"""
+Append-only journal and snapshot persistence shared by the managers of
+the three systems.
+
+The systems import the `common` package from the repository root. Each
+one appends the root to sys.path where it is first imported (the
+Employees and Hospital backend packages, libraray_management_system.py
+for the library), so this works however a system is started.
+"""
+import json
+import os
+import pickle
+import time
+
+class Journal:
+    """
+    Append-only operation log, one JSON line per operation:
+        [sequence number, operation name, [arguments]]
+
+    Writes are flushed to the OS on every record, but fsync is batched:
+    it runs once every `sync_every` records or once `sync_interval`
+    seconds have passed, whichever comes first. sync_every=1 makes every
+    operation durable; larger values trade durability for throughput.
+    """
+    def __init__(self, path, sync_every = 1, sync_interval = None):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.file = open(path, 'a', encoding='utf-8')
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, seq, op, args):
+        self.file.write(json.dumps([seq, op, args], separators=(',', ':')) + '\n')
+        self.file.flush()
+        self.pending += 1
+        if self.pending >= self.sync_every or (
+                self.sync_interval is not None
+                and time.monotonic() - self.last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """
+        Forces pending records to disk.
+        """
+        if self.pending:
+            os.fsync(self.file.fileno())
+            self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+    @staticmethod
+    def read(path):
+        """
+        Yields (seq, op, args) records from a journal file.
+        A torn last line left by a crash is cut off so new records
+        are appended after the last complete one.
+        """
+        if not os.path.exists(path):
+            return
+        good = 0
+        with open(path, 'rb') as file:
+            for line in file:
+                try:
+                    seq, op, args = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                yield seq, op, args
+        if good < os.path.getsize(path):
+            with open(path, 'r+b') as file:
+                file.truncate(good)
+
+
+class PersistentStore:
+    """
+    Keeps a manager's state in a directory:
+        snapshot.bin - pickled manager.snapshot_state() and the last
+                       sequence number it includes
+        journal.log  - operations recorded after that snapshot
+
+    Recovery loads the snapshot and replays the journal tail by calling
+    the recorded manager methods again. A snapshot is written every
+    `snapshot_every` operations (if set) and the journal then restarts.
+
+    The manager must provide snapshot_state() and restore_state(state)
+    and call store.record(op, *args) through its `journal` attribute
+    after each successful mutation, never before: a snapshot taken inside
+    record() must already contain the operation being recorded. A program
+    opens the store before accepting operations, so they apply to the
+    recovered state, and calls snapshot() on a clean exit so the next
+    start replays nothing.
+
+    A manager shared by threads must not be snapshotted from inside
+    record(): another thread may have applied an operation and not yet
+    journaled it, so the snapshot would hold it and the journal replay it
+    again. Such a manager sets auto_snapshot to False and calls
+    snapshot() itself, while no operation is running, when snapshot_due.
+    """
+    SNAPSHOT = 'snapshot.bin'
+    JOURNAL = 'journal.log'
+
+    def __init__(self, directory, sync_every = 1,
+                 sync_interval = None, snapshot_every = None):
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.manager = None
+        self.journal = None
+        self.seq = 0
+        self.since_snapshot = 0
+        self.auto_snapshot = True
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def open(self, manager):
+        """
+        Recovers the manager from disk, then starts recording its operations.
+
+        Returns:
+            int: Number of journal operations replayed
+        """
+        self.manager = manager
+        manager.journal = None
+        snapshot_seq = 0
+        if os.path.exists(self.path(self.SNAPSHOT)):
+            with open(self.path(self.SNAPSHOT), 'rb') as file:
+                snapshot_seq, state = pickle.load(file)
+            manager.restore_state(state)
+        self.seq = snapshot_seq
+        replayed = 0
+        for seq, op, args in Journal.read(self.path(self.JOURNAL)):
+            # records already covered by the snapshot are skipped
+            if seq > snapshot_seq:
+                getattr(manager, op)(*args)
+                self.seq = seq
+                replayed += 1
+        self.since_snapshot = replayed
+        self.journal = Journal(self.path(self.JOURNAL), self.sync_every, self.sync_interval)
+        manager.journal = self
+        return replayed
+
+    def record(self, op, *args):
+        """
+        Appends one operation to the journal.
+        """
+        self.seq += 1
+        self.journal.append(self.seq, op, args)
+        self.since_snapshot += 1
+        if self.auto_snapshot and self.snapshot_due:
+            self.snapshot()
+
+    @property
+    def snapshot_due(self):
+        """
+        True once snapshot_every operations were recorded since the last snapshot.
+        """
+        return self.snapshot_every is not None and self.since_snapshot >= self.snapshot_every
+
+    def snapshot(self):
+        """
+        Writes the full manager state and starts an empty journal.
+        The snapshot is written to a temporary file and renamed, so a crash
+        leaves either the old or the new snapshot, never a partial one.
+        """
+        tmp = self.path(self.SNAPSHOT + '.tmp')
+        with open(tmp, 'wb') as file:
+            pickle.dump((self.seq, self.manager.snapshot_state()), file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.path(self.SNAPSHOT))
+        # a crash before this point only leaves records the snapshot skips
+        self.journal.close()
+        open(self.path(self.JOURNAL), 'w').close()
+        self.journal = Journal(self.path(self.JOURNAL), self.sync_every, self.sync_interval)
+        self.since_snapshot = 0
+
+    def close(self):
+        """
+        Flushes the journal and detaches from the manager.
+        """
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.manager is not None:
+            self.manager.journal = None